@@ -0,0 +1,91 @@
+"""
+商品添加流程的检查点
+
+按URL持久化每个已完成步骤的产出，失败后使用 --resume 重新运行时
+可以跳过已完成的抓取、OCR、分类推荐、规格ID生成和图片上传等步骤。
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from src.utils.cache import atomic_write_json, normalize_url, url_hash
+from src.utils.config import get_config
+from src.utils.logger import get_logger
+
+logger = get_logger("checkpoint")
+
+
+class CheckpointStore:
+    """按URL保存的流程检查点"""
+
+    def __init__(self, checkpoint_dir: Optional[str] = None):
+        """
+        初始化检查点存储
+
+        Args:
+            checkpoint_dir: 检查点目录，默认为 {CACHE_DIR}/checkpoints
+        """
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else Path(get_config().cache_dir) / "checkpoints"
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        """获取URL对应的检查点文件路径"""
+        return self.checkpoint_dir / f"{url_hash(url)}.json"
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        读取检查点
+
+        Args:
+            url: 商品URL
+
+        Returns:
+            {"completed": [...], "state": {...}}，不存在或损坏时返回None
+        """
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取检查点失败，忽略: {url}, 错误: {e}")
+            return None
+
+        if checkpoint.get("url") != normalize_url(url):
+            return None
+        return checkpoint
+
+    def save(self, url: str, completed: Iterable[str], state: Dict[str, Any]):
+        """
+        合并保存已完成的步骤产出
+
+        Args:
+            url: 商品URL
+            completed: 新完成的数据名称
+            state: 需要更新的状态字段
+        """
+        with self._lock:
+            checkpoint = self.load(url) or {"url": normalize_url(url), "completed": [], "state": {}}
+            for name in completed:
+                if name not in checkpoint["completed"]:
+                    checkpoint["completed"].append(name)
+            checkpoint["state"].update(state)
+            checkpoint["updated_at"] = time.time()
+            atomic_write_json(self._path(url), checkpoint)
+
+    def clear(self, url: str):
+        """
+        删除检查点
+
+        Args:
+            url: 商品URL
+        """
+        with self._lock:
+            try:
+                self._path(url).unlink()
+            except FileNotFoundError:
+                pass
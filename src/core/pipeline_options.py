@@ -0,0 +1,40 @@
+"""
+商品添加流程的运行选项
+
+每次调用 ProductManager.add_product 都持有一份独立的选项对象，
+取代之前通过进程级环境变量 FORCE_SCRAPE 传递缓存策略的做法，
+使同一进程内的多个流程可以并发运行且互不干扰。
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """单次商品添加流程的缓存策略"""
+    refresh_scrape: bool = False    # 忽略抓取缓存，重新抓取商品页面并重新下载图片
+    refresh_ocr: bool = False       # 忽略OCR缓存，重新识别图片文字
+    revalidate_images: bool = False # 对已下载的图片发送条件请求（ETag/Last-Modified），未变化时复用本地文件和OCR结果
+    refresh_uploads: bool = False   # 忽略已上传图片缓存，重新上传到Temu
+    refresh_templates: bool = False # 忽略分类模板缓存，重新获取模板
+    refresh_recommendations: bool = False  # 忽略分类推荐缓存，重新请求分类推荐
+    resume: bool = False            # 从上次失败的步骤继续（读取检查点）
+
+    @classmethod
+    def from_force_scrape(cls, force_scrape: bool) -> "PipelineOptions":
+        """
+        兼容旧的 force_scrape 开关
+
+        Args:
+            force_scrape: 是否强制重新抓取
+
+        Returns:
+            PipelineOptions: force_scrape 为True时刷新全部缓存，否则全部使用缓存
+        """
+        return cls(
+            refresh_scrape=force_scrape,
+            refresh_ocr=force_scrape,
+            refresh_uploads=force_scrape,
+            refresh_templates=force_scrape,
+            refresh_recommendations=force_scrape
+        )
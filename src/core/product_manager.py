@@ -7,6 +7,8 @@ import sys
 import time
 import json
 import hashlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from dotenv import load_dotenv
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -24,19 +26,85 @@ from src.image.ocr_client import OCRClient
 from src.image.size_chart_processor import SizeChartProcessor
 from src.transform.data_transformer import DataTransformer
 from src.transform.size_mapper import SizeMapper
+from src.transform.category_classifier import append_listing_history, get_category_classifier
 from temu_api import TemuClient
-from src.models.data_models import ProductData
+from src.scraper.scrape_cache import ScrapeCache
+from src.temu.category_index import get_category_index
+from src.utils.cache import get_named_cache, normalize_url, url_hash
+from src.models.data_models import ProductData, SizeInfo
+from src.models.product import TemuProduct
+from src.core.pipeline_options import PipelineOptions
+from src.core.workflow import WorkflowExecutor, WorkflowStep
+from src.core.checkpoint import CheckpointStore
+from src.utils.metrics import WorkflowMetrics
+from src.utils.http_client import get_http_client
+from src.utils.cassette import get_cassette
+from src.utils.circuit_breaker import get_circuit_breaker
+from src.utils.rate_limiter import get_rate_limiter, is_rate_limited_response
+from src.utils.config import get_config
 from PIL import Image
 import io
-import requests
 from src.utils.logger import get_logger
 
 logger = get_logger("product_manager")
 
+# 已上传图片就绪探测的单次超时（秒），等待快结束时按剩余时间缩短，但不低于下限
+_IMAGE_PROBE_TIMEOUT = 5.0
+_MIN_IMAGE_PROBE_TIMEOUT = 0.1
+# 图片已不存在的HEAD状态码，可以缓存
+_GONE_STATUSES = (404, 410)
+
+
+def spec_id_key(cat_id: Any, parent_spec_id: Any, child_spec_name: str) -> str:
+    """
+    生成规格ID缓存键（spec_id_get 的结果只与这三项有关）
+
+    Args:
+        cat_id: 分类ID
+        parent_spec_id: 父规格ID
+        child_spec_name: 子规格名称（如尺码）
+
+    Returns:
+        缓存键
+    """
+    return f"{cat_id}|{parent_spec_id}|{child_spec_name}"
+
+
+def upload_cache_key(source_url: str, scaling_type: Any, compression_type: Any,
+                     content_hash: Optional[str] = None) -> str:
+    """
+    生成图片上传缓存键
+
+    Args:
+        source_url: 原图URL
+        scaling_type: 缩放规格
+        compression_type: 压缩类型
+        content_hash: 原图内容的SHA-256（已下载时），提供时按内容而不是URL生成键
+
+    Returns:
+        缓存键
+    """
+    source = f"sha256:{content_hash}" if content_hash else url_hash(source_url)
+    return f"{source}|{scaling_type}|{compression_type}"
+
 
 class ProductManager:
     """商品管理器 - 生产环境的核心商品添加逻辑"""
     
+    # 检查点：工作流数据名称 -> 需要持久化的状态字段
+    CHECKPOINT_FIELDS = {
+        "scraped_product": ("scraped_product",),
+        "product_images": ("scraped_product",),
+        "size_chart": ("size_chart_cache",),
+        "temu_product": ("temu_product",),
+        "categories": ("categories_cache",),
+        "category_id": ("temu_product",),
+        "template": ("templates_cache",),
+        "spec_ids": ("spec_ids_cache",),
+        "valid_images": ("valid_images_cache",),
+        "uploaded_images": ("uploaded_images_cache",),
+    }
+    
     def __init__(self):
         """初始化商品管理器"""
         # 初始化各个模块
@@ -46,6 +114,10 @@ class ProductManager:
         self.size_chart_processor = SizeChartProcessor()
         self.size_mapper = SizeMapper()
         self.data_transformer = DataTransformer(self.size_mapper)
+        self.scrape_cache = ScrapeCache()
+        self.checkpoint_store = CheckpointStore()
+        self.category_index = get_category_index()
+        self.http_client = get_http_client()
         
         # 初始化Temu客户端
         self.temu_client = TemuClient(
@@ -63,39 +135,61 @@ class ProductManager:
         self.leaf_categories_cache = {}
         self.templates_cache = {}
         self.spec_ids_cache = {}
+        self.valid_images_cache = []
         self.uploaded_images_cache = []
         self.size_chart_cache = None
         
+        # 上传图片就绪等待耗时（秒）
+        self.image_ready_wait: Optional[float] = None
+        
+        # 运行选项（每次add_product调用独立设置）
+        self.options = PipelineOptions()
+        
+        # 耗时统计（每次add_product调用独立记录）
+        self.metrics = WorkflowMetrics()
+        
         # 运行结果
         self.created_goods_id: Optional[str] = None
         self.created_sku_ids: List[str] = []
     
-    def add_product(self, url: str, force_scrape: bool = False) -> Dict[str, Any]:
+    def add_product(self, url: str, force_scrape: bool = False,
+                    options: Optional[PipelineOptions] = None) -> Dict[str, Any]:
         """
         添加商品到Temu平台
         
         Args:
             url: 商品URL
-            force_scrape: 是否强制重新抓取
+            force_scrape: 是否强制重新抓取（未指定options时生效）
+            options: 本次运行的缓存策略，优先于force_scrape
             
         Returns:
             Dict: 添加结果
         """
         logger.info(f"开始添加商品: {url}")
         
+        self.options = options or PipelineOptions.from_force_scrape(force_scrape)
+        self.metrics = WorkflowMetrics(url)
+        self.image_ready_wait = None
+        logger.info(f"运行选项: {self.options}")
+        
         try:
-            # 设置强制抓取标志
-            if force_scrape:
-                os.environ["FORCE_SCRAPE"] = "1"
+            # 恢复检查点（仅在resume时），否则丢弃旧检查点从头开始
+            completed = []
+            if self.options.resume:
+                completed = self._restore_checkpoint(url)
+            else:
+                self.checkpoint_store.clear(url)
             
             # 执行完整的商品添加流程
-            success = self._execute_add_workflow(url)
+            success = self._execute_add_workflow(url, completed)
             
             if success:
+                self.checkpoint_store.clear(url)
                 result = {
                     "success": True,
                     "product_id": self.created_goods_id,
                     "sku_ids": self.created_sku_ids,
+                    "image_ready_wait": self.image_ready_wait,
                     "message": "商品添加成功"
                 }
                 logger.info(f"商品添加成功: {self.created_goods_id}")
@@ -107,93 +201,147 @@ class ProductManager:
                 }
                 logger.error("商品添加失败")
             
-            return result
-            
         except Exception as e:
             logger.error(f"商品添加异常: {e}")
-            return {
+            result = {
                 "success": False,
                 "error": f"异常: {e}",
                 "message": "商品添加过程中发生异常"
             }
-        finally:
-            # 清理环境变量
-            if "FORCE_SCRAPE" in os.environ:
-                del os.environ["FORCE_SCRAPE"]
+        
+        # 附带本次运行的耗时记录
+        result["timings"] = self.metrics.to_dict()
+        logger.info(f"商品耗时记录: {json.dumps(result['timings'], ensure_ascii=False)}")
+        return result
     
-    def _execute_add_workflow(self, url: str) -> bool:
-        """执行完整的商品添加工作流"""
+    def _execute_add_workflow(self, url: str, completed: Optional[List[str]] = None) -> bool:
+        """
+        执行完整的商品添加工作流（按步骤依赖关系并发执行）
+        
+        Args:
+            url: 商品URL
+            completed: 检查点中已完成的数据名称，对应步骤将被跳过
+        """
         workflow_steps = [
-            ("抓取商品信息", self._scrape_product),
-            ("处理商品图片", self._process_images),
-            ("处理尺码表", self._process_size_chart),
-            ("转换数据格式", self._transform_data),
-            ("获取商品分类", self._get_categories),
-            ("获取分类推荐", self._get_category_recommendation),
-            # ("查找叶子分类", self._find_leaf_category),  # 暂时禁用叶子分类查找
-            ("获取分类模板", self._get_category_template),
-            ("生成规格ID", self._generate_spec_ids),
-            ("上传商品图片", self._upload_images),
-            ("添加商品", self._create_product)
+            WorkflowStep("抓取商品信息", partial(self._scrape_product, url), provides=("scraped_product",)),
+            WorkflowStep("处理商品图片", self._process_images, requires=("scraped_product",), provides=("product_images",)),
+            # 尺码表解析依赖catType，需等待分类确定，避免读取正在写入的分类ID
+            WorkflowStep("处理尺码表", self._process_size_chart, requires=("product_images", "category_id"), provides=("size_chart",)),
+            WorkflowStep("转换数据格式", self._transform_data, requires=("product_images",), provides=("temu_product",)),
+            WorkflowStep("获取商品分类", self._get_categories, provides=("categories",)),
+            WorkflowStep("获取分类推荐", self._get_category_recommendation, requires=("temu_product",), provides=("category_id",)),
+            # WorkflowStep("查找叶子分类", self._find_leaf_category, ...),  # 暂时禁用叶子分类查找
+            WorkflowStep("获取分类模板", self._get_category_template, requires=("category_id",), provides=("template",)),
+            # 规格ID需要读取模板中的inputMaxSpecNum与父规格，因此依赖模板
+            WorkflowStep("生成规格ID", self._generate_spec_ids, requires=("template",), provides=("spec_ids",)),
+            WorkflowStep("校验商品图片", self._validate_images, requires=("product_images",), provides=("valid_images",)),
+            WorkflowStep("上传商品图片", self._upload_images, requires=("valid_images", "category_id"), provides=("uploaded_images",)),
+            WorkflowStep(
+                "添加商品", self._create_product,
+                requires=("categories", "size_chart", "template", "spec_ids", "uploaded_images"),
+                provides=("goods_id",)
+            ),
         ]
         
-        for step_name, step_func in workflow_steps:
-            logger.info(f"执行步骤: {step_name}")
+        max_workers = get_config().workflow_max_workers
+        executor = WorkflowExecutor(
+            workflow_steps, max_workers=max_workers, logger=logger,
+            on_step_complete=partial(self._save_checkpoint, url),
+            metrics=self.metrics
+        )
+        return executor.run(available=completed)
+    
+    def _call_temu(self, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """
+        调用Temu商品API：按端点限流，被限流时按 retry_after 等待后重试，并记录调用次数与耗时；
+        启用录制/回放时经过磁带（回放时不占用限流令牌）。网络异常计入Temu熔断器，
+        熔断期间直接抛出 CircuitOpenException
+        
+        Args:
+            endpoint: temu_client.product 上的方法名，如 goods_add
+            **kwargs: API参数
+            
+        Returns:
+            Dict: API响应
+        """
+        limiter = get_rate_limiter()
+        cassette = get_cassette()
+        breaker = get_circuit_breaker("temu")
+        retries = get_config().temu_rate_limit_retries
+        for attempt in range(retries + 1):
+            if cassette.mode != "replay":
+                self.metrics.record_rate_wait(endpoint, limiter.acquire(endpoint))
+            start_time = time.perf_counter()
+            success = False
             try:
-                if step_name == "抓取商品信息":
-                    success = step_func(url)
-                else:
-                    success = step_func()
-                
-                if not success:
-                    logger.error(f"步骤失败: {step_name}")
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"步骤异常: {step_name}, 错误: {e}")
-                return False
+                result = cassette.call(
+                    "temu", endpoint, {"endpoint": endpoint, **kwargs},
+                    partial(breaker.call, getattr(self.temu_client.product, endpoint), **kwargs)
+                )
+                success = isinstance(result, dict) and bool(result.get("success"))
+            finally:
+                self.metrics.record_api_call(endpoint, time.perf_counter() - start_time, success)
+            
+            if is_rate_limited_response(result) and attempt < retries:
+                limiter.report_rate_limited(endpoint, result.get("retryAfter"))
+                continue
+            return result
+    
+    def _save_checkpoint(self, url: str, step: WorkflowStep):
+        """保存步骤产出到检查点"""
+        state = {}
+        for name in step.provides:
+            for field_name in self.CHECKPOINT_FIELDS.get(name, ()):
+                value = getattr(self, field_name)
+                state[field_name] = value.to_dict() if hasattr(value, "to_dict") else value
+        self.checkpoint_store.save(url, step.provides, state)
+    
+    def _restore_checkpoint(self, url: str) -> List[str]:
+        """
+        从检查点恢复状态
         
-        return True
+        Returns:
+            List[str]: 已完成的数据名称，无检查点或恢复失败时为空
+        """
+        checkpoint = self.checkpoint_store.load(url)
+        if not checkpoint:
+            logger.info("没有可用的检查点，从头开始")
+            return []
+        
+        try:
+            state = checkpoint.get("state") or {}
+            for field_name, value in state.items():
+                if field_name == "scraped_product" and value is not None:
+                    value = ProductData.from_dict(value)
+                elif field_name == "temu_product" and value is not None:
+                    value = TemuProduct.from_dict(value)
+                setattr(self, field_name, value)
+        except Exception as e:
+            logger.warning(f"恢复检查点失败，从头开始: {e}")
+            return []
+        
+        completed = checkpoint.get("completed") or []
+        logger.info(f"从检查点恢复，已完成: {', '.join(completed)}")
+        return completed
     
     def _scrape_product(self, url: str) -> bool:
         """抓取商品信息"""
         try:
-            # 优先使用缓存，避免重复抓取
-            cache_path = "scraped_product.json"
-            if os.path.exists(cache_path) and os.getenv("FORCE_SCRAPE") != "1":
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                try:
-                    self.scraped_product = ProductData.from_dict(data)
-                    logger.info(f"成功加载缓存数据: {self.scraped_product.name}, 详情图片: {len(self.scraped_product.detail_images)} 张")
-                except Exception as e:
-                    logger.warning(f"ProductData.from_dict失败: {e}, 使用兼容模式")
-                    # 兼容旧结构
-                    self.scraped_product = ProductData(
-                        url=data.get("url", url),
-                        name=data.get("name", ""),
-                        price=float(data.get("price", 0) or 0),
-                        description=data.get("description", ""),
-                        main_image_url=data.get("main_image_url") or "",
-                        detail_images=data.get("detail_images") or [],
-                        sizes=[
-                            (lambda s: s)(
-                                __import__("src.models.data_models", fromlist=["SizeInfo"]).SizeInfo(**sd)
-                            ) if isinstance(sd, dict) else sd
-                            for sd in (data.get("sizes") or [])
-                        ],
-                    )
-                    logger.info(f"兼容模式加载成功: {self.scraped_product.name}, 详情图片: {len(self.scraped_product.detail_images)} 张")
-                logger.info("使用缓存的抓取结果")
-                return True
+            # 优先使用按URL缓存的抓取结果，避免重复调用Firecrawl
+            if not self.options.refresh_scrape:
+                data = self.scrape_cache.get(url)
+                if data is not None:
+                    self.scraped_product = self._load_cached_product(data, url)
+                    logger.info("使用缓存的抓取结果")
+                    return True
 
             # 抓取商品信息
             self.scraped_product = self.scraper.scrape_product(url)
             
             if self.scraped_product:
                 logger.info(f"商品抓取成功: {self.scraped_product.name}")
-                # 保存抓取的商品信息到文件
-                self._save_scraped_product()
+                # 保存抓取的商品信息到缓存
+                self._save_scraped_product(url)
                 return True
             else:
                 logger.error("商品抓取失败")
@@ -203,6 +351,29 @@ class ProductManager:
             logger.error(f"商品抓取异常: {e}")
             return False
     
+    def _load_cached_product(self, data: Dict[str, Any], url: str) -> ProductData:
+        """从缓存数据恢复ProductData"""
+        try:
+            product = ProductData.from_dict(dict(data))
+            logger.info(f"成功加载缓存数据: {product.name}, 详情图片: {len(product.detail_images)} 张")
+        except Exception as e:
+            logger.warning(f"ProductData.from_dict失败: {e}, 使用兼容模式")
+            # 兼容旧结构
+            product = ProductData(
+                url=data.get("url", url),
+                name=data.get("name", ""),
+                price=float(data.get("price", 0) or 0),
+                description=data.get("description", ""),
+                main_image_url=data.get("main_image_url") or "",
+                detail_images=data.get("detail_images") or [],
+                sizes=[
+                    SizeInfo(**sd) if isinstance(sd, dict) else sd
+                    for sd in (data.get("sizes") or [])
+                ],
+            )
+            logger.info(f"兼容模式加载成功: {product.name}, 详情图片: {len(product.detail_images)} 张")
+        return product
+    
     def _process_images(self) -> bool:
         """处理商品图片"""
         if not self.scraped_product:
@@ -219,11 +390,13 @@ class ProductManager:
             return True
         
         try:
-            # 检查是否强制抓取
-            force_scrape = os.getenv("FORCE_SCRAPE") == "1"
-            
             # 处理图片
-            result = self.image_processor.process_images(all_images, force_scrape=force_scrape)
+            result = self.image_processor.process_images(
+                all_images,
+                force_scrape=self.options.refresh_scrape,
+                force_ocr=self.options.refresh_ocr,
+                revalidate=self.options.revalidate_images
+            )
             logger.info(f"图片处理完成: 主图 {len(result['main'])}, 详情图 {len(result['detail'])}")
             
             # 保存处理后的图片信息 - 保存原始URL而不是文件路径
@@ -257,8 +430,8 @@ class ProductManager:
             return True
         
         try:
-            # 获取商品分类类型
-            cat_type = self._get_cat_type(int(self.temu_product.category_id)) if self.temu_product else 0
+            # 获取商品分类类型（与数据转换并发执行，分类可能尚未确定）
+            cat_type = self._current_cat_type()
             
             # 尝试从详情图片中提取尺码表
             for i, image_url in enumerate(detail_images[:3]):  # 只检查前3张详情图
@@ -312,16 +485,15 @@ class ProductManager:
             return False
     
     def _get_categories(self) -> bool:
-        """获取商品分类"""
+        """获取商品分类（一级分类，优先读取分类索引）"""
         try:
-            result = self.temu_client.product.cats_get(parent_cat_id=0)
-            if result.get("success"):
-                categories = result.get("result", {}).get("goodsCatsList", [])
+            categories = self.category_index.children(0, self._fetch_child_categories)
+            if categories is not None:
                 self.categories_cache = {cat.get("catId"): cat for cat in categories}
                 logger.info(f"获取到 {len(categories)} 个分类")
                 return True
             else:
-                logger.error(f"获取分类失败: {result.get('errorMsg')}")
+                logger.error("获取分类失败")
                 return False
         except Exception as e:
             logger.error(f"获取分类异常: {e}")
@@ -333,6 +505,26 @@ class ProductManager:
             return False
         
         try:
+            # 按标题指纹查询推荐缓存
+            fingerprint = self.data_transformer.title_fingerprint(self.temu_product.title)
+            recommendation_cache = get_named_cache("recommendations", get_config().recommendation_cache_ttl)
+            if fingerprint and not self.options.refresh_recommendations:
+                cached = recommendation_cache.get(fingerprint)
+                if cached and cached.get("catId"):
+                    self.temu_product.category_id = str(cached["catId"])
+                    logger.info(f"分类推荐缓存命中: {cached.get('catName', 'Unknown')} (ID: {cached['catId']})")
+                    return True
+
+            # 本地分类器高置信度时不再请求远程推荐
+            classifier = get_category_classifier()
+            threshold = get_config().category_classifier_threshold
+            if not self.options.refresh_recommendations:
+                prediction = classifier.predict(self.temu_product.title)
+                if prediction and prediction[1] >= threshold:
+                    self.temu_product.category_id = str(prediction[0])
+                    logger.info(f"本地分类器命中: {prediction[0]} (置信度 {prediction[1]:.2f})")
+                    return True
+
             # 多策略尝试
             attempts = [
                 dict(goods_name=self.temu_product.title, description=None, image_url=None, expand_cat_type=None),
@@ -342,7 +534,7 @@ class ProductManager:
 
             for args in attempts:
                 try:
-                    res = self.temu_client.product.category_recommend(**args)
+                    res = self._call_temu("category_recommend", **args)
                 except Exception as e:
                     continue
                 if res.get("success"):
@@ -353,6 +545,10 @@ class ProductManager:
                         logger.info(f"分类推荐成功: {cat_name} (ID: {cat_id})")
                         logger.info(f"推荐分类列表: {recommended_cat.get('catIdList', [])}")
                         self.temu_product.category_id = str(cat_id)
+                        if fingerprint:
+                            recommendation_cache.set(fingerprint, {"catId": cat_id, "catName": cat_name})
+                        append_listing_history(self.temu_product.title, cat_id, cat_name)
+                        classifier.add(self.temu_product.title, cat_id)
                         return True
                 else:
                     logger.warning(f"推荐失败: {res.get('errorMsg')}")
@@ -395,10 +591,13 @@ class ProductManager:
             return False
         
         try:
-            result = self.temu_client.product.template_get(cat_id=self.temu_product.category_id)
-            if result.get("success"):
-                template = result.get("result", {})
-                self.templates_cache[self.temu_product.category_id] = template
+            cat_id = self.temu_product.category_id
+            template = get_named_cache("templates", get_config().template_cache_ttl).get_or_load(
+                str(cat_id), partial(self._fetch_category_template, cat_id),
+                refresh=self.options.refresh_templates
+            )
+            if template is not None:
+                self.templates_cache[cat_id] = template
                 
                 properties = template.get("propertyList", [])
                 required_properties = [p for p in properties if p.get("required", False)]
@@ -406,12 +605,27 @@ class ProductManager:
                 logger.info(f"获取分类模板成功: 属性数量 {len(properties)}, 必填属性 {len(required_properties)}")
                 return True
             else:
-                logger.error(f"获取分类模板失败: {result.get('errorMsg')}")
                 return False
         except Exception as e:
             logger.error(f"获取分类模板异常: {e}")
             return False
     
+    def _fetch_category_template(self, cat_id: str) -> Optional[Dict[str, Any]]:
+        """调用template_get获取分类模板，失败时返回None"""
+        result = self._call_temu("template_get", cat_id=cat_id)
+        if not result.get("success"):
+            logger.error(f"获取分类模板失败: {result.get('errorMsg')}")
+            return None
+        return result.get("result") or {}
+    
+    def _category_template(self) -> Dict[str, Any]:
+        """获取当前分类的模板（本次运行的模板，其次为共享模板缓存）"""
+        cat_id = self.temu_product.category_id
+        template = self.templates_cache.get(cat_id)
+        if template is None and cat_id:
+            template = get_named_cache("templates", get_config().template_cache_ttl).get(str(cat_id))
+        return template if isinstance(template, dict) else {}
+    
     def _generate_spec_ids(self) -> bool:
         """生成规格ID"""
         if not self.temu_product.category_id:
@@ -419,8 +633,8 @@ class ProductManager:
         
         try:
             # 检查模板能力
-            tmpl = self.templates_cache.get(self.temu_product.category_id) or {}
-            if isinstance(tmpl, dict) and tmpl.get("inputMaxSpecNum") == 0:
+            tmpl = self._category_template()
+            if tmpl.get("inputMaxSpecNum") == 0:
                 # 不允许自定义规格
                 self.spec_ids_cache[self.temu_product.category_id] = {}
                 logger.info("当前类目不支持自定义规格，跳过生成specId")
@@ -444,29 +658,59 @@ class ProductManager:
                 if s and s not in sizes:
                     sizes.append(s)
 
-            for spec_value in sizes or ["Default"]:
-                result = self.temu_client.product.spec_id_get(
-                    cat_id=int(self.temu_product.category_id),
-                    parent_spec_id=int(parent_spec_id),
-                    child_spec_name=spec_value
-                )
-                if result.get("success"):
-                    spec_id = result.get("result", {}).get("specId")
-                    spec_ids[spec_value] = spec_id
-                    logger.info(f"生成尺码规格ID: {spec_value} -> {spec_id}")
+            # 先查规格ID缓存，未命中的尺码并发请求
+            cat_id = int(self.temu_product.category_id)
+            parent_spec_id = int(parent_spec_id)
+            spec_values = sizes or ["Default"]
+            memo = get_named_cache("spec_ids", get_config().spec_id_cache_ttl)
+            resolved = {}
+            missing = []
+            for spec_value in spec_values:
+                spec_id = memo.get(spec_id_key(cat_id, parent_spec_id, spec_value))
+                if spec_id is not None:
+                    resolved[spec_value] = spec_id
                 else:
-                    logger.warning(f"生成尺码规格ID失败: {spec_value} - {result.get('errorMsg')}")
+                    missing.append(spec_value)
+
+            if missing:
+                max_workers = min(get_config().spec_id_max_workers, len(missing))
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spec-id") as pool:
+                    results = pool.map(partial(self._resolve_spec_id, cat_id, parent_spec_id), missing)
+                    for spec_value, spec_id in zip(missing, results):
+                        if spec_id is not None:
+                            resolved[spec_value] = spec_id
 
+            # 保持尺码顺序
+            spec_ids = {v: resolved[v] for v in spec_values if v in resolved}
             self.spec_ids_cache[self.temu_product.category_id] = spec_ids
-            logger.info("规格ID生成完成")
+            logger.info(f"规格ID生成完成: 缓存命中 {len(spec_values) - len(missing)} 个, 新请求 {len(missing)} 个")
             return True
         
         except Exception as e:
             logger.error(f"生成规格ID异常: {e}")
             return False
     
-    def _upload_images(self) -> bool:
-        """上传图片"""
+    def _resolve_spec_id(self, cat_id: int, parent_spec_id: int, spec_value: str) -> Optional[Any]:
+        """调用spec_id_get生成规格ID并写入缓存，失败时返回None"""
+        result = self._call_temu(
+            "spec_id_get",
+            cat_id=cat_id,
+            parent_spec_id=parent_spec_id,
+            child_spec_name=spec_value
+        )
+        if not result.get("success"):
+            logger.warning(f"生成尺码规格ID失败: {spec_value} - {result.get('errorMsg')}")
+            return None
+        spec_id = (result.get("result") or {}).get("specId")
+        if spec_id is None:
+            return None
+        memo = get_named_cache("spec_ids", get_config().spec_id_cache_ttl)
+        memo.set(spec_id_key(cat_id, parent_spec_id, spec_value), spec_id)
+        logger.info(f"生成尺码规格ID: {spec_value} -> {spec_id}")
+        return spec_id
+    
+    def _collect_candidate_images(self) -> List[str]:
+        """收集候选图片URL"""
         # 收集候选图片URL - 优先使用scraped_product的图片，因为它通常更完整
         all_images = []
         
@@ -508,8 +752,36 @@ class ProductManager:
                 pass
         
         logger.info(f"总共收集到 {len(all_images)} 张候选图片")
+        return all_images
+    
+    def _validate_images(self) -> bool:
+        """校验候选图片（与分类推荐等步骤并发执行）"""
+        all_images = self._collect_candidate_images()
         
         if not all_images:
+            logger.info("没有候选图片需要校验")
+            self.valid_images_cache = []
+            return True
+        
+        try:
+            # 过滤和选择最佳图片
+            valid_images = self._filter_and_select_images(all_images)
+            if not valid_images:
+                logger.error("没有符合要求的图片")
+                return False
+            
+            self.valid_images_cache = valid_images
+            return True
+        
+        except Exception as e:
+            logger.error(f"校验图片异常: {e}")
+            return False
+    
+    def _upload_images(self) -> bool:
+        """上传图片"""
+        valid_images = self.valid_images_cache
+        
+        if not valid_images:
             logger.info("没有图片需要上传")
             return True
         
@@ -526,37 +798,17 @@ class ProductManager:
                 scaling_type = 1  # 800x800
                 logger.info(f"图片缩放规格: {scaling_type} (800x800 - 非服装类)")
             
-            # 过滤和选择最佳图片
-            valid_images = self._filter_and_select_images(all_images, cat_type)
-            if not valid_images:
-                logger.error("没有符合要求的图片")
-                return False
-            
             logger.info(f"准备上传 {len(valid_images)} 张图片")
             
-            uploaded_images = []
-            for i, image_url in enumerate(valid_images):
-                if len(uploaded_images) >= 5:
-                    break
-                    
-                logger.info(f"处理图片 {len(uploaded_images)+1}/{min(5, len(valid_images))}: {image_url[:80]}...")
-                
-                # 使用重试机制上传图片
-                success = self._upload_single_image_with_retry(
-                    image_url, scaling_type, uploaded_images, max_retries=3
-                )
-                
-                if not success:
-                    logger.warning(f"图片上传失败，跳过: {image_url[:50]}...")
+            uploaded_images = self._upload_images_concurrently(valid_images, scaling_type, limit=5)
 
             self.uploaded_images_cache = uploaded_images
             logger.info(f"图片上传完成，成功上传 {len(uploaded_images)} 张")
             logger.info(f"上传的图片URLs: {uploaded_images}")
             
-            # 等待图片处理完成
+            # 等待图片处理完成（轮询至图片可访问）
             if uploaded_images:
-                logger.info("等待图片处理完成...")
-                time.sleep(10)  # 增加等待时间
+                self._wait_for_images_ready(uploaded_images)
             
             return len(uploaded_images) > 0
 
@@ -587,7 +839,7 @@ class ProductManager:
             if product_data.get("goodsSizeChartList"):
                 goods_add_params["goodsSizeChartList"] = product_data["goodsSizeChartList"]
             
-            result = self.temu_client.product.goods_add(**goods_add_params)
+            result = self._call_temu("goods_add", **goods_add_params)
             
             if result.get("success"):
                 result_obj = result.get("result", {}) or {}
@@ -615,7 +867,7 @@ class ProductManager:
         try:
             import tempfile
             
-            response = requests.get(image_url, timeout=30)
+            response = self.http_client.get(image_url, timeout=30)
             response.raise_for_status()
             
             # 创建临时文件
@@ -627,6 +879,62 @@ class ProductManager:
             logger.error(f"下载图片失败: {e}")
             return None
     
+    def _wait_for_images_ready(self, image_urls: List[str]) -> bool:
+        """
+        轮询已上传图片直到全部可访问，使用指数退避，最长等待 IMAGE_READY_TIMEOUT 秒
+        
+        每轮并发探测（并发数为 IMAGE_VALIDATION_CONCURRENCY）仍未就绪的图片，
+        单次探测的超时不超过剩余的等待时间。
+        
+        Args:
+            image_urls: 已上传的Temu图片URL
+            
+        Returns:
+            bool: 是否在超时前全部就绪
+        """
+        config = get_config()
+        timeout = config.image_ready_timeout
+        delay = config.image_ready_poll_interval
+        concurrency = max(1, min(config.image_validation_concurrency, len(image_urls)))
+        
+        logger.info(f"等待图片处理完成: {len(image_urls)} 张, 最长 {timeout:.1f} 秒")
+        start_time = time.perf_counter()
+        pending = list(image_urls)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image-ready") as pool:
+            while True:
+                remaining = timeout - (time.perf_counter() - start_time)
+                probe = partial(self._is_image_url_ready,
+                                timeout=min(_IMAGE_PROBE_TIMEOUT, max(remaining, _MIN_IMAGE_PROBE_TIMEOUT)))
+                ready = list(pool.map(probe, pending))
+                pending = [url for url, ok in zip(pending, ready) if not ok]
+                elapsed = time.perf_counter() - start_time
+                if not pending or elapsed >= timeout:
+                    break
+                time.sleep(min(delay, timeout - elapsed))
+                delay *= 2
+        
+        self.image_ready_wait = round(elapsed, 3)
+        # 计入耗时记录，出现在批量结果和 --timing-report 中，用于调整 IMAGE_READY_TIMEOUT
+        self.metrics.record_step("等待图片就绪", elapsed)
+        if pending:
+            logger.warning(f"图片就绪等待超时: {elapsed:.2f} 秒, 仍有 {len(pending)} 张未就绪")
+            return False
+        logger.info(f"图片已全部就绪, 等待 {elapsed:.2f} 秒")
+        return True
+    
+    def _is_image_url_ready(self, image_url: str, timeout: float = _IMAGE_PROBE_TIMEOUT) -> bool:
+        """检查图片URL是否已可访问"""
+        try:
+            response = self.http_client.head(image_url, timeout=timeout, allow_redirects=True)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    def _current_cat_type(self) -> int:
+        """按已确定的分类ID获取catType（调用步骤须依赖 category_id），未获得分类时按默认规则"""
+        cat_id = self.temu_product.category_id if self.temu_product else None
+        return self._get_cat_type(int(cat_id) if cat_id else 0)
+    
     def _get_cat_type(self, target_cat_id: int) -> int:
         """获取catType（0=服饰，1=非服饰）- 默认返回服装类"""
         try:
@@ -636,74 +944,46 @@ class ProductManager:
                 logger.info(f"使用环境变量指定的catType: {env_cat_type}")
                 return int(env_cat_type)
 
+            # 分类索引中已知的catType
+            if target_cat_id:
+                cat_type = self.category_index.cat_type(target_cat_id)
+                if cat_type is not None:
+                    logger.info(f"从分类索引获取catType: {cat_type} (分类ID: {target_cat_id})")
+                    return cat_type
+
             # 默认返回服装类（catType=0）
             logger.info("默认使用服装类分类 (catType=0)")
             return 0
-
-            # 以下代码已注释，如需启用可取消注释
-            # # 已知类目快速规则
-            # if str(target_cat_id) == "30847" or str(self.temu_product.category_id) == "30847":
-            #     logger.info("使用已知服装类目: 30847")
-            #     return 0
-
-            # # 从模板缓存中尝试读取
-            # tmpl = self.templates_cache.get(str(target_cat_id)) or self.templates_cache.get(self.temu_product.category_id) or {}
-            # if isinstance(tmpl, dict) and "catType" in tmpl:
-            #     cat_type = int(tmpl.get("catType", 1))
-            #     logger.info(f"从模板缓存获取catType: {cat_type}")
-            #     return cat_type
-
-            # # 智能判断：基于商品标题和描述（优先执行）
-            # if self.temu_product and self.temu_product.title:
-            #     title_lower = self.temu_product.title.lower()
-            #     # 英文关键词
-            #     english_keywords = ['pants', 'trousers', 'shirt', 'dress', 'jacket', 'coat', 'sweater', 'hoodie', 'jeans', 'shorts', 'skirt', 'blouse', 'top', 'bottom', 'clothing', 'apparel', 'fashion', 'wear', 'outfit', 'garment']
-            #     # 中文关键词（扩展更多服装相关词汇）
-            #     chinese_keywords = ['裤', '衣', '裙', '外套', '衬衫', '卫衣', '毛衣', '夹克', '大衣', '短裤', '长裤', '牛仔裤', '运动裤', '休闲裤', '工装裤', '登山裤', '街舞', 'hiphop', '机能', '户外', '运动', '休闲', '服装', '服饰', '针织衫', '背心', '马甲', '坎肩', '毛织', '无袖', '情侣', '学院风']
-            #     
-            #     if any(keyword in title_lower for keyword in english_keywords) or any(keyword in self.temu_product.title for keyword in chinese_keywords):
-            #         logger.info(f"基于商品标题判断为服装类: {self.temu_product.title}")
-            #         return 0
-
-            # # 受限BFS查找
-            # queue = [0]
-            # visited = set()
-            # api_calls = 0
-            # max_calls = 30  # 减少API调用次数
-            # while queue and api_calls < max_calls:
-            #     parent = queue.pop(0)
-            #     if parent in visited:
-            #         continue
-            #     visited.add(parent)
-            #     resp = self.temu_client.product.cats_get(parent_cat_id=parent)
-            #     api_calls += 1
-            #     if not resp.get("success"):
-            #         continue
-            #     lst = (resp.get("result") or {}).get("goodsCatsList") or []
-            #     for c in lst:
-            #         cid = c.get("catId")
-            #         if cid == target_cat_id:
-            #             ct = int(c.get("catType", 1))
-            #             logger.info(f"通过BFS找到catType: {ct} (分类ID: {target_cat_id})")
-            #             return ct
-            #         queue.append(cid)
-            # 
-            # logger.warning(f"未在限制内解析catType，使用默认1 (API calls={api_calls})")
         except Exception as e:
             logger.warning(f"获取catType异常: {e}，使用默认服装类")
         return 0  # 默认返回服装类
     
-    def _filter_and_select_images(self, image_urls: List[str], cat_type: int) -> List[str]:
-        """过滤和选择最佳图片"""
-        valid_urls = []
-        force_scrape = os.getenv("FORCE_SCRAPE") == "1"
+    def _filter_and_select_images(self, image_urls: List[str], max_valid: Optional[int] = None) -> List[str]:
+        """
+        过滤和选择最佳图片
         
-        for i, url in enumerate(image_urls):
+        并发发送HEAD请求校验候选图片（复用连接，结果按URL短期缓存），
+        按原顺序找到足够数量的有效图片后即停止。
+        
+        Args:
+            image_urls: 候选图片URL
+            max_valid: 需要的有效图片数，默认为 IMAGE_VALIDATION_TARGET
+            
+        Returns:
+            按原顺序排列的有效图片URL
+        """
+        force_ocr = self.options.refresh_ocr
+        config = get_config()
+        target = max_valid or config.image_validation_target
+        concurrency = config.image_validation_concurrency
+        
+        candidates = []
+        for url in image_urls:
             if not isinstance(url, str) or not url.startswith("http"):
                 continue
                 
-            # 检查是否已缓存为含中文图片（仅在非强制抓取时使用缓存）
-            if not force_scrape:
+            # 检查是否已缓存为含中文图片（仅在不刷新OCR时使用缓存）
+            if not force_ocr:
                 try:
                     cached = self.image_processor._get_cached_ocr(url)
                     if cached is not None and bool(cached[0]):
@@ -711,35 +991,139 @@ class ProductManager:
                         continue
                 except Exception:
                     pass
-            
-            # 简化验证：直接使用URL，不下载到本地
+            candidates.append(url)
+        
+        results: Dict[int, bool] = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image-head") as pool:
+            in_flight = {}
+            while True:
+                while next_index < len(candidates) and len(in_flight) < concurrency:
+                    in_flight[pool.submit(self._is_valid_image_url, candidates[next_index])] = next_index
+                    next_index += 1
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[in_flight.pop(future)] = future.result()
+                
+                # 已完成的连续前缀中有效图片足够时停止
+                prefix_valid = 0
+                for index in range(len(candidates)):
+                    if index not in results:
+                        break
+                    prefix_valid += results[index]
+                if prefix_valid >= target:
+                    break
+        
+        valid_urls = [candidates[index] for index in sorted(results) if results[index]][:target]
+        logger.info(f"图片过滤完成: 输入 {len(image_urls)} 张，校验 {len(results)} 张，输出 {len(valid_urls)} 张")
+        return valid_urls
+    
+    def _is_valid_image_url(self, url: str) -> bool:
+        """HEAD校验图片URL（状态码200且为图片类型），确定的结果（200、404/410）按URL短期缓存"""
+        head_cache = get_named_cache("image_head", get_config().head_cache_ttl)
+        cache_key = normalize_url(url)
+        outcome = head_cache.get(cache_key)
+        if outcome is None:
             try:
-                response = requests.head(url, timeout=10)
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'image' in content_type:
-                        valid_urls.append(url)
-                        logger.info(f"图片验证通过: {url[:60]}...")
-                        
+                response = self.http_client.head(url, timeout=10)
             except Exception:
                 logger.warning(f"图片验证失败: {url[:60]}...")
-                continue
+                return False
+            outcome = {
+                "status": response.status_code,
+                "content_type": response.headers.get('content-type', '').lower(),
+                "content_length": response.headers.get('content-length'),
+            }
+            # 只缓存确定的结果；限流、5xx和缺少类型的响应可能只是暂时的
+            if outcome["status"] in _GONE_STATUSES or (outcome["status"] == 200 and outcome["content_type"]):
+                head_cache.set(cache_key, outcome)
         
-        logger.info(f"图片过滤完成: 输入 {len(image_urls)} 张，输出 {len(valid_urls)} 张")
-        return valid_urls
+        if outcome["status"] == 200 and 'image' in outcome["content_type"]:
+            logger.info(f"图片验证通过: {url[:60]}...")
+            return True
+        return False
+    
+    def _upload_images_concurrently(self, image_urls: List[str], scaling_type: int, limit: int = 5) -> List[str]:
+        """
+        有限并发上传图片，按原图顺序返回前limit张上传成功的图片
+        
+        按顺序提交上传任务，在途任务数不超过 IMAGE_UPLOAD_CONCURRENCY，
+        且已成功数与在途数之和不超过limit，失败时再提交下一张，
+        因此得到的图片与逐张上传时相同。
+        
+        Args:
+            image_urls: 待上传的图片URL（按轮播图顺序）
+            scaling_type: 缩放规格
+            limit: 最多上传成功的张数
+            
+        Returns:
+            上传后的图片URL列表
+        """
+        concurrency = get_config().image_upload_concurrency
+        uploaded: Dict[int, str] = {}
+        next_index = 0
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image-upload") as pool:
+            in_flight = {}
+            while True:
+                while (next_index < len(image_urls) and len(in_flight) < concurrency
+                       and len(uploaded) + len(in_flight) < limit):
+                    image_url = image_urls[next_index]
+                    logger.info(f"上传图片 {next_index + 1}/{len(image_urls)}: {image_url[:80]}...")
+                    future = pool.submit(self._upload_single_image_with_retry, image_url, scaling_type, max_retries=3)
+                    in_flight[future] = next_index
+                    next_index += 1
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    try:
+                        processed_url = future.result()
+                    except Exception as e:
+                        logger.warning(f"上传图片异常: {e}")
+                        processed_url = None
+                    if processed_url:
+                        uploaded[index] = processed_url
+                    else:
+                        logger.warning(f"图片上传失败，跳过: {image_urls[index][:50]}...")
+        
+        return [uploaded[index] for index in sorted(uploaded)]
     
-    def _upload_single_image_with_retry(self, image_url: str, scaling_type: int, 
-                                      uploaded_images: List[str], max_retries: int = 3) -> bool:
-        """使用重试机制上传单张图片"""
+    def _upload_single_image_with_retry(self, image_url: str, scaling_type: int,
+                                        max_retries: int = 3) -> Optional[str]:
+        """使用重试机制上传单张图片，成功时返回上传后的图片URL（优先复用已上传的结果）"""
+        compression_type = 1
+        upload_cache = get_named_cache("uploads", get_config().upload_cache_ttl)
+        cache_key = upload_cache_key(
+            image_url, scaling_type, compression_type,
+            content_hash=self.image_processor.get_content_hash(image_url)
+        )
+        if not self.options.refresh_uploads:
+            cached_url = upload_cache.get(cache_key)
+            if cached_url:
+                if self._is_image_url_ready(cached_url):
+                    logger.info(f"复用已上传图片: {cached_url}")
+                    return cached_url
+                logger.info(f"已上传图片已失效，重新上传: {cached_url}")
+                upload_cache.invalidate(cache_key)
+        
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
                     time.sleep(2 ** attempt)  # 指数退避
                 
-                resp = self.temu_client.product.image_upload(
+                resp = self._call_temu(
+                    "image_upload",
                     scaling_type=scaling_type,
                     file_url=image_url,
-                    compression_type=1,
+                    compression_type=compression_type,
                     format_conversion_type=0
                 )
                 
@@ -753,58 +1137,48 @@ class ProductManager:
                     )
                     
                     if processed_url:
-                        uploaded_images.append(processed_url)
                         logger.info(f"图片上传成功: {processed_url}")
                         logger.info(f"完整上传响应: {resp}")
-                        return True
+                        upload_cache.set(cache_key, processed_url)
+                        return processed_url
                     else:
                         logger.warning(f"图片上传响应中缺少URL: {resp}")
-                        return False
+                        return None
                 else:
                     error_msg = resp.get('errorMsg', '未知错误')
                     logger.warning(f"上传图片失败: {error_msg}")
                     
                     # 如果是特定错误，不重试
                     if any(err in error_msg.lower() for err in ['invalid', 'format', 'size', 'corrupt', 'unsupported']):
-                        return False
+                        return None
                         
             except Exception as e:
                 logger.warning(f"上传图片异常: {str(e)}")
                 if attempt == max_retries - 1:
-                    return False
+                    return None
         
-        return False
+        return None
     
     def _find_leaf_categories(self, parent_cat_id: int, max_depth: int = 3) -> List[Dict[str, Any]]:
-        """递归查找叶子分类"""
+        """查找叶子分类（通过分类索引，只展开尚未索引的节点）"""
         try:
-            result = self.temu_client.product.cats_get(parent_cat_id=parent_cat_id)
-            if not result.get("success"):
-                return []
-            
-            categories = result.get("result", {}).get("goodsCatsList", [])
-            if not categories:
-                # 没有子分类，说明这是叶子分类
-                return [{"catId": parent_cat_id, "catName": "Leaf Category"}]
-            
-            leaf_categories = []
-            for cat in categories:
-                cat_id = cat.get("catId")
-                sub_leafs = self._find_leaf_categories(cat_id, max_depth - 1)
-                if sub_leafs:
-                    leaf_categories.extend(sub_leafs)
-                else:
-                    leaf_categories.append(cat)
-            
-            return leaf_categories
+            return self.category_index.leaf_descendants(parent_cat_id, self._fetch_child_categories, max_depth)
         except Exception as e:
             logger.error(f"查找分类异常: {e}")
             return []
     
+    def _fetch_child_categories(self, parent_cat_id: int) -> Optional[List[Dict[str, Any]]]:
+        """调用cats_get获取子分类，失败时返回None"""
+        result = self._call_temu("cats_get", parent_cat_id=parent_cat_id)
+        if not result.get("success"):
+            logger.warning(f"获取子分类失败: {parent_cat_id}, {result.get('errorMsg')}")
+            return None
+        return (result.get("result") or {}).get("goodsCatsList") or []
+    
     def _build_product_data(self) -> Dict[str, Any]:
         """构建商品数据"""
         # 获取分类模板
-        template = self.templates_cache.get(self.temu_product.category_id, {})
+        template = self._category_template()
         properties = template.get("propertyList", [])
         
         # 构建商品属性
@@ -917,7 +1291,7 @@ class ProductManager:
         # 依据子规格ID查询其父规格，构建 goodsSpecProperties
         goods_spec_properties = []
         try:
-            tmpl = self.templates_cache.get(self.temu_product.category_id) or {}
+            tmpl = self._category_template()
             tinfo = (tmpl or {}).get("templateInfo") or {}
             gsp = (tinfo or {}).get("goodsSpecProperties") or []
             chosen_map = {}
@@ -1086,8 +1460,8 @@ class ProductManager:
         else:
             return prop.get("defaultValue", "Default")
     
-    def _save_scraped_product(self):
-        """保存抓取的商品信息"""
+    def _save_scraped_product(self, url: Optional[str] = None):
+        """保存抓取的商品信息到按URL索引的缓存"""
         if not self.scraped_product:
             return
         
@@ -1096,12 +1470,11 @@ class ProductManager:
             "price": self.scraped_product.price,
             "description": self.scraped_product.description,
             "main_image_url": self.scraped_product.main_image_url,
-            "detail_images": self.scraped_product.detail_images,
+            "detail_images": list(self.scraped_product.detail_images),
             "sizes": [size.to_dict() for size in self.scraped_product.sizes],
             "url": self.scraped_product.url
         }
         
-        with open("scraped_product.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.scrape_cache.set(url or self.scraped_product.url, data)
         
-        logger.info("抓取的商品信息已保存到 scraped_product.json")
+        logger.info(f"抓取的商品信息已缓存: {url or self.scraped_product.url}")
@@ -0,0 +1,149 @@
+"""
+工作流执行器
+
+每个步骤声明自己依赖(requires)和产出(provides)的数据，执行器按依赖关系
+并发运行已就绪的步骤。任一步骤失败后不再调度新的步骤，整个流程返回失败。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils.logger import get_logger
+
+
+@dataclass
+class WorkflowStep:
+    """工作流步骤"""
+    name: str                               # 步骤名称（用于日志）
+    func: Callable[[], bool]                # 步骤函数，返回是否成功
+    requires: Tuple[str, ...] = ()          # 依赖的数据名称
+    provides: Tuple[str, ...] = ()          # 产出的数据名称
+
+
+class WorkflowExecutor:
+    """基于依赖关系的并发工作流执行器"""
+
+    def __init__(self, steps: List[WorkflowStep], max_workers: int = 4, logger=None,
+                 on_step_complete: Optional[Callable[[WorkflowStep], None]] = None,
+                 metrics=None):
+        """
+        初始化执行器
+
+        Args:
+            steps: 工作流步骤列表
+            max_workers: 最大并发步骤数
+            logger: 日志记录器，默认使用workflow日志
+            on_step_complete: 步骤成功后的回调（在调度线程中调用），可用于保存检查点
+            metrics: 耗时记录对象（WorkflowMetrics），记录每个步骤的耗时
+
+        Raises:
+            ValueError: 步骤依赖无法满足或存在循环依赖
+        """
+        self.steps = list(steps)
+        self.max_workers = max(1, max_workers)
+        self.logger = logger or get_logger("workflow")
+        self.on_step_complete = on_step_complete
+        self.metrics = metrics
+        self._validate()
+
+    def _validate(self):
+        """校验依赖关系：产出不重复、依赖均有来源、不存在循环"""
+        providers: Dict[str, str] = {}
+        for step in self.steps:
+            for name in step.provides:
+                if name in providers:
+                    raise ValueError(f"数据 {name} 同时由步骤 {providers[name]} 和 {step.name} 产出")
+                providers[name] = step.name
+
+        for step in self.steps:
+            missing = [name for name in step.requires if name not in providers]
+            if missing:
+                raise ValueError(f"步骤 {step.name} 的依赖没有来源: {', '.join(missing)}")
+
+        # 拓扑排序检测循环依赖
+        available: Set[str] = set()
+        remaining = list(self.steps)
+        while remaining:
+            ready = [s for s in remaining if set(s.requires) <= available]
+            if not ready:
+                names = ", ".join(s.name for s in remaining)
+                raise ValueError(f"工作流存在循环依赖: {names}")
+            for step in ready:
+                available.update(step.provides)
+                remaining.remove(step)
+
+    def _run_step(self, step: WorkflowStep) -> bool:
+        """执行单个步骤，异常视为失败"""
+        self.logger.info(f"执行步骤: {step.name}")
+        start_time = time.perf_counter()
+        try:
+            success = step.func()
+            if not success:
+                self.logger.error(f"步骤失败: {step.name}")
+            return bool(success)
+        except Exception as e:
+            self.logger.error(f"步骤异常: {step.name}, 错误: {e}")
+            return False
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.logger.info(f"步骤耗时: {step.name} {elapsed:.2f} 秒")
+            if self.metrics is not None:
+                self.metrics.record_step(step.name, elapsed)
+
+    def _notify_complete(self, step: WorkflowStep):
+        """调用步骤完成回调，回调异常不影响流程"""
+        if not self.on_step_complete:
+            return
+        try:
+            self.on_step_complete(step)
+        except Exception as e:
+            self.logger.warning(f"步骤完成回调失败: {step.name}, 错误: {e}")
+
+    def run(self, available: Optional[Iterable[str]] = None) -> bool:
+        """
+        执行工作流
+
+        Args:
+            available: 执行前已经就绪的数据名称，产出全部就绪的步骤将被跳过
+
+        Returns:
+            bool: 全部步骤成功返回True，任一步骤失败返回False
+        """
+        done: Set[str] = set(available or ())
+        pending = []
+        for step in self.steps:
+            if step.provides and set(step.provides) <= done:
+                self.logger.info(f"步骤已完成，跳过: {step.name}")
+            else:
+                pending.append(step)
+        running = {}
+        failed = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="autotemu-step") as executor:
+            while pending or running:
+                if not failed:
+                    ready = [s for s in pending if set(s.requires) <= done]
+                    for step in ready:
+                        pending.remove(step)
+                        running[executor.submit(self._run_step, step)] = step
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    if future.result():
+                        done.update(step.provides)
+                        self._notify_complete(step)
+                    else:
+                        failed = True
+
+                if failed and pending:
+                    skipped = ", ".join(s.name for s in pending)
+                    self.logger.warning(f"前置步骤失败，跳过: {skipped}")
+                    pending.clear()
+
+        return not failed
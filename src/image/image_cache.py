@@ -0,0 +1,195 @@
+"""
+图片目录缓存管理模块
+
+按字节配额回收 IMAGE_SAVE_PATH 下的图片文件（下载的原图、_copy_N 补充图、optimized_* 优化图），
+以文件修改时间作为最后访问时间（使用时通过 touch 更新），超出配额时淘汰最久未使用的文件，
+并同步删除指向被淘汰文件的下载记录和OCR记录。写入新文件时累计本进程的使用量，
+超出配额后由 collect_if_over_quota 自动回收。
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .image_records import ImageRecordStore
+from ..utils.logger import get_logger
+
+logger = get_logger("image_cache")
+
+# 不参与回收的文件：记录数据库及其WAL文件、旧版记录
+_PROTECTED_SUFFIXES = (".db", ".db-wal", ".db-shm", ".json", ".migrated")
+
+
+@dataclass
+class GcReport:
+    """一次回收的结果"""
+    files_scanned: int = 0
+    bytes_before: int = 0
+    files_removed: int = 0
+    bytes_reclaimed: int = 0
+    records_removed: int = 0
+
+    @property
+    def bytes_after(self) -> int:
+        """回收后剩余的字节数"""
+        return self.bytes_before - self.bytes_reclaimed
+
+
+class ImageCacheManager:
+    """图片目录的字节配额与LRU回收"""
+
+    def __init__(self, image_save_path: Union[str, Path], records: ImageRecordStore,
+                 quota_bytes: int = 0, min_age: float = 3600):
+        """
+        初始化缓存管理器
+
+        Args:
+            image_save_path: 图片目录
+            records: 图片记录存储，淘汰文件时同步删除相关记录
+            quota_bytes: 字节配额，0表示不限制
+            min_age: 最近这么多秒内使用过的文件不淘汰（避免删除其他进程正在使用的图片）
+        """
+        self.image_save_path = Path(image_save_path)
+        self.records = records
+        self.quota_bytes = quota_bytes
+        self.min_age = min_age
+        # 估算的目录字节数：首次检查时扫描，之后按本进程写入的字节累加，回收后更新
+        self._usage_bytes: Optional[int] = None
+        # 上次回收后仍超出配额（剩余文件都在保护期内）时，在此时间之前不再自动回收
+        self._retry_at = 0.0
+        self._usage_lock = threading.Lock()
+
+    @staticmethod
+    def touch(path: Union[str, Path]):
+        """
+        更新文件的最后访问时间，用于LRU淘汰
+
+        Args:
+            path: 文件路径
+        """
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def add_usage(self, nbytes: int):
+        """
+        记录新写入图片目录的字节数
+
+        Args:
+            nbytes: 字节数
+        """
+        with self._usage_lock:
+            if self._usage_bytes is not None:
+                self._usage_bytes += nbytes
+
+    def collect_if_over_quota(self) -> Optional[GcReport]:
+        """
+        估算的使用量超过配额时回收图片目录
+
+        Returns:
+            回收结果，未超出配额、未设置配额或处于回收退避期内时返回None
+        """
+        if not self.quota_bytes:
+            return None
+        with self._usage_lock:
+            if time.time() < self._retry_at:
+                return None
+            if self._usage_bytes is None:
+                self._usage_bytes = sum(size for _, size, _ in self._scan())
+            if self._usage_bytes <= self.quota_bytes:
+                return None
+        logger.info(f"图片目录超出配额（约 {self._usage_bytes} / {self.quota_bytes} 字节），开始回收")
+        report = self.collect()
+        if report.bytes_after > self.quota_bytes:
+            # 剩余的文件都在保护期内，等它们过了保护期再扫描，避免每个商品都重复扫描目录
+            with self._usage_lock:
+                self._retry_at = time.time() + self.min_age
+            logger.info(f"回收后仍超出配额（{report.bytes_after} 字节），{self.min_age:.0f} 秒内不再自动回收")
+        return report
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        """列出可回收的文件: [(最后访问时间, 字节数, 路径)]"""
+        entries = []
+        for path in self.image_save_path.rglob("*"):
+            if path.name.endswith(_PROTECTED_SUFFIXES):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def collect(self, quota_bytes: Optional[int] = None, dry_run: bool = False) -> GcReport:
+        """
+        回收图片目录：删除过期的下载临时文件，超出配额时按最后访问时间淘汰最旧的文件
+
+        Args:
+            quota_bytes: 字节配额，默认使用初始化时的配额，0表示只清理临时文件
+            dry_run: 只统计不删除
+
+        Returns:
+            回收结果
+        """
+        quota = self.quota_bytes if quota_bytes is None else quota_bytes
+        now = time.time()
+        entries = sorted(self._scan())
+        report = GcReport(files_scanned=len(entries), bytes_before=sum(size for _, size, _ in entries))
+
+        remaining = report.bytes_before
+        victims = []
+        for mtime, size, path in entries:
+            if now - mtime < self.min_age:
+                continue
+            # 中断下载留下的临时文件总是清理
+            if path.suffix == ".part" or (quota and remaining > quota):
+                victims.append(path)
+                remaining -= size
+                report.bytes_reclaimed += size
+        report.files_removed = len(victims)
+
+        if dry_run:
+            return report
+        with self._usage_lock:
+            self._usage_bytes = report.bytes_after
+        if not victims:
+            return report
+
+        # 先删除记录再删除文件：中途失败时只会留下无记录的文件，下次回收时再删除
+        victim_paths = {path.resolve() for path in victims}
+        urls = [
+            url for url, recorded_path, _ in self.records.iter_downloads()
+            if Path(recorded_path).resolve() in victim_paths
+        ]
+        report.records_removed = self.records.forget_urls(urls)
+
+        for path in victims:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除图片失败: {path}, 错误: {e}")
+        self._remove_empty_dirs()
+
+        logger.info(
+            f"图片目录回收完成: 删除 {report.files_removed} 个文件，释放 {report.bytes_reclaimed} 字节，"
+            f"删除 {report.records_removed} 条下载记录"
+        )
+        return report
+
+    def _remove_empty_dirs(self):
+        """删除内容目录下的空分片目录"""
+        content_dir = self.image_save_path / "content"
+        if not content_dir.exists():
+            return
+        for shard in content_dir.iterdir():
+            try:
+                shard.rmdir()
+            except OSError:
+                pass
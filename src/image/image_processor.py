@@ -4,8 +4,12 @@
 负责图片下载、OCR检测、中文过滤和图片分类功能
 """
 
+import hashlib
 import os
 import re
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
@@ -13,14 +17,27 @@ import requests
 from PIL import Image
 import logging
 
+from .image_cache import ImageCacheManager
+from .image_records import ImageRecordStore
 from .ocr_client import OCRClient
 from ..utils.config import get_config
-from ..utils.exceptions import ImageProcessingError
+from ..utils.exceptions import CircuitOpenException, ImageProcessingError
+from ..utils.circuit_breaker import get_circuit_breaker
 from ..utils.retry import retry
 from ..utils.logger import get_logger
+from ..utils.http_client import get_http_client
 
 logger = get_logger(__name__)
 
+# 文件头 -> 扩展名（WEBP需额外检查第8-12字节）
+_IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'BM', '.bmp'),
+)
+
 
 class ImageProcessor:
     """图片处理器"""
@@ -45,93 +62,117 @@ class ImageProcessor:
         self.detail_keywords = ['detail', 'details', 'close', 'closeup', '详细', '詳細', 'close-up']
         self.main_keywords = ['main', 'primary', 'hero', 'featured', '主要', 'メイン']
         
-        # 图片下载记录文件
-        self.download_record_file = self.image_save_path / "download_records.json"
-        self.downloaded_urls = self._load_download_records()
-
-        # OCR结果记录文件与缓存
-        self.ocr_record_file = self.image_save_path / "ocr_records.json"
-        self.ocr_results = self._load_ocr_records()
-
-    def _load_download_records(self) -> Dict[str, str]:
-        """加载图片下载记录"""
-        if not self.download_record_file.exists():
-            return {}
-        
-        try:
-            import json
-            with open(self.download_record_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"加载下载记录失败: {e}")
-            return {}
-
-    def _save_download_records(self):
-        """保存图片下载记录"""
-        try:
-            import json
-            with open(self.download_record_file, 'w', encoding='utf-8') as f:
-                json.dump(self.downloaded_urls, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.warning(f"保存下载记录失败: {e}")
-
-    def _load_ocr_records(self) -> Dict[str, Dict[str, str]]:
-        """加载OCR结果缓存记录: {url: {"has_chinese": bool, "text": str}}"""
-        if not self.ocr_record_file.exists():
-            return {}
-        try:
-            import json
-            with open(self.ocr_record_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"加载OCR记录失败: {e}")
-            return {}
-
-    def _save_ocr_records(self):
-        """保存OCR结果缓存记录"""
-        try:
-            import json
-            with open(self.ocr_record_file, 'w', encoding='utf-8') as f:
-                json.dump(self.ocr_results, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.warning(f"保存OCR记录失败: {e}")
+        # 图片下载记录和OCR结果存储（SQLite），首次打开时导入旧版JSON记录
+        self.records = ImageRecordStore(
+            self.image_save_path / "image_records.db",
+            batch_size=int(self.config.image_records_batch_size)
+        )
+        self.records.migrate_json(
+            self.image_save_path / "download_records.json",
+            self.image_save_path / "ocr_records.json"
+        )
+
+        # 图片目录的字节配额与LRU回收
+        self.cache = ImageCacheManager(
+            self.image_save_path, self.records,
+            quota_bytes=int(self.config.image_cache_quota_bytes),
+            min_age=float(self.config.image_cache_min_age)
+        )
+
+        # 并行处理：下载线程数、OCR线程数
+        self.download_workers = max(1, int(self.config.image_download_workers))
+        self.ocr_workers = max(1, int(self.config.ocr_workers))
+        # 按图片内容加锁，相同内容的并发OCR只执行一次
+        self._ocr_locks: Dict[str, threading.Lock] = {}
+        self._ocr_locks_guard = threading.Lock()
 
     def _get_cached_ocr(self, url: str) -> Optional[Tuple[bool, str]]:
-        """获取已缓存的OCR结果"""
-        record = self.ocr_results.get(url)
-        if not record:
-            return None
-        try:
-            has_chinese = bool(record.get("has_chinese", False))
-            text = record.get("text", "")
-            return has_chinese, text
-        except Exception:
-            return None
+        """获取已缓存的OCR结果（已知图片内容时按内容查询，否则按URL查询旧记录）"""
+        content_hash = self.records.get_content_hash(url)
+        if content_hash:
+            return self.records.get_content_ocr(content_hash)
+        return self.records.get_ocr(url)
 
     def _record_ocr_result(self, url: str, has_chinese: bool, text: str):
-        """记录OCR结果到缓存"""
-        self.ocr_results[url] = {"has_chinese": has_chinese, "text": text}
-        self._save_ocr_records()
+        """记录OCR结果到缓存（已知图片内容时按内容记录，不同URL的相同图片共用）"""
+        content_hash = self.records.get_content_hash(url)
+        if content_hash:
+            self.records.set_content_ocr(content_hash, has_chinese, text)
+        else:
+            self.records.set_ocr(url, has_chinese, text)
 
     def _is_image_downloaded(self, url: str) -> Optional[Path]:
         """检查图片是否已经下载过（仅依据URL，不校验本地文件）"""
-        if url in self.downloaded_urls:
-            return Path(self.downloaded_urls[url])
-        return None
+        recorded = self.records.get_download(url)
+        return Path(recorded) if recorded else None
+
+    def _record_downloaded_image(self, url: str, file_path: Path, content_hash: Optional[str] = None,
+                                 response: Optional[requests.Response] = None):
+        """记录已下载的图片，以及响应中用于条件请求的ETag/Last-Modified"""
+        headers = response.headers if response is not None else {}
+        self.records.set_download(
+            url, file_path, content_hash,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified')
+        )
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """根据上次响应的ETag/Last-Modified生成条件请求头"""
+        etag, last_modified = self.records.get_validators(url)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def get_content_hash(self, url: str) -> Optional[str]:
+        """
+        获取已下载图片内容的SHA-256
 
-    def _record_downloaded_image(self, url: str, file_path: Path):
-        """记录已下载的图片"""
-        self.downloaded_urls[url] = str(file_path)
-        self._save_download_records()
+        Args:
+            url: 图片URL
+
+        Returns:
+            内容哈希，未下载或旧版记录返回None
+        """
+        return self.records.get_content_hash(url)
+
+    def content_path(self, content_hash: str, suffix: str = ".jpg") -> Path:
+        """
+        获取内容哈希对应的存储路径：{IMAGE_SAVE_PATH}/content/<前两位>/<哈希><扩展名>
+
+        Args:
+            content_hash: 图片内容的SHA-256
+            suffix: 文件扩展名
+
+        Returns:
+            图片文件路径
+        """
+        return self.image_save_path / "content" / content_hash[:2] / f"{content_hash}{suffix}"
+
+    def _image_suffix(self, head: bytes, url: str) -> str:
+        """根据文件头判断扩展名，无法识别时使用URL中的扩展名，默认 .jpg"""
+        for magic, suffix in _IMAGE_SIGNATURES:
+            if head.startswith(magic):
+                return suffix
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return '.webp'
+        suffix = os.path.splitext(urlparse(url).path)[1].lower()
+        return suffix if suffix in self.supported_formats else '.jpg'
 
     @retry()
-    def download_image(self, url: str, filename: Optional[str] = None, force_scrape: bool = False) -> Path:
+    def download_image(self, url: str, force_scrape: bool = False, revalidate: bool = False) -> Path:
         """
-        下载图片
+        下载图片，按内容的SHA-256保存，相同内容只保存一份
+
+        revalidate 为True时，已下载的图片用上次响应的ETag/Last-Modified发送条件请求，
+        返回304时复用已记录的文件，否则重新下载；已记录的文件不存在时直接重新下载。优先于 force_scrape。
 
         Args:
             url: 图片URL
-            filename: 保存的文件名，如果为None则自动生成
+            force_scrape: 是否忽略下载记录重新下载
+            revalidate: 是否对已下载的图片发送条件请求重新校验
 
         Returns:
             保存的图片文件路径
@@ -139,48 +180,100 @@ class ImageProcessor:
         Raises:
             ImageProcessingError: 下载失败时抛出
         """
+        tmp_path = None
         try:
             # 首先检查是否已经下载过（除非强制抓取）
-            if not force_scrape:
+            headers = {}
+            if revalidate or not force_scrape:
                 existing_path = self._is_image_downloaded(url)
                 if existing_path:
-                    logger.info(f"图片已下载过，跳过下载: {url} -> {existing_path}")
-                    return existing_path
-
-            # 解析URL获取原始文件名
-            if not filename:
-                parsed_url = urlparse(url)
-                filename = os.path.basename(parsed_url.path)
-                if not filename or '.' not in filename:
-                    filename = f"image_{hash(url) % 100000}.jpg"
-
-            # 确保文件名有扩展名
-            if not any(filename.lower().endswith(ext) for ext in self.supported_formats):
-                filename += '.jpg'
-
-            # 构建保存路径（不重命名，保持原始文件名）
-            save_path = self.image_save_path / filename
+                    if not revalidate:
+                        logger.info(f"图片已下载过，跳过下载: {url} -> {existing_path}")
+                        self.cache.touch(existing_path)
+                        return existing_path
+                    # 已记录的文件被删除（如被回收）时不能复用，发送普通请求重新下载
+                    if existing_path.exists():
+                        headers = self._conditional_headers(url)
 
             # 下载图片
-            logger.info(f"开始下载图片: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-
-            # 保存图片
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            logger.info(f"开始{'校验' if headers else '下载'}图片: {url}")
+            response = get_circuit_breaker(f"image_download:{urlparse(url).hostname}").call(
+                self._fetch_image, url, headers
+            )
+            # 流式响应在任何情况下都要关闭，释放连接（304、4xx、读取中途出错）
+            try:
+                if headers and response.status_code == 304:
+                    logger.info(f"图片未变化，复用已下载文件: {url} -> {existing_path}")
+                    self.cache.touch(existing_path)
+                    return existing_path
+                response.raise_for_status()
+
+                # 边下载边计算哈希，先写入临时文件
+                tmp_dir = self.image_save_path / "tmp"
+                tmp_dir.mkdir(parents=True, exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+                tmp_path = Path(tmp_name)
+                digest = hashlib.sha256()
+                head = b''
+                size = 0
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if len(head) < 16:
+                            head += chunk[:16 - len(head)]
+                        digest.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+            finally:
+                response.close()
+
+            # 相同内容已存在时直接复用，否则原子移动到内容地址
+            content_hash = digest.hexdigest()
+            save_path = self.content_path(content_hash, self._image_suffix(head, url))
+            if save_path.exists():
+                tmp_path.unlink()
+                self.cache.touch(save_path)
+                logger.info(f"图片内容已存在，复用: {url} -> {save_path}")
+            else:
+                save_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, save_path)
+                self.cache.add_usage(size)
+                logger.info(f"图片下载成功: {save_path}")
+            tmp_path = None
 
             # 记录已下载的图片
-            self._record_downloaded_image(url, save_path)
-            
-            logger.info(f"图片下载成功: {save_path}")
+            self._record_downloaded_image(url, save_path, content_hash, response)
             return save_path
 
+        except CircuitOpenException:
+            raise
         except requests.RequestException as e:
             raise ImageProcessingError(f"下载图片失败: {url}, 错误: {str(e)}")
         except Exception as e:
             raise ImageProcessingError(f"保存图片失败: {url}, 错误: {str(e)}")
+        finally:
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+
+    def _fetch_image(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        发起图片下载请求，超时、连接错误和5xx计为图片主机的失败（4xx只是单张图片的问题）
+
+        Args:
+            url: 图片URL
+            headers: 额外的请求头（条件请求）
+
+        Returns:
+            响应对象
+        """
+        kwargs = {'headers': headers} if headers else {}
+        response = get_http_client().get(url, timeout=30, stream=True, **kwargs)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code >= 500:
+                response.close()
+                raise
+        return response
 
     def is_chinese_text(self, text: str) -> bool:
         """
@@ -217,6 +310,8 @@ class ImageProcessor:
             
             return has_chinese, ocr_text
 
+        except CircuitOpenException:
+            raise
         except Exception as e:
             logger.warning(f"OCR识别失败: {image_path}, 错误: {str(e)}")
             # OCR失败时，假设不包含中文，避免误删图片
@@ -255,12 +350,20 @@ class ImageProcessor:
         # 默认分类为其他
         return 'other'
 
-    def process_images(self, image_urls: List[str], force_scrape: bool = False) -> Dict[str, List[Path]]:
+    def process_images(self, image_urls: List[str], force_scrape: bool = False,
+                       force_ocr: Optional[bool] = None, revalidate: bool = False) -> Dict[str, List[Path]]:
         """
         批量处理图片：下载、OCR检测、中文过滤、分类
 
+        下载在有限并发的线程池中进行，每张图片下载完成后立即交给单独限流的OCR线程池，
+        OCR结果到达时即完成过滤和分类；各分类中的图片保持 image_urls 的顺序。
+
         Args:
             image_urls: 图片URL列表
+            force_scrape: 是否忽略下载记录重新下载图片
+            force_ocr: 是否忽略OCR缓存重新识别，为None时与force_scrape一致
+            revalidate: 是否对已下载的图片发送条件请求（ETag/Last-Modified），
+                未变化的图片复用本地文件和按内容缓存的OCR结果，优先于force_scrape
 
         Returns:
             分类后的图片路径字典: {
@@ -279,74 +382,60 @@ class ImageProcessor:
             'filtered': []
         }
 
+        if force_ocr is None:
+            force_ocr = force_scrape
+
         logger.info(f"开始处理 {len(image_urls)} 张图片")
 
-        for i, url in enumerate(image_urls):
-            try:
-                # 生成文件名（仅用于首次下载时保存）
-                filename = f"image_{i+1:03d}_{hash(url) % 10000}"
-
-                # 基于URL的去重逻辑：
-                # 1) 如果URL已存在记录且本地文件存在，则直接使用该文件，避免重复下载（除非强制抓取）
-                # 2) 如果URL已存在记录但本地文件不存在，则按需跳过（不重新下载）
-                # 3) 如果URL未记录，则执行下载
-                if not force_scrape:
-                    recorded_path_str = self.downloaded_urls.get(url)
-                    if recorded_path_str:
-                        recorded_path = Path(recorded_path_str)
-                        if recorded_path.exists():
-                            logger.info(f"URL已记录，使用已存在文件，跳过下载: {url} -> {recorded_path}")
-                            image_path = recorded_path
+        # 序号 -> (分类, 图片路径)，最后按序号汇总，保证输出顺序与输入一致
+        outcomes: Dict[int, Tuple[str, Path]] = {}
+        # 本批图片的下载记录和OCR结果合并提交
+        with self.records.batch(), \
+                ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="image-download") as download_pool, \
+                ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix="image-ocr") as ocr_pool:
+            tasks = {}
+            for i, url in enumerate(image_urls):
+                future = download_pool.submit(self._fetch_for_processing, url, force_scrape, revalidate)
+                tasks[future] = ("download", i, url, None)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, i, url, image_path = tasks.pop(future)
+                    try:
+                        if stage == "download":
+                            image_path = future.result()
+                            if image_path is None:
+                                continue
+                            cached = None if force_ocr else self._get_cached_ocr(url)
+                            if cached is None:
+                                ocr_future = ocr_pool.submit(self._detect_chinese, url, image_path, force_ocr)
+                                tasks[ocr_future] = ("ocr", i, url, image_path)
+                                pending.add(ocr_future)
+                                continue
+                            has_chinese = cached[0]
+                            logger.info(f"使用缓存OCR结果: {image_path.name}, 包含中文: {has_chinese}")
                         else:
-                            logger.info(f"URL已记录但本地文件缺失，按要求跳过下载与处理: {url}")
-                            continue
-                    else:
-                        # 首次下载
-                        image_path = self.download_image(url, filename, force_scrape=force_scrape)
-                else:
-                    # 强制抓取，重新下载
-                    image_path = self.download_image(url, filename, force_scrape=force_scrape)
-                
-                # 检查图片是否包含中文（优先使用缓存，除非强制抓取）
-                if not force_scrape:
-                    cached = self._get_cached_ocr(url)
-                    if cached is not None:
-                        has_chinese, ocr_text = cached
-                        logger.info(f"使用缓存OCR结果: {image_path.name}, 包含中文: {has_chinese}")
-                    else:
-                        has_chinese, ocr_text = self.check_image_for_chinese(image_path)
-                        # 记录OCR结果
-                        self._record_ocr_result(url, has_chinese, ocr_text)
-                else:
-                    # 强制抓取，跳过缓存
-                    has_chinese, ocr_text = self.check_image_for_chinese(image_path)
-                    # 记录OCR结果
-                    self._record_ocr_result(url, has_chinese, ocr_text)
-                
-                if has_chinese:
-                    # 包含中文，直接删除图片
-                    image_path.unlink()  # 删除文件
-                    # 不移除URL记录，确保后续运行依旧不会重复下载该URL
-                    result['filtered'].append(image_path)  # 记录已删除的图片
-                    logger.info(f"图片包含中文，已删除: {image_path.name}")
-                    continue
-
-                # 分类图片
-                image_type = self.classify_image_type(image_path.name, url)
-                result[image_type].append(image_path)
-                
-                logger.info(f"图片分类完成: {image_path.name} -> {image_type}")
+                            has_chinese = future.result()
 
-            except ImageProcessingError as e:
-                logger.error(f"处理图片失败: {url}, 错误: {str(e)}")
-                continue
-            except Exception as e:
-                logger.error(f"处理图片时发生未知错误: {url}, 错误: {str(e)}")
-                continue
+                        outcomes[i] = self._classify_processed_image(url, image_path, has_chinese)
+
+                    except ImageProcessingError as e:
+                        logger.error(f"处理图片失败: {url}, 错误: {str(e)}")
+                    except Exception as e:
+                        logger.error(f"处理图片时发生未知错误: {url}, 错误: {str(e)}")
+
+        for i in sorted(outcomes):
+            image_type, image_path = outcomes[i]
+            result[image_type].append(image_path)
 
         # 检查图片数量是否足够，如果不足则补充合规图片
         self._supplement_images_if_needed(result)
 
+        # 图片目录超出配额时回收最久未使用的图片（本批图片刚使用过，不会被淘汰）
+        self.cache.collect_if_over_quota()
+
         # 记录处理结果
         total_processed = sum(len(images) for images in result.values())
         logger.info(f"图片处理完成: 总计 {total_processed} 张, 主图 {len(result['main'])} 张, "
@@ -355,6 +444,99 @@ class ImageProcessor:
 
         return result
 
+    def _fetch_for_processing(self, url: str, force_scrape: bool, revalidate: bool = False) -> Optional[Path]:
+        """
+        获取待处理图片的本地文件
+
+        基于URL的去重逻辑：
+        1) 如果URL已存在记录且本地文件存在，则直接使用该文件，避免重复下载（除非强制抓取）
+        2) 如果URL已存在记录但本地文件不存在，则按需跳过（不重新下载）
+        3) 如果URL未记录，则执行下载
+        重新校验时，已记录的URL先发送条件请求，未变化时按1)、2)处理，变化时重新下载
+
+        Args:
+            url: 图片URL
+            force_scrape: 是否强制重新下载
+            revalidate: 是否对已下载的图片发送条件请求
+
+        Returns:
+            本地图片路径，按要求跳过时返回None
+        """
+        if revalidate:
+            image_path = self.download_image(url, revalidate=True)
+            if not image_path.exists():
+                logger.info(f"URL已记录但本地文件缺失，按要求跳过下载与处理: {url}")
+                return None
+            return image_path
+
+        if not force_scrape:
+            recorded_path = self._is_image_downloaded(url)
+            if recorded_path:
+                if recorded_path.exists():
+                    logger.info(f"URL已记录，使用已存在文件，跳过下载: {url} -> {recorded_path}")
+                    self.cache.touch(recorded_path)
+                    return recorded_path
+                logger.info(f"URL已记录但本地文件缺失，按要求跳过下载与处理: {url}")
+                return None
+
+        return self.download_image(url, force_scrape=force_scrape)
+
+    def _detect_chinese(self, url: str, image_path: Path, force_ocr: bool) -> bool:
+        """
+        OCR检测图片是否包含中文并记录结果（相同内容只检测一次）；OCR熔断期间降级为不过滤
+
+        Args:
+            url: 图片URL
+            image_path: 本地图片路径
+            force_ocr: 是否忽略OCR缓存
+
+        Returns:
+            是否包含中文
+        """
+        key = self.get_content_hash(url) or url
+        with self._ocr_locks_guard:
+            lock = self._ocr_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            # 等待期间相同内容的图片可能已完成OCR
+            if not force_ocr:
+                cached = self._get_cached_ocr(url)
+                if cached is not None:
+                    return cached[0]
+            try:
+                has_chinese, ocr_text = self.check_image_for_chinese(image_path)
+            except CircuitOpenException:
+                # OCR熔断期间降级：跳过中文过滤，结果不写入缓存
+                logger.warning(f"OCR服务已熔断，跳过中文过滤: {image_path.name}")
+                return False
+            # 记录OCR结果
+            self._record_ocr_result(url, has_chinese, ocr_text)
+            return has_chinese
+
+    def _classify_processed_image(self, url: str, image_path: Path, has_chinese: bool) -> Tuple[str, Path]:
+        """
+        过滤含中文的图片并分类
+
+        Args:
+            url: 图片URL
+            image_path: 本地图片路径
+            has_chinese: 是否包含中文
+
+        Returns:
+            (分类, 图片路径)，包含中文时分类为 'filtered'
+        """
+        if has_chinese:
+            # 包含中文，直接删除图片
+            image_path.unlink(missing_ok=True)  # 删除文件（相同内容的其他URL可能已删除）
+            # 不移除URL记录，确保后续运行依旧不会重复下载该URL
+            logger.info(f"图片包含中文，已删除: {image_path.name}")
+            return 'filtered', image_path
+
+        # 分类图片
+        image_type = self.classify_image_type(image_path.name, url)
+        logger.info(f"图片分类完成: {image_path.name} -> {image_type}")
+        return image_type, image_path
+
     def _supplement_images_if_needed(self, result: Dict[str, List[Path]], min_images: int = 3):
         """
         如果合规图片数量不足，通过复制其他合规图片来补充数量
@@ -390,6 +572,7 @@ class ImageProcessor:
                     # 复制图片文件
                     import shutil
                     shutil.copy2(source_path, new_path)
+                    self.cache.add_usage(new_path.stat().st_size)
                     
                     # 添加到结果中
                     result['other'].append(new_path)
@@ -571,6 +754,7 @@ class ImageProcessor:
                 # 保存优化后的图片
                 optimized_path = image_path.parent / f"optimized_{image_path.name}"
                 final_img.save(optimized_path, 'JPEG', quality=90, optimize=True)
+                self.cache.add_usage(optimized_path.stat().st_size)
                 
                 logger.info(f"图片优化完成: {image_path.name} -> {optimized_path.name}")
                 return optimized_path
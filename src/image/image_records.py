@@ -0,0 +1,386 @@
+"""
+图片记录存储模块
+
+用SQLite（WAL模式）保存图片下载记录（URL -> 本地文件、内容哈希、ETag/Last-Modified）和OCR结果
+（按内容哈希保存，旧记录按URL保存：是否含中文、文本），按主键查询，写入可在批处理中缓冲后一次提交，多个进程可以同时读写同一个数据库。
+首次打开时导入旧版的 download_records.json / ocr_records.json。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..utils.logger import get_logger
+
+logger = get_logger("image_records")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    url TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    content_hash TEXT,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS ocr_results (
+    url TEXT PRIMARY KEY,
+    has_chinese INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS content_ocr (
+    content_hash TEXT PRIMARY KEY,
+    has_chinese INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+# 旧版数据库的downloads表中可能缺少的列
+_ADDED_DOWNLOAD_COLUMNS = (("content_hash", "TEXT"), ("etag", "TEXT"), ("last_modified", "TEXT"))
+
+# 各表的写入语句，缓冲的行按表名分组，行的第一个字段为主键
+_UPSERTS = {
+    "downloads": (
+        "INSERT OR REPLACE INTO downloads (url, path, recorded_at, content_hash, etag, last_modified) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    ),
+    "ocr_results": "INSERT OR REPLACE INTO ocr_results (url, has_chinese, text, recorded_at) VALUES (?, ?, ?, ?)",
+    "content_ocr": "INSERT OR REPLACE INTO content_ocr (content_hash, has_chinese, text, recorded_at) VALUES (?, ?, ?, ?)",
+}
+
+
+class ImageRecordStore:
+    """
+    图片下载记录和OCR结果的事务存储（线程安全、多进程安全）
+
+    batch() 内的写入先缓冲在内存中，达到 batch_size 条或退出批处理时在一个事务中提交；
+    缓冲中的记录对本实例的查询立即可见。
+    """
+
+    def __init__(self, db_path: Union[str, Path], batch_size: int = 50, busy_timeout: float = 30.0):
+        """
+        初始化存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+            batch_size: 批处理中累积多少条写入后提交一次
+            busy_timeout: 等待其他进程释放写锁的最长时间（秒）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending: Dict[str, Dict[str, Tuple[Any, ...]]] = {table: {} for table in _UPSERTS}
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._upgrade_schema()
+
+    def _upgrade_schema(self):
+        """为旧版数据库补充新增的列和索引"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(downloads)")}
+        for name, column_type in _ADDED_DOWNLOAD_COLUMNS:
+            if name in columns:
+                continue
+            try:
+                self._conn.execute(f"ALTER TABLE downloads ADD COLUMN {name} {column_type}")
+            except sqlite3.OperationalError:
+                # 其他进程已同时完成升级
+                pass
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_downloads_content_hash ON downloads (content_hash)")
+
+    def close(self):
+        """提交缓冲的写入并关闭连接"""
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+    # ---- 下载记录 ----
+
+    def get_download(self, url: str) -> Optional[str]:
+        """
+        查询URL对应的本地文件路径
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            本地文件路径，未记录返回None
+        """
+        row = self._get_row("downloads", "SELECT url, path FROM downloads WHERE url = ?", url)
+        return row[1] if row else None
+
+    def get_content_hash(self, url: str) -> Optional[str]:
+        """
+        查询URL对应图片内容的SHA-256
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            内容哈希，未记录或旧版记录（无哈希）返回None
+        """
+        row = self._get_download_row(url)
+        return row[3] if row else None
+
+    def get_validators(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查询URL上次响应的缓存校验字段，用于条件请求
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            (ETag, Last-Modified)，未记录的字段为None
+        """
+        row = self._get_download_row(url)
+        return (row[4], row[5]) if row else (None, None)
+
+    def set_download(self, url: str, path: Union[str, Path], content_hash: Optional[str] = None,
+                     etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        记录URL对应的本地文件路径
+
+        Args:
+            url: 图片URL
+            path: 本地文件路径
+            content_hash: 图片内容的SHA-256
+            etag: 响应的ETag
+            last_modified: 响应的Last-Modified
+        """
+        self._put("downloads", (url, str(path), time.time(), content_hash, etag, last_modified))
+
+    def _get_download_row(self, url: str) -> Optional[Tuple[Any, ...]]:
+        """读取URL的完整下载记录"""
+        return self._get_row(
+            "downloads",
+            "SELECT url, path, recorded_at, content_hash, etag, last_modified FROM downloads WHERE url = ?",
+            url
+        )
+
+    def iter_downloads(self) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        列出全部下载记录
+
+        Returns:
+            [(URL, 本地文件路径, 内容哈希)]
+        """
+        with self._lock:
+            self._flush()
+            return self._conn.execute("SELECT url, path, content_hash FROM downloads").fetchall()
+
+    def forget_urls(self, urls: List[str]) -> int:
+        """
+        删除URL的下载记录和按URL保存的OCR结果，以及不再被任何URL引用的内容OCR结果
+
+        Args:
+            urls: 图片URL列表
+
+        Returns:
+            删除的下载记录数
+        """
+        if not urls:
+            return 0
+        with self._lock:
+            self._flush()
+            with self._transaction():
+                rows = [(url,) for url in urls]
+                hashes = [
+                    row[0] for url in urls
+                    for row in self._conn.execute(
+                        "SELECT content_hash FROM downloads WHERE url = ? AND content_hash IS NOT NULL", (url,)
+                    )
+                ]
+                removed = self._conn.executemany("DELETE FROM downloads WHERE url = ?", rows).rowcount
+                self._conn.executemany("DELETE FROM ocr_results WHERE url = ?", rows)
+                self._conn.executemany(
+                    "DELETE FROM content_ocr WHERE content_hash = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM downloads WHERE downloads.content_hash = content_ocr.content_hash)",
+                    [(content_hash,) for content_hash in set(hashes)]
+                )
+        return removed
+
+    # ---- OCR结果 ----
+
+    def get_ocr(self, url: str) -> Optional[Tuple[bool, str]]:
+        """
+        查询URL对应的OCR结果
+
+        Args:
+            url: 图片URL
+
+        Returns:
+            (是否包含中文, OCR文本)，未记录返回None
+        """
+        row = self._get_row("ocr_results", "SELECT url, has_chinese, text FROM ocr_results WHERE url = ?", url)
+        return (bool(row[1]), row[2]) if row else None
+
+    def set_ocr(self, url: str, has_chinese: bool, text: str):
+        """
+        记录URL对应的OCR结果（内容哈希未知时使用）
+
+        Args:
+            url: 图片URL
+            has_chinese: 是否包含中文
+            text: OCR文本
+        """
+        self._put("ocr_results", (url, int(bool(has_chinese)), text or "", time.time()))
+
+    def get_content_ocr(self, content_hash: str) -> Optional[Tuple[bool, str]]:
+        """
+        查询图片内容对应的OCR结果
+
+        Args:
+            content_hash: 图片内容的SHA-256
+
+        Returns:
+            (是否包含中文, OCR文本)，未记录返回None
+        """
+        row = self._get_row(
+            "content_ocr", "SELECT content_hash, has_chinese, text FROM content_ocr WHERE content_hash = ?",
+            content_hash
+        )
+        return (bool(row[1]), row[2]) if row else None
+
+    def set_content_ocr(self, content_hash: str, has_chinese: bool, text: str):
+        """
+        记录图片内容对应的OCR结果
+
+        Args:
+            content_hash: 图片内容的SHA-256
+            has_chinese: 是否包含中文
+            text: OCR文本
+        """
+        self._put("content_ocr", (content_hash, int(bool(has_chinese)), text or "", time.time()))
+
+    def _get_row(self, table: str, sql: str, key: str) -> Optional[Tuple[Any, ...]]:
+        """按主键读取一行，优先返回缓冲中尚未提交的行"""
+        with self._lock:
+            pending = self._pending[table].get(key)
+            if pending is not None:
+                return pending
+            return self._conn.execute(sql, (key,)).fetchone()
+
+    def _put(self, table: str, row: Tuple[Any, ...]):
+        """缓冲一行写入"""
+        with self._lock:
+            self._pending[table][row[0]] = row
+            self._maybe_flush()
+
+    # ---- 批处理与提交 ----
+
+    @contextmanager
+    def batch(self) -> Iterator["ImageRecordStore"]:
+        """
+        批处理上下文：期间的写入合并提交，退出时提交剩余部分（可嵌套）
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._flush()
+
+    def _maybe_flush(self):
+        """非批处理时立即提交，批处理中累积到 batch_size 条再提交（调用方需持有锁）"""
+        if self._batch_depth == 0 or sum(len(rows) for rows in self._pending.values()) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """在一个事务中写入所有缓冲的记录（调用方需持有锁）"""
+        if not any(self._pending.values()):
+            return
+        try:
+            with self._transaction():
+                for table, rows in self._pending.items():
+                    if rows:
+                        self._conn.executemany(_UPSERTS[table], list(rows.values()))
+        except sqlite3.Error as e:
+            # 保留缓冲，下次提交时重试
+            logger.warning(f"写入图片记录失败，稍后重试: {e}")
+            return
+        for rows in self._pending.values():
+            rows.clear()
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：BEGIN IMMEDIATE 先拿到写锁，避免多进程下的升级死锁"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    # ---- 旧版JSON迁移 ----
+
+    def migrate_json(self, download_records: Path, ocr_records: Path):
+        """
+        一次性导入旧版JSON记录，导入后将文件重命名为 *.migrated
+
+        Args:
+            download_records: download_records.json 路径
+            ocr_records: ocr_records.json 路径
+        """
+        downloads = self._read_json(download_records)
+        ocr = self._read_json(ocr_records)
+        if downloads is None and ocr is None:
+            return
+
+        now = time.time()
+        download_rows = [(url, str(path), now) for url, path in (downloads or {}).items() if path]
+        ocr_rows = [
+            (url, int(bool(record.get("has_chinese", False))), record.get("text") or "", now)
+            for url, record in (ocr or {}).items() if isinstance(record, dict)
+        ]
+        with self._lock:
+            with self._transaction():
+                # 数据库中已有的记录优先，迁移不覆盖
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO downloads (url, path, recorded_at) VALUES (?, ?, ?)", download_rows
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO ocr_results (url, has_chinese, text, recorded_at) VALUES (?, ?, ?, ?)",
+                    ocr_rows
+                )
+
+        for path in (download_records, ocr_records):
+            if path.exists():
+                try:
+                    path.replace(path.with_name(path.name + ".migrated"))
+                except OSError as e:
+                    logger.warning(f"重命名已迁移的记录文件失败: {path}, 错误: {e}")
+        logger.info(f"已导入旧版图片记录: 下载 {len(download_rows)} 条, OCR {len(ocr_rows)} 条")
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+        """读取旧版JSON记录文件，文件不存在返回None，损坏时返回空字典"""
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning(f"读取旧版记录文件失败，跳过: {path}, 错误: {e}")
+            return {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush()
+            return self._conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
@@ -14,10 +14,14 @@ from datetime import datetime, timedelta
 
 import requests
 
+from ..utils.cache import hash_key
+from ..utils.cassette import get_cassette
+from ..utils.circuit_breaker import get_circuit_breaker
 from ..utils.config import get_config
 from ..utils.logger import get_logger
+from ..utils.http_client import get_http_client
 from ..utils.retry import network_retry
-from ..utils.exceptions import OCRException, NetworkException
+from ..utils.exceptions import CircuitOpenException, OCRException, NetworkException
 
 
 class OCRClient:
@@ -65,10 +69,10 @@ class OCRClient:
         }
         
         try:
-            response = requests.post(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = get_cassette().call(
+                "baidu_ocr", "token", {"client_id": self.api_key},
+                lambda: self._post_json(url, params=params, timeout=30)
+            )
             access_token = result.get("access_token")
             
             if not access_token:
@@ -83,6 +87,8 @@ class OCRClient:
             self.logger.info("access_token获取成功")
             return access_token
             
+        except CircuitOpenException:
+            raise
         except requests.exceptions.RequestException as e:
             self.logger.error(f"获取access_token网络错误: {e}")
             raise OCRException(f"网络请求失败: {e}")
@@ -90,6 +96,24 @@ class OCRClient:
             self.logger.error(f"获取access_token失败: {e}")
             raise OCRException(f"获取access_token失败: {e}")
     
+    def _post_json(self, url: str, **kwargs) -> Dict[str, Any]:
+        """
+        发送POST请求并解析JSON响应，经过百度OCR熔断器
+        
+        Args:
+            url: 请求地址
+            **kwargs: 请求参数
+            
+        Returns:
+            Dict: 响应JSON
+        """
+        def post():
+            response = get_http_client().post(url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        
+        return get_circuit_breaker("baidu_ocr").call(post)
+    
     def _get_file_content_as_base64(self, file_path: str, urlencoded: bool = False) -> str:
         """
         获取文件base64编码
@@ -157,10 +181,10 @@ class OCRClient:
             
             # 发送OCR请求
             url = f"{self.base_url}?access_token={access_token}"
-            response = requests.post(url, headers=headers, data=payload, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = get_cassette().call(
+                "baidu_ocr", "webimage", {"image": hash_key(payload)},
+                lambda: self._post_json(url, headers=headers, data=payload, timeout=60)
+            )
             
             # 检查API错误
             if "error_code" in result:
@@ -187,7 +211,7 @@ class OCRClient:
         except requests.exceptions.RequestException as e:
             self.logger.error(f"OCR API网络错误 {image_path}: {e}")
             raise OCRException(f"网络请求失败: {e}")
-        except OCRException:
+        except (OCRException, CircuitOpenException):
             raise
         except Exception as e:
             self.logger.error(f"OCR识别失败 {image_path}: {e}")
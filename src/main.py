@@ -6,6 +6,9 @@ AutoTemu主程序
 
 import argparse
 import sys
+import time
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, List
 import json
@@ -13,7 +16,13 @@ import json
 from .utils.logger import get_logger
 from .utils.config import get_config, ConfigError
 from .utils.exceptions import AutoTemuException
+from .utils.metrics import aggregate_timings, format_timing_report
+from .utils.http_client import get_http_client
+from .utils.rate_limiter import get_rate_limiter
+from .utils.cassette import get_cassette
+from .utils.circuit_breaker import circuit_breaker_stats
 from .scraper.product_scraper import ProductScraper
+from .image.image_cache import GcReport
 from .image.image_processor import ImageProcessor
 from .image.ocr_client import OCRClient
 from .transform.size_mapper import SizeMapper
@@ -21,6 +30,8 @@ from .transform.data_transformer import DataTransformer
 from temu_api import TemuClient
 from .models.product import ScrapedProduct, TemuProduct, TemuSKU, TemuListingResult
 from .models.data_models import ProductData
+from .core.pipeline_options import PipelineOptions
+from .temu.category_index import get_category_index
 
 logger = get_logger(__name__)
 
@@ -55,6 +66,20 @@ def convert_product_data_to_scraped_product(product_data: ProductData) -> Scrape
     )
 
 
+def effective_workers(workers: Optional[int], total: int) -> int:
+    """
+    批量处理实际使用的并发数：至少为1，且不超过URL数量
+
+    Args:
+        workers: 请求的并发数
+        total: URL数量
+
+    Returns:
+        实际并发数
+    """
+    return max(1, min(workers or 1, total or 1))
+
+
 class AutoTemuApp:
     """AutoTemu主应用程序"""
 
@@ -86,6 +111,7 @@ class AutoTemuApp:
             debug=False
         )
             self.scraper = ProductScraper()
+            self.category_index = get_category_index()
             
             logger.info("AutoTemu应用程序初始化成功")
             
@@ -107,19 +133,29 @@ class AutoTemuApp:
             bool: 是否为叶子分类
         """
         try:
-            result = self.temu_client.product.cats_get(parent_cat_id=int(category_id))
-            if result.get("success"):
-                sub_categories = result.get("result", {}).get("goodsCatsList", [])
-                if sub_categories is None:
-                    return True  # 如果没有子分类列表，认为是叶子分类
-                return len(sub_categories) == 0
-            return False
+            is_leaf = self.category_index.is_leaf(int(category_id), self._fetch_child_categories)
+            return bool(is_leaf)
         except Exception as e:
             logger.error(f"检查叶子分类失败: {e}")
             return False
 
-    def process_single_url(self, url: str, output_dir: Optional[str] = None) -> TemuListingResult:
-        """处理单个商品URL（真实运行）：使用生产环境的商品管理器。"""
+    def _fetch_child_categories(self, parent_cat_id: int) -> Optional[List[dict]]:
+        """调用cats_get获取子分类，失败时返回None"""
+        result = self.temu_client.product.cats_get(parent_cat_id=parent_cat_id)
+        if not result.get("success"):
+            return None
+        return (result.get("result") or {}).get("goodsCatsList") or []
+
+    def process_single_url(self, url: str, output_dir: Optional[str] = None,
+                           options: Optional[PipelineOptions] = None) -> TemuListingResult:
+        """
+        处理单个商品URL（真实运行）：使用生产环境的商品管理器。
+        
+        Args:
+            url: 商品URL
+            output_dir: 输出目录
+            options: 缓存策略，默认复用按URL缓存的抓取结果和图片缓存
+        """
         logger.info(f"开始处理商品URL(真实运行): {url}")
         try:
             from src.core.product_manager import ProductManager
@@ -128,63 +164,112 @@ class AutoTemuApp:
             product_manager = ProductManager()
             
             # 添加商品
-            result = product_manager.add_product(url, force_scrape=True)
+            result = product_manager.add_product(url, options=options or PipelineOptions())
             
             if result["success"]:
                 return TemuListingResult(
                     success=True,
                     product_id=result["product_id"],
                     sku_ids=result["sku_ids"],
-                    image_ids=[]
+                    image_ids=[],
+                    timings=result.get("timings") or {}
                 )
             else:
                 return TemuListingResult(
                     success=False, 
-                    errors=[result.get("error", "商品添加失败")]
+                    errors=[result.get("error", "商品添加失败")],
+                    timings=result.get("timings") or {}
                 )
         except Exception as e:
             logger.error(f"真实运行异常: {e}")
             return TemuListingResult(success=False, errors=[f"异常: {e}"])
 
-    def process_batch_urls(self, urls: List[str], output_dir: Optional[str] = None) -> List[TemuListingResult]:
+    def process_batch_urls(self, urls: List[str], output_dir: Optional[str] = None,
+                           workers: int = 1,
+                           options: Optional[PipelineOptions] = None) -> List[TemuListingResult]:
         """
         批量处理商品URL
         
         Args:
             urls: 商品URL列表
             output_dir: 输出目录，如果为None则使用默认目录
+            workers: 并发处理的商品数量，每个商品使用独立的商品管理器
+            options: 缓存策略，所有商品共用
             
         Returns:
-            添加结果列表
+            添加结果列表（与输入URL顺序一致）
         """
-        logger.info(f"开始批量处理 {len(urls)} 个商品URL")
+        total = len(urls)
+        workers = effective_workers(workers, total)
+        logger.info(f"开始批量处理 {total} 个商品URL, 并发数: {workers}")
         
-        results = []
-        for i, url in enumerate(urls, 1):
-            logger.info(f"处理第 {i}/{len(urls)} 个商品: {url}")
-            try:
-                result = self.process_single_url(url, output_dir)
-                results.append(result)
-                
-                if result.success:
-                    logger.info(f"第 {i} 个商品处理成功")
-                else:
-                    logger.warning(f"第 {i} 个商品处理失败: {', '.join(result.errors)}")
-                    
-            except Exception as e:
-                logger.error(f"第 {i} 个商品处理异常: {str(e)}")
-                results.append(TemuListingResult(
-                    success=False,
-                    errors=[f"处理异常: {str(e)}"]
-                ))
+        start_time = time.perf_counter()
+        if workers == 1:
+            results = [self._process_batch_item(i, total, url, output_dir, options) for i, url in enumerate(urls, 1)]
+        else:
+            results = [None] * total
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="autotemu-batch") as executor:
+                futures = {
+                    executor.submit(self._process_batch_item, i, total, url, output_dir, options): i - 1
+                    for i, url in enumerate(urls, 1)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        elapsed = time.perf_counter() - start_time
         
         # 统计结果
         successful = sum(1 for r in results if r.success)
         failed = len(results) - successful
-        logger.info(f"批量处理完成: 总计 {len(results)} 个, 成功 {successful} 个, 失败 {failed} 个")
+        throughput = len(results) / elapsed * 60 if elapsed > 0 else 0.0
+        logger.info(f"批量处理完成: 总计 {len(results)} 个, 成功 {successful} 个, 失败 {failed} 个, "
+                    f"耗时 {elapsed:.1f} 秒, 吞吐量 {throughput:.2f} 个/分钟")
+        
+        timing_records = [r.timings for r in results if r.timings]
+        if timing_records:
+            logger.info("\n" + format_timing_report(aggregate_timings(timing_records)))
+        
+        http_stats = get_http_client().stats()
+        logger.info(f"HTTP连接复用: 请求 {http_stats['requests']} 次, "
+                    f"新建连接 {http_stats['connections']} 个, 复用 {http_stats['reused']} 次")
+        
+        for endpoint, stats in sorted(get_rate_limiter().stats().items()):
+            logger.info(f"限流统计 {endpoint}: 调用 {stats['acquired']} 次, 排队共 {stats['waited']:.2f} 秒, "
+                        f"最长 {stats['max_wait']:.2f} 秒, 被限流 {stats['rate_limited']} 次")
+        
+        for service, stats in sorted(circuit_breaker_stats().items()):
+            if stats["opened"] or stats["rejected"]:
+                logger.info(f"熔断统计 {service}: 当前 {stats['state']}, 调用 {stats['calls']} 次, "
+                            f"失败 {stats['failures']} 次, 熔断 {stats['opened']} 次, 快速失败 {stats['rejected']} 次")
+        
+        cassette = get_cassette()
+        if cassette.enabled:
+            cassette_stats = cassette.stats()
+            logger.info(f"磁带{cassette_stats['mode']}: 录制 {cassette_stats['recorded']} 条, "
+                        f"命中 {cassette_stats['hits']} 次, 未命中 {cassette_stats['misses']} 次")
         
         return results
 
+    def _process_batch_item(self, index: int, total: int, url: str,
+                            output_dir: Optional[str] = None,
+                            options: Optional[PipelineOptions] = None) -> TemuListingResult:
+        """处理批量任务中的单个商品，异常转换为失败结果"""
+        logger.info(f"处理第 {index}/{total} 个商品: {url}")
+        try:
+            result = self.process_single_url(url, output_dir, options=options)
+            
+            if result.success:
+                logger.info(f"第 {index} 个商品处理成功")
+            else:
+                logger.warning(f"第 {index} 个商品处理失败: {', '.join(result.errors)}")
+            return result
+                
+        except Exception as e:
+            logger.error(f"第 {index} 个商品处理异常: {str(e)}")
+            return TemuListingResult(
+                success=False,
+                errors=[f"处理异常: {str(e)}"]
+            )
+
     def test_connection(self) -> bool:
         """
         测试系统连接
@@ -211,6 +296,19 @@ class AutoTemuApp:
             logger.error(f"系统连接测试失败: {str(e)}")
             return False
 
+    def collect_image_garbage(self, quota_bytes: Optional[int] = None, dry_run: bool = False) -> GcReport:
+        """
+        按字节配额回收图片目录
+
+        Args:
+            quota_bytes: 字节配额，默认使用 IMAGE_CACHE_QUOTA_BYTES
+            dry_run: 只统计不删除
+
+        Returns:
+            回收结果
+        """
+        return self.image_processor.cache.collect(quota_bytes=quota_bytes, dry_run=dry_run)
+
     def get_system_status(self) -> dict:
         """
         获取系统状态
@@ -239,6 +337,21 @@ class AutoTemuApp:
         return status
 
 
+def _write_timing_report(path: Optional[str], results: List[TemuListingResult]):
+    """将耗时记录和汇总报告写入JSON文件"""
+    if not path:
+        return
+    records = [r.timings for r in results if r.timings]
+    report = {
+        "summary": aggregate_timings(records),
+        "circuit_breakers": circuit_breaker_stats(),
+        "products": records
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📊 耗时报告已写入: {path}")
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="AutoTemu - 自动化商品爬取和添加工具")
@@ -246,8 +359,16 @@ def main():
     parser.add_argument("--urls", type=str, nargs="+", help="多个商品URL")
     parser.add_argument("--config", type=str, help="配置文件路径")
     parser.add_argument("--output", type=str, help="输出目录")
+    parser.add_argument("--refresh", action="store_true", help="忽略抓取、OCR、图片上传、分类模板和分类推荐缓存，全部重新获取")
+    parser.add_argument("--revalidate-images", action="store_true", help="对已下载的图片发送条件请求（ETag/Last-Modified），未变化时复用本地文件和OCR结果")
+    parser.add_argument("--resume", action="store_true", help="从上次失败的步骤继续（使用按URL保存的检查点）")
+    parser.add_argument("--timing-report", type=str, help="将每个商品的耗时记录和汇总报告写入该JSON文件")
+    parser.add_argument("--workers", type=int, default=1, help="批量处理时的并发商品数（默认1，即串行）")
     parser.add_argument("--test", action="store_true", help="测试系统连接")
     parser.add_argument("--status", action="store_true", help="显示系统状态")
+    parser.add_argument("--gc", action="store_true", help="立即按 IMAGE_CACHE_QUOTA_BYTES 回收图片目录，淘汰最久未使用的图片（处理图片后超出配额时也会自动回收）")
+    parser.add_argument("--gc-quota", type=int, help="本次回收使用的字节配额（覆盖 IMAGE_CACHE_QUOTA_BYTES）")
+    parser.add_argument("--gc-dry-run", action="store_true", help="只统计可回收的字节数，不删除文件")
     parser.add_argument("--verbose", "-v", action="store_true", help="详细输出")
     parser.add_argument("--golden", action="store_true", help="运行金测试（docs/examples/test_real_product.py）")
     
@@ -272,6 +393,15 @@ def main():
             print(json.dumps(status, indent=2, ensure_ascii=False))
             sys.exit(0)
         
+        # 回收图片目录
+        if args.gc:
+            report = app.collect_image_garbage(quota_bytes=args.gc_quota, dry_run=args.gc_dry_run)
+            action = "可回收" if args.gc_dry_run else "已回收"
+            print(f"🧹 图片目录{action} {report.bytes_reclaimed / 1024 ** 2:.1f} MB"
+                  f"（{report.files_removed}/{report.files_scanned} 个文件，删除 {report.records_removed} 条下载记录），"
+                  f"剩余 {report.bytes_after / 1024 ** 2:.1f} MB")
+            sys.exit(0)
+        
         # 运行金测试
         if args.golden:
             # 直接复用金测试脚本的完整流程，确保与真实测试一致
@@ -298,19 +428,35 @@ def main():
                 sys.exit(2)
 
         # 处理商品URL（常规流程）
+        options = replace(
+            PipelineOptions.from_force_scrape(args.refresh),
+            revalidate_images=args.revalidate_images,
+            resume=args.resume
+        )
         if args.url:
-            result = app.process_single_url(args.url, args.output)
+            result = app.process_single_url(args.url, args.output, options=options)
             if result.success:
                 print(f"✅ 商品添加成功: {result.product_id}")
+                _write_timing_report(args.timing_report, [result])
                 sys.exit(0)
             else:
                 print(f"❌ 商品添加失败: {', '.join(result.errors)}")
+                _write_timing_report(args.timing_report, [result])
                 sys.exit(1)
         
         elif args.urls:
-            results = app.process_batch_urls(args.urls, args.output)
+            start_time = time.perf_counter()
+            results = app.process_batch_urls(args.urls, args.output, workers=args.workers, options=options)
+            elapsed = time.perf_counter() - start_time
             successful = sum(1 for r in results if r.success)
+            throughput = len(results) / elapsed * 60 if elapsed > 0 else 0.0
             print(f"✅ 批量处理完成: {successful}/{len(results)} 成功")
+            workers = effective_workers(args.workers, len(args.urls))
+            print(f"⏱️  耗时 {elapsed:.1f} 秒, 吞吐量 {throughput:.2f} 个商品/分钟 (并发数 {workers})")
+            timing_records = [r.timings for r in results if r.timings]
+            if timing_records:
+                print(format_timing_report(aggregate_timings(timing_records)))
+            _write_timing_report(args.timing_report, results)
             sys.exit(0)
         
         else:
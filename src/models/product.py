@@ -4,7 +4,7 @@
 定义系统中使用的商品相关数据类
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -111,6 +111,27 @@ class TemuProduct:
         
         # 设置更新时间
         self.updated_at = datetime.now()
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        data = asdict(self)
+        data['skus'] = [sku.to_dict() for sku in self.skus]
+        data['status'] = self.status.value
+        data['created_at'] = self.created_at.isoformat()
+        data['updated_at'] = self.updated_at.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TemuProduct':
+        """从字典创建实例"""
+        data = dict(data)
+        data['skus'] = [TemuSKU.from_dict(sku) for sku in data.get('skus') or []]
+        if 'status' in data:
+            data['status'] = ProductStatus(data['status'])
+        for key in ('created_at', 'updated_at'):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
 
 
 @dataclass
@@ -151,6 +172,22 @@ class TemuSKU:
         
         # 设置更新时间
         self.updated_at = datetime.now()
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        data = asdict(self)
+        data['created_at'] = self.created_at.isoformat()
+        data['updated_at'] = self.updated_at.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TemuSKU':
+        """从字典创建实例"""
+        data = dict(data)
+        for key in ('created_at', 'updated_at'):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
 
 
 @dataclass
@@ -255,6 +292,7 @@ class TemuListingResult:
     image_ids: List[str] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    timings: Dict[str, Any] = field(default_factory=dict)  # 各步骤/API耗时记录
     created_at: datetime = field(default_factory=datetime.now)
     
     def __post_init__(self):
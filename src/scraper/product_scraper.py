@@ -12,7 +12,10 @@ from urllib.parse import urlparse
 
 from firecrawl import Firecrawl
 from firecrawl.types import ScrapeResponse
+from firecrawl.v2.types import Document
 
+from ..utils.cache import normalize_url
+from ..utils.cassette import get_cassette
 from ..utils.config import get_config
 from ..utils.logger import get_logger
 from ..utils.retry import network_retry
@@ -84,17 +87,23 @@ class ProductScraper:
         self.logger.info(f"开始抓取页面: {url}")
         
         try:
-            result = self.firecrawl.scrape(
-                url,
-                formats=[
-                    {
-                        "type": "json",
-                        "prompt": self._get_scrape_prompt()
-                    }
-                ],
-                only_main_content=True,
-                wait_for=5000,
-                timeout=300000
+            prompt = self._get_scrape_prompt()
+            result = get_cassette().call(
+                "firecrawl", "scrape", {"url": normalize_url(url), "prompt": prompt},
+                lambda: self.firecrawl.scrape(
+                    url,
+                    formats=[
+                        {
+                            "type": "json",
+                            "prompt": prompt
+                        }
+                    ],
+                    only_main_content=True,
+                    wait_for=5000,
+                    timeout=300000
+                ),
+                encode=lambda doc: doc.model_dump(mode="json", exclude_none=True),
+                decode=Document.model_validate
             )
             
             if not hasattr(result, "json") or not result.json:
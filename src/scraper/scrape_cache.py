@@ -0,0 +1,130 @@
+"""
+商品抓取缓存模块
+
+以规范化URL的哈希为键，将Firecrawl抓取结果持久化到缓存目录，
+支持过期时间(TTL)、原子写入和按条目数上限的LRU淘汰。
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..utils.cache import atomic_write_json, normalize_url, url_hash
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger("scrape_cache")
+
+
+class ScrapeCache:
+    """按URL持久化的抓取结果缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        """
+        初始化抓取缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为 {CACHE_DIR}/scrape
+            ttl: 缓存有效期（秒），0表示永不过期
+            max_entries: 最多保留的条目数，超出时淘汰最久未使用的条目
+        """
+        config = get_config()
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(config.cache_dir) / "scrape"
+        self.ttl = config.scrape_cache_ttl if ttl is None else ttl
+        self.max_entries = config.scrape_cache_max_entries if max_entries is None else max_entries
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _entry_path(self, url: str) -> Path:
+        """获取URL对应的缓存文件路径"""
+        return self.cache_dir / f"{url_hash(url)}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的抓取结果
+
+        Args:
+            url: 商品URL
+
+        Returns:
+            缓存的商品数据字典，未命中或已过期返回None
+        """
+        path = self._entry_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取抓取缓存失败，忽略该条目: {path.name}, 错误: {e}")
+            return None
+
+        if entry.get("url") != normalize_url(url):
+            # 哈希碰撞或旧格式，视为未命中
+            return None
+
+        if self.ttl and time.time() - entry.get("cached_at", 0) > self.ttl:
+            logger.info(f"抓取缓存已过期: {url}")
+            self.invalidate(url)
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("data")
+
+    def set(self, url: str, data: Dict[str, Any]):
+        """
+        写入抓取结果
+
+        Args:
+            url: 商品URL
+            data: 商品数据字典
+        """
+        entry = {
+            "url": normalize_url(url),
+            "cached_at": time.time(),
+            "data": data,
+        }
+        atomic_write_json(self._entry_path(url), entry, indent=2)
+        self._evict()
+
+    def invalidate(self, url: str):
+        """
+        删除URL对应的缓存
+
+        Args:
+            url: 商品URL
+        """
+        try:
+            self._entry_path(url).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """超出条目上限时，按最后访问时间淘汰最旧的条目"""
+        if not self.max_entries:
+            return
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            overflow = len(entries) - self.max_entries
+            if overflow <= 0:
+                return
+            entries.sort()
+            for _, path in entries[:overflow]:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            logger.info(f"抓取缓存超出上限 {self.max_entries}，已淘汰 {overflow} 条")
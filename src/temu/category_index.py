@@ -0,0 +1,308 @@
+"""
+Temu分类树索引模块
+
+将 cats_get 返回的分类节点（父子关系、叶子标记、catType）保存在内存中并持久化到
+缓存目录，按TTL整体失效。叶子判断、catType查询和祖先路径查询均在内存中完成，
+只有从未展开过的节点才会调用一次 cats_get，展开结果合并后写回索引
+（距上次写盘不足 flush_interval 秒时延后合并写入，进程退出时写入剩余的修改）。
+"""
+
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.cache import atomic_write_json
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger("category_index")
+
+# 获取子分类的函数: parent_cat_id -> 子分类列表，调用失败时返回None
+FetchChildren = Callable[[int], Optional[List[Dict[str, Any]]]]
+
+ROOT_CAT_ID = 0
+
+
+class CategoryIndex:
+    """本地分类树索引（线程安全）"""
+
+    def __init__(self, index_path: Optional[str] = None, ttl: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        """
+        初始化分类索引
+
+        Args:
+            index_path: 索引文件路径，默认为 {CACHE_DIR}/category_index.json
+            ttl: 索引有效期（秒），0表示永不过期
+            flush_interval: 两次写盘的最短间隔（秒），默认为 PERSISTENT_CACHE_FLUSH_INTERVAL
+        """
+        config = get_config()
+        self.index_path = Path(index_path) if index_path else Path(config.cache_dir) / "category_index.json"
+        self.ttl = config.category_index_ttl if ttl is None else ttl
+        self.flush_interval = config.persistent_cache_flush_interval if flush_interval is None else flush_interval
+        self._lock = threading.RLock()
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self._built_at = time.time()
+        self._dirty = False
+        self._last_save = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """从磁盘读取索引，过期或损坏时从空索引开始"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"读取分类索引失败，重新建立: {e}")
+            return
+
+        built_at = data.get("built_at", 0)
+        if self.ttl and time.time() - built_at > self.ttl:
+            logger.info("分类索引已过期，重新建立")
+            return
+
+        self._built_at = built_at
+        self._nodes = {int(cat_id): node for cat_id, node in (data.get("nodes") or {}).items()}
+        logger.info(f"加载分类索引: {len(self._nodes)} 个节点")
+
+    def save(self):
+        """将索引写入磁盘"""
+        # 在锁内复制节点（含子节点列表），其他线程合并展开结果时不影响写出的快照
+        with self._lock:
+            data = {
+                "built_at": self._built_at,
+                "nodes": {str(cat_id): self._copy_node(node) for cat_id, node in self._nodes.items()},
+            }
+            self._dirty = False
+            self._last_save = time.time()
+        atomic_write_json(self.index_path, data)
+
+    @staticmethod
+    def _copy_node(node: Dict[str, Any]) -> Dict[str, Any]:
+        """复制节点及其子节点列表（调用方需持有锁）"""
+        children = node.get("children")
+        return dict(node, children=list(children) if children is not None else None)
+
+    def flush(self):
+        """立即写入未保存的修改"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+        self.save()
+
+    def _mark_dirty(self):
+        """标记有未保存的修改，按 flush_interval 立即或延后写盘"""
+        with self._lock:
+            self._dirty = True
+            wait = self._last_save + self.flush_interval - time.time()
+            if wait > 0:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(wait, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.save()
+
+    def _expired(self) -> bool:
+        """内存中的索引是否已超过有效期"""
+        return bool(self.ttl) and time.time() - self._built_at > self.ttl
+
+    def _record_children(self, parent_cat_id: int, categories: List[Dict[str, Any]]):
+        """记录一次 cats_get 的结果"""
+        child_ids = []
+        for cat in categories:
+            cat_id = cat.get("catId")
+            if cat_id is None:
+                continue
+            cat_id = int(cat_id)
+            child_ids.append(cat_id)
+            node = self._nodes.setdefault(cat_id, {"children": None})
+            node.update({
+                "catId": cat_id,
+                "catName": cat.get("catName"),
+                "parentId": parent_cat_id,
+                "catType": cat.get("catType"),
+            })
+            if cat.get("isLeaf") is not None:
+                node["isLeaf"] = bool(cat.get("isLeaf"))
+                if node["isLeaf"]:
+                    node["children"] = []
+
+        parent = self._nodes.setdefault(parent_cat_id, {"catId": parent_cat_id})
+        parent["children"] = child_ids
+        parent["isLeaf"] = not child_ids
+
+    def get(self, cat_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取已知的分类节点
+
+        Args:
+            cat_id: 分类ID
+
+        Returns:
+            节点字典，尚未索引时返回None
+        """
+        with self._lock:
+            node = self._nodes.get(int(cat_id))
+            return dict(node) if node else None
+
+    def children(self, cat_id: int, fetch: Optional[FetchChildren] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取子分类，节点未展开时通过 fetch 展开一次并写回索引
+
+        Args:
+            cat_id: 分类ID，0为根分类
+            fetch: 获取子分类的函数，为None时只查询索引
+
+        Returns:
+            子分类节点列表，无法确定时返回None
+        """
+        cat_id = int(cat_id)
+        with self._lock:
+            if self._expired():
+                logger.info("分类索引已过期，清空后重新展开")
+                self._nodes = {}
+                self._built_at = time.time()
+
+            node = self._nodes.get(cat_id)
+            if node is not None and node.get("children") is not None:
+                return [dict(self._nodes[child_id]) for child_id in node["children"]]
+            if fetch is None:
+                return None
+
+        # 调用API时不持有锁，其他线程可以继续查询索引
+        categories = fetch(cat_id)
+        if categories is None:
+            return None
+
+        with self._lock:
+            self._record_children(cat_id, categories)
+            children = [dict(self._nodes[child_id]) for child_id in self._nodes[cat_id]["children"]]
+        self._mark_dirty()
+        return children
+
+    def is_leaf(self, cat_id: int, fetch: Optional[FetchChildren] = None) -> Optional[bool]:
+        """
+        判断是否为叶子分类
+
+        Args:
+            cat_id: 分类ID
+            fetch: 获取子分类的函数，为None时只查询索引
+
+        Returns:
+            是否为叶子分类，无法确定时返回None
+        """
+        with self._lock:
+            node = self._nodes.get(int(cat_id))
+            if node and node.get("isLeaf") is not None:
+                return node["isLeaf"]
+        children = self.children(cat_id, fetch)
+        return None if children is None else not children
+
+    def cat_type(self, cat_id: int) -> Optional[int]:
+        """
+        获取分类的catType（0=服饰，1=非服饰）
+
+        Args:
+            cat_id: 分类ID
+
+        Returns:
+            catType，分类尚未索引时返回None
+        """
+        with self._lock:
+            node = self._nodes.get(int(cat_id))
+            if node and node.get("catType") is not None:
+                return int(node["catType"])
+        return None
+
+    def ancestors(self, cat_id: int) -> List[Dict[str, Any]]:
+        """
+        获取从一级分类到父分类的祖先路径
+
+        Args:
+            cat_id: 分类ID
+
+        Returns:
+            祖先节点列表（由上到下），分类尚未索引时返回空列表
+        """
+        path = []
+        with self._lock:
+            node = self._nodes.get(int(cat_id))
+            seen = set()
+            while node and node.get("parentId") not in (None, ROOT_CAT_ID):
+                parent_id = node["parentId"]
+                if parent_id in seen:
+                    break
+                seen.add(parent_id)
+                node = self._nodes.get(parent_id)
+                if node:
+                    path.append(dict(node))
+        path.reverse()
+        return path
+
+    def leaf_descendants(self, cat_id: int, fetch: Optional[FetchChildren] = None,
+                         max_depth: int = 3) -> List[Dict[str, Any]]:
+        """
+        查找分类下的叶子分类（广度优先）
+
+        Args:
+            cat_id: 分类ID
+            fetch: 获取子分类的函数，为None时只查询索引
+            max_depth: 最大展开深度
+
+        Returns:
+            叶子分类节点列表；分类本身是叶子时返回其自身
+        """
+        if self.is_leaf(cat_id, fetch):
+            node = self.get(cat_id) or {"catId": int(cat_id)}
+            return [node]
+
+        leaves = []
+        queue = deque([(int(cat_id), 0)])
+        while queue:
+            current, depth = queue.popleft()
+            children = self.children(current, fetch)
+            if children is None:
+                continue
+            if not children:
+                leaves.append(self.get(current))
+                continue
+            for child in children:
+                if child.get("isLeaf") or depth + 1 >= max_depth:
+                    leaves.append(child)
+                else:
+                    queue.append((child["catId"], depth + 1))
+        return leaves
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._nodes)
+
+
+_category_index: Optional[CategoryIndex] = None
+_category_index_lock = threading.Lock()
+
+
+def get_category_index() -> CategoryIndex:
+    """
+    获取进程内共享的分类索引实例
+
+    Returns:
+        分类索引实例
+    """
+    global _category_index
+    with _category_index_lock:
+        if _category_index is None:
+            _category_index = CategoryIndex()
+        return _category_index
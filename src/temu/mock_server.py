@@ -0,0 +1,366 @@
+"""
+本地Temu Open API模拟服务
+
+在 /openapi/router 上按请求的 type 字段分发，实现 cats_get、category_recommend、
+template_get、spec_id_get、image_upload 和 goods_add，支持按端点配置延迟分布、
+错误率和限流响应，用于在离线环境下可重复地压测并发和缓存改动。
+
+使用方式:
+    python -m src.temu.mock_server --port 8900 --latency default=0.2:0.5 --error-rate 0.01 \
+        --rate-limit image_upload=2
+    TEMU_BASE_URL=http://127.0.0.1:8900 python -m src.main --urls URL1 URL2 --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger("mock_server")
+
+# 请求 type 到端点名称（与 temu_client.product 方法名一致）
+API_TYPES = {
+    "bg.local.goods.cats.get": "cats_get",
+    "bg.local.goods.category.recommend": "category_recommend",
+    "bg.local.goods.template.get": "template_get",
+    "bg.local.goods.spec.id.get": "spec_id_get",
+    "bg.local.goods.image.upload": "image_upload",
+    "bg.local.goods.add": "goods_add",
+}
+
+# 服饰类目，与 ProductManager 的回退类目一致
+APPAREL_CAT_ID = 30847
+
+
+@dataclass
+class LatencySpec:
+    """对数正态延迟分布"""
+    median: float = 0.0     # 中位数（秒）
+    sigma: float = 0.0      # 对数标准差，0表示固定延迟
+
+    def sample(self, rng: random.Random) -> float:
+        """采样一次延迟"""
+        if self.median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencySpec":
+        """解析 "中位数:sigma" 格式"""
+        median, _, sigma = value.partition(":")
+        return cls(float(median), float(sigma or 0))
+
+
+@dataclass
+class MockServerConfig:
+    """模拟服务配置"""
+    latency: Dict[str, LatencySpec] = field(default_factory=dict)   # 端点 -> 延迟分布，"default" 为默认
+    error_rate: Dict[str, float] = field(default_factory=dict)      # 端点 -> 返回业务错误的概率，"default" 为默认
+    rate_limit: Dict[str, float] = field(default_factory=dict)      # 端点 -> 每秒允许的请求数，超出时返回限流响应
+    retry_after: float = 1.0                                        # 限流响应中的 retryAfter（秒）
+    seed: Optional[int] = None                                      # 随机种子，用于复现
+
+    def latency_for(self, endpoint: str) -> LatencySpec:
+        return self.latency.get(endpoint) or self.latency.get("default") or LatencySpec()
+
+    def error_rate_for(self, endpoint: str) -> float:
+        return self.error_rate.get(endpoint, self.error_rate.get("default", 0.0))
+
+
+def _stable_int(*parts: Any) -> int:
+    """由输入生成稳定的整数"""
+    digest = hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def _build_category_tree() -> Dict[int, List[Dict[str, Any]]]:
+    """生成固定的三级分类树：5个一级分类，每个4个二级分类，每个3个叶子分类"""
+    tree: Dict[int, List[Dict[str, Any]]] = {0: []}
+    for i in range(1, 6):
+        cat_type = 0 if i == 1 else 1
+        tree[0].append({"catId": i, "catName": f"Category {i}", "catType": cat_type, "isLeaf": False})
+        tree[i] = []
+        for j in range(1, 5):
+            level2 = i * 100 + j
+            tree[i].append({"catId": level2, "catName": f"Category {i}-{j}", "catType": cat_type, "isLeaf": False})
+            tree[level2] = []
+            for k in range(1, 4):
+                leaf = APPAREL_CAT_ID if (i, j, k) == (1, 1, 1) else level2 * 10 + k
+                tree[level2].append({"catId": leaf, "catName": f"Category {i}-{j}-{k}", "catType": cat_type, "isLeaf": True})
+                tree[leaf] = []
+    return tree
+
+
+# 1x1 JPEG，用于响应上传后图片的GET/HEAD
+_PIXEL_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c"
+    "20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001000101011100ffc4001f000001050101010101010000"
+    "0000000000000102030405060708090a0bffc400b5100002010303020403050504040000017d01020300041105122131410613516107227114328191"
+    "a1082342b1c11552d1f02433627282090a161718191a25262728292a3435363738393a434445464748494a535455565758595a636465666768696a"
+    "737475767778797a838485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7d8"
+    "d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbd3ffd9"
+)
+
+
+class MockTemuState:
+    """模拟服务的业务状态和请求统计（线程安全）"""
+
+    def __init__(self, config: MockServerConfig):
+        self.config = config
+        self.tree = _build_category_tree()
+        self.leaves = [cat for cats in self.tree.values() for cat in cats if cat["isLeaf"]]
+        self.cat_types = {cat["catId"]: cat["catType"] for cats in self.tree.values() for cat in cats}
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._next_goods_id = 600000000
+        self._rate_windows: Dict[str, Tuple[float, float]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, outcome: str):
+        with self._lock:
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "errors": 0, "rate_limited": 0})
+            stats["requests"] += 1
+            if outcome != "ok":
+                stats[outcome] += 1
+
+    def _rate_limited(self, endpoint: str) -> bool:
+        """按端点的令牌桶判断是否限流"""
+        rate = self.config.rate_limit.get(endpoint, self.config.rate_limit.get("default", 0))
+        if rate <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._rate_windows.get(endpoint, (max(1.0, rate), now))
+            tokens = min(max(1.0, rate), tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._rate_windows[endpoint] = (tokens, now)
+                return True
+            self._rate_windows[endpoint] = (tokens - 1, now)
+            return False
+
+    def handle(self, api_type: str, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        """
+        处理一次API请求
+
+        Args:
+            api_type: 请求的 type 字段
+            params: 请求参数
+            base_url: 服务地址，用于生成上传后的图片URL
+
+        Returns:
+            API响应
+        """
+        endpoint = API_TYPES.get(api_type)
+        if endpoint is None:
+            return {"success": False, "errorCode": 1000001, "errorMsg": f"unsupported type: {api_type}"}
+
+        if self._rate_limited(endpoint):
+            self._count(endpoint, "rate_limited")
+            return {"success": False, "errorCode": 429, "errorMsg": "rate limit exceeded",
+                    "retryAfter": self.config.retry_after}
+
+        with self._lock:
+            delay = self.config.latency_for(endpoint).sample(self._rng)
+            failed = self._rng.random() < self.config.error_rate_for(endpoint)
+        if delay:
+            time.sleep(delay)
+
+        if failed:
+            self._count(endpoint, "errors")
+            return {"success": False, "errorCode": 5000000, "errorMsg": "mock internal error"}
+
+        self._count(endpoint, "ok")
+        return {"success": True, "errorCode": 1000000, "result": getattr(self, f"_{endpoint}")(params, base_url)}
+
+    def _cats_get(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {"goodsCatsList": self.tree.get(int(params.get("parentCatId") or 0), [])}
+
+    def _category_recommend(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        leaf = self.leaves[_stable_int(params.get("goodsName")) % len(self.leaves)]
+        return {"catId": leaf["catId"], "catName": leaf["catName"], "catIdList": [leaf["catId"]]}
+
+    def _template_get(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        cat_id = int(params.get("catId") or 0)
+        return {
+            "catType": self.cat_types.get(cat_id, 1),
+            "inputMaxSpecNum": 3,
+            "userInputParentSpecList": [{"parentSpecId": 3001, "parentSpecName": "Size"}],
+            "propertyList": [
+                {"propertyName": "Material", "templatePid": 1, "pid": 1, "refPid": 11, "vid": 101,
+                 "required": True, "defaultValue": "Cotton"},
+                {"propertyName": "Style", "templatePid": 2, "pid": 2, "refPid": 12, "vid": 201,
+                 "required": False, "defaultValue": "Casual"},
+            ],
+            "templateInfo": {
+                "goodsSpecProperties": [
+                    {"parentSpecId": 1001, "parentSpecName": "Color",
+                     "values": [{"value": "Black", "specId": 10001}, {"value": "White", "specId": 10002}]},
+                ]
+            },
+        }
+
+    def _spec_id_get(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        spec_id = 20000000 + _stable_int(params.get("catId"), params.get("parentSpecId"),
+                                         params.get("childSpecName")) % 10000000
+        return {"specId": spec_id}
+
+    def _image_upload(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        name = hashlib.md5(f"{params.get('fileUrl')}|{params.get('scalingType')}".encode("utf-8")).hexdigest()
+        return {"url": f"{base_url}/images/{name}.jpg"}
+
+    def _goods_add(self, params: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        with self._lock:
+            self._next_goods_id += 1
+            goods_id = self._next_goods_id
+        sku_list = params.get("skuList") or []
+        return {
+            "goodsId": goods_id,
+            "goodsSkuList": [{"skuId": goods_id * 100 + i} for i in range(len(sku_list) or 1)],
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """模拟服务请求处理器"""
+    protocol_version = "HTTP/1.1"
+    server: "MockTemuServer"
+
+    def _send_json(self, data: Any, status: int = 200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_image(self, head_only: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(_PIXEL_JPEG)))
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(_PIXEL_JPEG)
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/openapi/router":
+            self._send_json({"success": False, "errorMsg": "not found"}, status=404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json({"success": False, "errorCode": 1000002, "errorMsg": "invalid json"})
+            return
+        self._send_json(self.server.state.handle(params.get("type"), params, self.server.url))
+
+    def do_GET(self):
+        if self.path.startswith("/images/"):
+            self._send_image(head_only=False)
+        elif self.path == "/__stats":
+            self._send_json(self.server.state.stats)
+        else:
+            self._send_json({"success": False, "errorMsg": "not found"}, status=404)
+
+    def do_HEAD(self):
+        if self.path.startswith("/images/"):
+            self._send_image(head_only=True)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockTemuServer(ThreadingHTTPServer):
+    """本地Temu Open API模拟服务"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockServerConfig] = None):
+        """
+        初始化模拟服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            config: 模拟服务配置
+        """
+        super().__init__((host, port), _Handler)
+        self.state = MockTemuState(config or MockServerConfig())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务地址，可直接作为 TEMU_BASE_URL"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockTemuServer":
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-temu", daemon=True)
+        self._thread.start()
+        logger.info(f"Temu模拟服务已启动: {self.url}")
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "MockTemuServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _parse_pairs(values: List[str], convert) -> Dict[str, Any]:
+    """解析 "端点=值" 列表"""
+    result = {}
+    for item in values or []:
+        key, _, value = item.partition("=")
+        if not value:
+            key, value = "default", key
+        result[key.strip()] = convert(value)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地Temu Open API模拟服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8900, help="监听端口")
+    parser.add_argument("--latency", action="append", help="延迟分布 端点=中位数秒:sigma，如 image_upload=0.8:0.4")
+    parser.add_argument("--error-rate", action="append", help="错误率 端点=概率，省略端点表示默认")
+    parser.add_argument("--rate-limit", action="append", help="限流 端点=每秒请求数，省略端点表示默认")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="限流响应中的retryAfter（秒）")
+    parser.add_argument("--seed", type=int, help="随机种子")
+    args = parser.parse_args()
+
+    server = MockTemuServer(args.host, args.port, MockServerConfig(
+        latency=_parse_pairs(args.latency, LatencySpec.parse),
+        error_rate=_parse_pairs(args.error_rate, float),
+        rate_limit=_parse_pairs(args.rate_limit, float),
+        retry_after=args.retry_after,
+        seed=args.seed,
+    ))
+    print(f"TEMU_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.state.stats, ensure_ascii=False, indent=2))
@@ -0,0 +1,307 @@
+"""
+本地分类器模块
+
+用历史上架记录（标题 -> Temu catId）训练字符n-gram TF-IDF倒排索引，
+对新标题做余弦相似度近邻投票。置信度高于阈值时直接给出分类，
+否则交由远程 category_recommend 处理。
+
+新增样本时只追加倒排表，IDF在查询时按当前文档频率计算；
+各样本向量的长度在样本数增长超过 NORM_REFRESH_RATIO 后统一重新计算。
+
+离线评估与远程推荐的一致率:
+    python -m src.transform.category_classifier --history cache/listing_history.jsonl
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .data_transformer import DataTransformer
+from ..utils.cache import hash_key
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger("category_classifier")
+
+# 样本数比上次计算向量长度时增长超过该比例后重新计算全部向量长度
+NORM_REFRESH_RATIO = 0.1
+
+
+class CategoryClassifier:
+    """基于字符n-gram TF-IDF的近邻分类器（线程安全）"""
+
+    def __init__(self, ngram_range: Tuple[int, int] = (2, 3), top_k: int = 5):
+        """
+        初始化分类器
+
+        Args:
+            ngram_range: 字符n-gram长度范围（含两端）
+            top_k: 参与投票的近邻数
+        """
+        self.ngram_range = ngram_range
+        self.top_k = top_k
+        self._fingerprint = DataTransformer().title_fingerprint
+        self._lock = threading.RLock()
+        self._labels: List[Any] = []
+        self._doc_terms: List[Counter] = []
+        self._doc_freq: Counter = Counter()
+        self._fingerprints: Dict[str, int] = {}
+        # 词 -> [(样本序号, 词频权重)]，IDF在查询时计算
+        self._index: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._norms: List[float] = []
+        self._norms_size = 0
+
+    def _ngrams(self, title: str) -> Counter:
+        """提取字符n-gram词频（基于标题指纹，与推荐缓存的键一致）"""
+        text = f" {self._fingerprint(title)} "
+        grams = Counter()
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram.strip():
+                    grams[gram] += 1
+        return grams
+
+    def add(self, title: str, cat_id: Any):
+        """
+        添加一条训练样本，相同标题指纹以最新的分类为准
+
+        Args:
+            title: 商品标题
+            cat_id: 分类ID
+        """
+        fingerprint = self._fingerprint(title)
+        if not fingerprint or cat_id is None:
+            return
+        with self._lock:
+            if fingerprint in self._fingerprints:
+                self._labels[self._fingerprints[fingerprint]] = cat_id
+                return
+            terms = self._ngrams(title)
+            doc_id = len(self._labels)
+            self._fingerprints[fingerprint] = doc_id
+            self._labels.append(cat_id)
+            self._doc_terms.append(terms)
+            self._doc_freq.update(terms.keys())
+            for term, tf in terms.items():
+                self._index[term].append((doc_id, 1 + math.log(tf)))
+            self._norms.append(self._norm(terms))
+
+    def fit(self, samples: Iterable[Tuple[str, Any]]) -> "CategoryClassifier":
+        """
+        批量添加训练样本
+
+        Args:
+            samples: (标题, 分类ID) 序列
+
+        Returns:
+            分类器自身
+        """
+        for title, cat_id in samples:
+            self.add(title, cat_id)
+        return self
+
+    def _idf(self, term: str) -> float:
+        """平滑IDF"""
+        return math.log((1 + len(self._labels)) / (1 + self._doc_freq.get(term, 0))) + 1
+
+    def _norm(self, terms: Counter) -> float:
+        """按当前IDF计算样本向量长度（调用方需持有锁）"""
+        return math.sqrt(sum(((1 + math.log(tf)) * self._idf(term)) ** 2 for term, tf in terms.items())) or 1.0
+
+    def _refresh_norms(self):
+        """样本数增长较多、IDF已明显变化时重新计算全部向量长度（调用方需持有锁）"""
+        if len(self._labels) <= self._norms_size * (1 + NORM_REFRESH_RATIO):
+            return
+        self._norms = [self._norm(terms) for terms in self._doc_terms]
+        self._norms_size = len(self._labels)
+
+    def predict(self, title: str) -> Optional[Tuple[Any, float]]:
+        """
+        预测分类
+
+        置信度 = 最近邻的余弦相似度 × 胜出分类在前top_k个近邻中的相似度占比
+        （相似度低于最近邻一半的近邻不参与投票）
+
+        Args:
+            title: 商品标题
+
+        Returns:
+            (分类ID, 置信度)，无训练数据或无相似样本时返回None
+        """
+        query = self._ngrams(title)
+        if not query:
+            return None
+
+        with self._lock:
+            if not self._labels:
+                return None
+            self._refresh_norms()
+
+            idfs = {term: self._idf(term) for term in query}
+            weights = {term: (1 + math.log(tf)) * idfs[term] for term, tf in query.items()}
+            query_norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            scores: Dict[int, float] = defaultdict(float)
+            for term, q_weight in weights.items():
+                for doc_id, d_tf in self._index.get(term, ()):
+                    scores[doc_id] += q_weight * d_tf * idfs[term]
+            if not scores:
+                return None
+
+            neighbours = sorted(
+                ((score / (query_norm * self._norms[doc_id]), doc_id) for doc_id, score in scores.items()),
+                reverse=True
+            )[:self.top_k]
+            # 只让相似度不低于最近邻一半的样本参与投票，避免弱相关样本稀释置信度
+            neighbours = [(sim, doc_id) for sim, doc_id in neighbours if sim >= neighbours[0][0] / 2]
+            votes: Dict[Any, float] = defaultdict(float)
+            for similarity, doc_id in neighbours:
+                votes[self._labels[doc_id]] += similarity
+            cat_id, vote = max(votes.items(), key=lambda item: item[1])
+
+        total = sum(votes.values()) or 1.0
+        confidence = min(1.0, neighbours[0][0] * vote / total)
+        return cat_id, round(confidence, 4)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._labels)
+
+
+def load_listing_history(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    读取上架历史记录
+
+    Args:
+        path: 历史记录文件路径（JSONL，每行包含 title 和 catId），默认为配置中的路径
+
+    Returns:
+        历史记录列表，文件不存在时返回空列表
+    """
+    path = Path(path or get_config().listing_history_path)
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("title") and record.get("catId") is not None:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+_history_lock = threading.Lock()
+
+
+def append_listing_history(title: str, cat_id: Any, cat_name: Optional[str] = None,
+                           source: str = "recommend", path: Optional[str] = None):
+    """
+    追加一条上架历史记录
+
+    Args:
+        title: 商品标题
+        cat_id: 分类ID
+        cat_name: 分类名称
+        source: 分类来源（recommend=远程推荐）
+        path: 历史记录文件路径，默认为配置中的路径
+    """
+    path = Path(path or get_config().listing_history_path)
+    record = {"title": title, "catId": cat_id, "catName": cat_name, "source": source, "ts": time.time()}
+    with _history_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+_classifier: Optional[CategoryClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_category_classifier() -> CategoryClassifier:
+    """
+    获取进程内共享的分类器，首次调用时用上架历史训练
+
+    Returns:
+        分类器实例
+    """
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            records = load_listing_history()
+            _classifier = CategoryClassifier().fit((r["title"], r["catId"]) for r in records)
+            logger.info(f"本地分类器已加载: {len(_classifier)} 条样本")
+        return _classifier
+
+
+def benchmark(records: List[Dict[str, Any]], thresholds: Iterable[float] = (0.3, 0.5, 0.6, 0.7, 0.8),
+              holdout: float = 0.2) -> Dict[str, Any]:
+    """
+    离线评估与远程推荐的一致率
+
+    按标题哈希把远程推荐得到的记录稳定地划分为训练集和测试集，
+    在训练集上训练，统计测试集在各置信度阈值下的覆盖率和一致率。
+
+    Args:
+        records: 上架历史记录
+        thresholds: 评估的置信度阈值
+        holdout: 测试集比例
+
+    Returns:
+        评估结果
+    """
+    remote = [r for r in records if r.get("source", "recommend") == "recommend"]
+    fingerprint = DataTransformer().title_fingerprint
+    train, test = [], []
+    for record in remote:
+        bucket = int(hash_key(fingerprint(record["title"]))[:8], 16) / 0xFFFFFFFF
+        (test if bucket < holdout else train).append(record)
+
+    classifier = CategoryClassifier().fit((r["title"], r["catId"]) for r in train)
+    predictions = []
+    start = time.perf_counter()
+    for record in test:
+        predictions.append((classifier.predict(record["title"]), record["catId"]))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "train": len(train),
+        "test": len(test),
+        "avg_predict_us": round(elapsed / len(test) * 1e6, 1) if test else 0.0,
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        covered = [(p, truth) for p, truth in predictions if p and p[1] >= threshold]
+        agreed = sum(1 for p, truth in covered if str(p[0]) == str(truth))
+        report["thresholds"].append({
+            "threshold": threshold,
+            "coverage": round(len(covered) / len(test), 4) if test else 0.0,
+            "agreement": round(agreed / len(covered), 4) if covered else 0.0,
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地分类器离线评估")
+    parser.add_argument("--history", type=str, help="上架历史记录文件（JSONL）")
+    parser.add_argument("--holdout", type=float, default=0.2, help="测试集比例")
+    args = parser.parse_args()
+
+    result = benchmark(load_listing_history(args.history), holdout=args.holdout)
+    print(f"训练样本 {result['train']} 条, 测试样本 {result['test']} 条, "
+          f"平均预测耗时 {result['avg_predict_us']} 微秒")
+    print(f"{'阈值':>6}{'覆盖率':>10}{'一致率':>10}")
+    for row in result["thresholds"]:
+        print(f"{row['threshold']:>8.2f}{row['coverage']:>12.2%}{row['agreement']:>12.2%}")
@@ -230,6 +230,20 @@ class DataTransformer:
         
         return cleaned
 
+    def title_fingerprint(self, title: str) -> str:
+        """
+        生成标题指纹：在标题清理规则的基础上忽略大小写、标点和空白差异，
+        用于识别几乎相同的重复上架标题
+
+        Args:
+            title: 商品标题
+
+        Returns:
+            str: 标题指纹，标题为空时返回空字符串
+        """
+        cleaned = self._clean_title(title).casefold()
+        return " ".join(re.sub(r'[\W_]+', ' ', cleaned).split())
+
     def _clean_description(self, description: str) -> str:
         """清理商品描述"""
         if not description:
@@ -0,0 +1,312 @@
+"""
+缓存工具模块
+
+提供缓存键生成、原子写文件和带TTL的持久化键值缓存等通用功能。
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .config import get_config
+
+
+# 默认端口在规范化时省略
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化URL，使同一资源的不同写法得到相同的缓存键
+
+    规则：协议和域名转小写、去掉默认端口、去掉片段(#...)、
+    查询参数按键排序、去掉路径末尾的斜杠。
+
+    Args:
+        url: 原始URL
+
+    Returns:
+        str: 规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def hash_key(*parts: Any) -> str:
+    """
+    由若干部分生成稳定的SHA-256缓存键
+
+    Args:
+        *parts: 组成缓存键的值，按顺序以 '|' 连接
+
+    Returns:
+        str: 64位十六进制摘要
+    """
+    raw = "|".join(str(p) for p in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def url_hash(url: str) -> str:
+    """
+    获取规范化URL的SHA-256摘要
+
+    Args:
+        url: 原始URL
+
+    Returns:
+        str: 64位十六进制摘要
+    """
+    return hash_key(normalize_url(url))
+
+
+def atomic_write_json(path: Union[str, Path], data: Any, indent: int = None):
+    """
+    原子写入JSON文件：先写同目录临时文件再替换，避免读到写了一半的文件
+
+    Args:
+        path: 目标文件路径
+        data: 可JSON序列化的数据
+        indent: JSON缩进
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class PersistentCache:
+    """
+    内存+单个JSON文件的键值缓存（线程安全）
+
+    条目按写入时间和TTL失效，超过条目上限时淘汰最久未访问的条目；
+    get_or_load 对同一个键的并发未命中只加载一次。写入先标记为未保存，
+    距上次保存不足 flush_interval 秒时延后合并保存，进程退出时保存剩余的修改。
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: int = 0, name: str = "cache",
+                 max_entries: int = 0, flush_interval: float = 0):
+        """
+        初始化缓存
+
+        Args:
+            path: 持久化文件路径
+            ttl: 条目有效期（秒），0表示永不过期
+            name: 缓存名称，用于日志
+            max_entries: 最多保留的条目数，0表示不限制
+            flush_interval: 两次保存之间的最短间隔（秒），0表示每次写入立即保存
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self.name = name
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # 键 -> [加载锁, 等待该锁的线程数]，加载结束且无人等待时删除
+        self._key_locks: Dict[str, list] = {}
+        # 按最近访问顺序排列（最旧的在前）
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty = False
+        self._last_save = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """从磁盘读取缓存并丢弃过期条目，文件损坏时从空缓存开始"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries") or {}
+        except Exception:
+            return
+        ordered = sorted(entries.items(), key=lambda item: item[1].get("accessed_at", item[1].get("cached_at", 0)))
+        self._entries = OrderedDict((key, entry) for key, entry in ordered if not self._expired(entry))
+        self._evict()
+
+    def _save(self):
+        """丢弃过期条目后将缓存写入磁盘（调用方需持有锁）"""
+        for key in [key for key, entry in self._entries.items() if self._expired(entry)]:
+            del self._entries[key]
+        atomic_write_json(self.path, {"entries": self._entries})
+        self._dirty = False
+        self._last_save = time.time()
+
+    def _mark_dirty(self):
+        """标记有未保存的修改，按 flush_interval 立即或延后保存（调用方需持有锁）"""
+        self._dirty = True
+        wait = self._last_save + self.flush_interval - time.time()
+        if wait <= 0:
+            self._save()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(wait, self._flush_later)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_later(self):
+        """延后保存的定时任务"""
+        with self._lock:
+            self._flush_timer = None
+            if self._dirty:
+                self._save()
+
+    def flush(self):
+        """立即保存未保存的修改"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._save()
+
+    def _evict(self):
+        """超过条目上限时淘汰最久未访问的条目（调用方需持有锁）"""
+        if not self.max_entries:
+            return
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        """条目是否已过期"""
+        return bool(self.ttl) and time.time() - entry.get("cached_at", 0) > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，未命中或已过期返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["accessed_at"] = time.time()
+            self._entries.move_to_end(key)
+            return entry.get("value")
+
+    def set(self, key: str, value: Any):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的值
+        """
+        with self._lock:
+            now = time.time()
+            self._entries[key] = {"cached_at": now, "accessed_at": now, "value": value}
+            self._entries.move_to_end(key)
+            self._evict()
+            self._mark_dirty()
+
+    def invalidate(self, key: str):
+        """
+        删除一个条目
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._mark_dirty()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._mark_dirty()
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[Any]], refresh: bool = False) -> Optional[Any]:
+        """
+        读取缓存，未命中时调用loader加载并写入
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，返回None表示加载失败（不写入缓存）
+            refresh: 是否忽略已有条目强制重新加载
+
+        Returns:
+            缓存值或加载结果
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        try:
+            with key_lock[0]:
+                if not refresh:
+                    value = self.get(key)
+                    if value is not None:
+                        return value
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_named_caches: Dict[str, PersistentCache] = {}
+_named_caches_lock = threading.Lock()
+
+
+def get_named_cache(name: str, ttl: int) -> PersistentCache:
+    """
+    获取进程内共享的持久化缓存（同名只创建一次，文件为 CACHE_DIR/<name>.json）
+
+    Args:
+        name: 缓存名称
+        ttl: 条目有效期（秒），仅在首次创建时生效
+
+    Returns:
+        缓存实例
+    """
+    with _named_caches_lock:
+        cache = _named_caches.get(name)
+        if cache is None:
+            config = get_config()
+            cache = PersistentCache(
+                Path(config.cache_dir) / f"{name}.json",
+                ttl=ttl,
+                name=name,
+                max_entries=config.persistent_cache_max_entries,
+                flush_interval=config.persistent_cache_flush_interval
+            )
+            _named_caches[name] = cache
+        return cache
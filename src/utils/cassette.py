@@ -0,0 +1,230 @@
+"""
+外部调用录制/回放模块
+
+record 模式下把 Firecrawl、百度OCR 和 Temu API 的每次请求与响应追加到一个
+gzip压缩的JSONL磁带文件；replay 模式下按请求键依次返回录制的响应（可按录制时的
+耗时模拟延迟），不再访问外部服务，用于离线复现整批商品的处理过程并分析CPU热点。
+
+通过环境变量启用:
+    CASSETTE_MODE=record|replay   CASSETTE_PATH=cache/cassette.jsonl.gz   CASSETTE_LATENCY=1.0
+"""
+
+import atexit
+import gzip
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from . import exceptions
+from .cache import hash_key
+from .config import get_config
+from .logger import get_logger
+
+logger = get_logger("cassette")
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(exceptions.NetworkException):
+    """回放时找不到对应的录制"""
+    pass
+
+
+def request_key(service: str, request: Any) -> str:
+    """
+    生成请求键
+
+    Args:
+        service: 服务名称
+        request: 可JSON序列化的请求描述（不含时间戳、签名等易变字段）
+
+    Returns:
+        请求键
+    """
+    return hash_key(f"{service}|{json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)}")
+
+
+class Cassette:
+    """录制/回放磁带（线程安全）"""
+
+    def __init__(self, path: Optional[str] = None, mode: Optional[str] = None, latency: Optional[float] = None):
+        """
+        初始化磁带
+
+        Args:
+            path: 磁带文件路径，默认为 {CACHE_DIR}/cassette.jsonl.gz
+            mode: off=直接调用，record=调用并录制，replay=只从磁带回放
+            latency: 回放时的延迟倍数，0表示不模拟延迟，1表示按录制耗时等待
+        """
+        config = get_config()
+        self.path = Path(path or config.cassette_path)
+        self.mode = (mode or config.cassette_mode).lower()
+        if self.mode not in MODES:
+            raise ValueError(f"无效的磁带模式: {self.mode}，可选: {', '.join(MODES)}")
+        self.latency = config.cassette_latency if latency is None else latency
+
+        self._lock = threading.Lock()
+        self._writer = None
+        self._by_key: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._by_name: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        if self.mode == "replay":
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _load(self):
+        """读取磁带，文件末尾不完整时保留已读出的记录"""
+        count = 0
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._by_key[entry["key"]].append(entry)
+                    self._by_name[f"{entry['service']}:{entry['name']}"].append(entry)
+                    count += 1
+        except FileNotFoundError:
+            logger.warning(f"磁带文件不存在: {self.path}")
+        except (EOFError, OSError, zlib.error) as e:
+            logger.warning(f"磁带文件末尾不完整，已读取 {count} 条: {e}")
+        logger.info(f"加载磁带: {count} 条录制 ({self.path})")
+
+    def _write(self, entry: Dict[str, Any]):
+        """追加一条录制（调用方需持有锁）"""
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = gzip.open(self.path, "at", encoding="utf-8")
+            atexit.register(self.close)
+        self._writer.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._writer.flush()
+        self.recorded += 1
+
+    def _next(self, service: str, name: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        取出下一条录制：优先按请求键的录制顺序；同一请求被调用的次数多于录制次数时
+        重复最后一条；请求键从未录制过（如含时间戳的参数）时按同一服务同名调用的录制顺序
+        """
+        with self._lock:
+            entry = self._pop(self._by_key.get(key))
+            if entry is None:
+                entry = self._last.get(key) or self._pop(self._by_name.get(f"{service}:{name}"))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._last[key] = entry
+            self.hits += 1
+            return entry
+
+    @staticmethod
+    def _pop(queue: Optional[Deque[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """取出队列中第一条未使用的录制（调用方需持有锁）"""
+        while queue:
+            entry = queue.popleft()
+            if not entry.get("used"):
+                entry["used"] = True
+                return entry
+        return None
+
+    def call(self, service: str, name: str, request: Any, func: Callable[[], Any],
+             encode: Optional[Callable[[Any], Any]] = None,
+             decode: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        经过磁带执行一次外部调用
+
+        Args:
+            service: 服务名称，如 firecrawl、baidu_ocr、temu
+            name: 调用名称，如 Temu 端点名
+            request: 可JSON序列化的请求描述，用于匹配录制
+            func: 实际发起调用的函数
+            encode: 把响应转换为可JSON序列化对象的函数
+            decode: 把录制的响应还原为调用方所需对象的函数
+
+        Returns:
+            调用结果
+
+        Raises:
+            CassetteMissError: 回放时没有对应的录制
+        """
+        if self.mode == "off":
+            return func()
+
+        key = request_key(service, request)
+        if self.mode == "replay":
+            entry = self._next(service, name, key)
+            if entry is None:
+                raise CassetteMissError(f"磁带中没有对应的录制: {service}.{name}")
+            if self.latency:
+                time.sleep(entry.get("elapsed", 0) * self.latency)
+            if "error" in entry:
+                error_class = getattr(exceptions, entry.get("error_type", ""), None)
+                if not (isinstance(error_class, type) and issubclass(error_class, exceptions.AutoTemuException)):
+                    error_class = exceptions.NetworkException
+                raise error_class(entry["error"])
+            response = entry.get("response")
+            return decode(response) if decode else response
+
+        start = time.perf_counter()
+        entry = {"service": service, "name": name, "key": key}
+        try:
+            result = func()
+        except Exception as e:
+            entry.update({"elapsed": round(time.perf_counter() - start, 4),
+                          "error": str(e), "error_type": type(e).__name__})
+            with self._lock:
+                self._write(entry)
+            raise
+        entry.update({"elapsed": round(time.perf_counter() - start, 4),
+                      "response": encode(result) if encode else result})
+        with self._lock:
+            self._write(entry)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取录制/回放统计
+
+        Returns:
+            {"mode": 模式, "recorded": N, "hits": N, "misses": N}
+        """
+        with self._lock:
+            return {"mode": self.mode, "recorded": self.recorded, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """关闭磁带文件"""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """
+    获取进程内共享的磁带
+
+    Returns:
+        磁带实例
+    """
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+            if _cassette.enabled:
+                logger.info(f"外部调用{'录制' if _cassette.mode == 'record' else '回放'}已启用: {_cassette.path}")
+        return _cassette
@@ -0,0 +1,211 @@
+"""
+熔断器模块
+
+为每个外部服务（百度OCR、Temu API、图片下载主机）维护共享的失败状态：
+滑动窗口内失败率达到阈值后熔断，熔断期间调用被快速拒绝；熔断时间结束后进入半开状态，
+放行一次试探调用，成功则恢复，失败则重新熔断。状态变化记录日志并计入统计。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+from .config import get_config
+from .exceptions import CircuitOpenException
+from .logger import get_logger
+
+logger = get_logger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """基于失败率的熔断器（线程安全）"""
+
+    def __init__(self, name: str, failure_threshold: Optional[float] = None, min_calls: Optional[int] = None,
+                 window: Optional[int] = None, open_seconds: Optional[float] = None,
+                 ignore: Tuple[Type[BaseException], ...] = ()):
+        """
+        初始化熔断器
+
+        Args:
+            name: 服务名称
+            failure_threshold: 熔断的失败率阈值（0-1）
+            min_calls: 窗口内至少有多少次调用才判断失败率
+            window: 统计失败率的最近调用次数
+            open_seconds: 熔断持续秒数，之后进入半开状态
+            ignore: 不计为失败的异常类型（如限流）
+        """
+        config = get_config()
+        self.name = name
+        self.failure_threshold = config.circuit_failure_threshold if failure_threshold is None else failure_threshold
+        self.min_calls = config.circuit_min_calls if min_calls is None else min_calls
+        self.open_seconds = config.circuit_open_seconds if open_seconds is None else open_seconds
+        self.ignore = ignore
+
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=config.circuit_window if window is None else window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._counts = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._transitions: List[Dict[str, Any]] = []
+
+    @property
+    def state(self) -> str:
+        """当前状态，熔断时间已过时视为半开"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def _transition(self, state: str, reason: str):
+        """切换状态并记录（调用方需持有锁）"""
+        previous, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._counts["opened"] += 1
+        if state == CLOSED:
+            self._outcomes.clear()
+        self._transitions.append({"from": previous, "to": state, "reason": reason, "ts": time.time()})
+        message = f"熔断器 {self.name}: {previous} -> {state}（{reason}）"
+        if state == OPEN:
+            logger.warning(message)
+        else:
+            logger.info(message)
+
+    def allow(self) -> bool:
+        """
+        判断是否放行一次调用；半开状态下只放行一次试探调用
+
+        Returns:
+            是否放行
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._counts["rejected"] += 1
+                    return False
+                self._transition(HALF_OPEN, f"熔断 {self.open_seconds:g} 秒后试探")
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    self._counts["rejected"] += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            self._counts["calls"] += 1
+            if self._state == HALF_OPEN:
+                self._probing = False
+                self._transition(CLOSED, "试探调用成功")
+                return
+            self._outcomes.append(True)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """
+        记录一次失败调用
+
+        Args:
+            error: 失败原因
+        """
+        with self._lock:
+            self._counts["calls"] += 1
+            self._counts["failures"] += 1
+            if self._state == HALF_OPEN:
+                self._probing = False
+                self._transition(OPEN, f"试探调用失败: {error}")
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_threshold:
+                self._transition(OPEN, f"最近 {len(self._outcomes)} 次调用失败 {failures} 次")
+
+    def retry_after(self) -> float:
+        """距离下一次试探的秒数"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        经过熔断器执行调用
+
+        Args:
+            func: 被保护的调用
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            调用结果
+
+        Raises:
+            CircuitOpenException: 熔断期间调用被拒绝
+        """
+        if not self.allow():
+            raise CircuitOpenException(f"{self.name} 已熔断，快速失败", service=self.name,
+                                       retry_after=round(self.retry_after(), 1))
+        try:
+            result = func(*args, **kwargs)
+        except self.ignore:
+            self.record_success()
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取熔断统计
+
+        Returns:
+            {"state": 状态, "calls": N, "failures": N, "rejected": N, "opened": N, "transitions": [...]}
+        """
+        state = self.state
+        with self._lock:
+            return {"state": state, **self._counts, "transitions": list(self._transitions)}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    获取进程内共享的熔断器，首次获取时按参数创建
+
+    Args:
+        name: 服务名称
+        **kwargs: CircuitBreaker 的初始化参数
+
+    Returns:
+        熔断器实例
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有熔断器的统计
+
+    Returns:
+        {服务名称: 统计}
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
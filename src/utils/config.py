@@ -57,6 +57,66 @@ class Config:
         self.retry_initial_delay = float(os.getenv("RETRY_INITIAL_DELAY", "1.0"))
         self.retry_max_delay = float(os.getenv("RETRY_MAX_DELAY", "60.0"))
         
+        # 缓存配置
+        self.cache_dir = os.getenv("CACHE_DIR", "./cache")
+        self.scrape_cache_ttl = int(os.getenv("SCRAPE_CACHE_TTL", str(7 * 24 * 3600)))
+        self.scrape_cache_max_entries = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+        self.category_index_ttl = int(os.getenv("CATEGORY_INDEX_TTL", str(7 * 24 * 3600)))
+        self.template_cache_ttl = int(os.getenv("TEMPLATE_CACHE_TTL", str(24 * 3600)))
+        self.spec_id_cache_ttl = int(os.getenv("SPEC_ID_CACHE_TTL", str(30 * 24 * 3600)))
+        self.recommendation_cache_ttl = int(os.getenv("RECOMMENDATION_CACHE_TTL", str(30 * 24 * 3600)))
+        self.listing_history_path = os.getenv("LISTING_HISTORY_PATH", str(Path(self.cache_dir) / "listing_history.jsonl"))
+        self.upload_cache_ttl = int(os.getenv("UPLOAD_CACHE_TTL", str(7 * 24 * 3600)))
+        self.head_cache_ttl = int(os.getenv("HEAD_CACHE_TTL", "3600"))
+        # 模板/规格ID/推荐/上传/HEAD缓存的条目上限（0表示不限制），以及这些缓存和分类索引两次写盘的最短间隔（秒）
+        self.persistent_cache_max_entries = int(os.getenv("PERSISTENT_CACHE_MAX_ENTRIES", "10000"))
+        self.persistent_cache_flush_interval = float(os.getenv("PERSISTENT_CACHE_FLUSH_INTERVAL", "5"))
+        
+        # 商品添加工作流的并发步骤数
+        self.workflow_max_workers = int(os.getenv("WORKFLOW_MAX_WORKERS", "4"))
+        
+        # 分类推荐：规格ID未命中时的并发请求数，本地分类器置信度阈值（大于1表示禁用）
+        self.spec_id_max_workers = int(os.getenv("SPEC_ID_MAX_WORKERS", "4"))
+        self.category_classifier_threshold = float(os.getenv("CATEGORY_CLASSIFIER_THRESHOLD", "0.6"))
+        
+        # 商品图片上传、候选图片校验和上传后就绪轮询
+        self.image_upload_concurrency = int(os.getenv("IMAGE_UPLOAD_CONCURRENCY", "5"))
+        self.image_validation_concurrency = int(os.getenv("IMAGE_VALIDATION_CONCURRENCY", "8"))
+        self.image_validation_target = int(os.getenv("IMAGE_VALIDATION_TARGET", "10"))
+        self.image_ready_timeout = float(os.getenv("IMAGE_READY_TIMEOUT", "10"))
+        self.image_ready_poll_interval = float(os.getenv("IMAGE_READY_POLL_INTERVAL", "0.5"))
+        
+        # 图片处理并发配置：下载线程数和OCR线程数（OCR受百度QPS限制）
+        self.image_download_workers = int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "6"))
+        self.ocr_workers = int(os.getenv("OCR_WORKERS", "2"))
+        # 图片下载/OCR记录在批处理中累积多少条后提交一次
+        self.image_records_batch_size = int(os.getenv("IMAGE_RECORDS_BATCH_SIZE", "50"))
+        # 图片目录字节配额（0表示不限制），以及最近多少秒内使用过的图片不回收
+        self.image_cache_quota_bytes = int(os.getenv("IMAGE_CACHE_QUOTA_BYTES", str(5 * 1024 ** 3)))
+        self.image_cache_min_age = float(os.getenv("IMAGE_CACHE_MIN_AGE", "3600"))
+        
+        # HTTP连接池配置
+        self.http_pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))
+        self.http_pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+        self.http_timeout = float(os.getenv("HTTP_TIMEOUT", "30"))
+        
+        # Temu API限流配置（每秒请求数，0表示不限流）
+        self.temu_rate_limit = float(os.getenv("TEMU_RATE_LIMIT", "5"))
+        self.temu_rate_burst = float(os.getenv("TEMU_RATE_BURST", "5"))
+        self.temu_rate_limits = self._parse_rate_limits(os.getenv("TEMU_RATE_LIMITS", ""))
+        self.temu_rate_limit_retries = int(os.getenv("TEMU_RATE_LIMIT_RETRIES", "3"))
+        
+        # 外部服务熔断配置：滑动窗口内失败率达到阈值后打开，打开若干秒后半开试探
+        self.circuit_failure_threshold = float(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "0.5"))
+        self.circuit_min_calls = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+        self.circuit_window = int(os.getenv("CIRCUIT_WINDOW", "20"))
+        self.circuit_open_seconds = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+        
+        # 外部调用录制/回放配置（off/record/replay）
+        self.cassette_mode = os.getenv("CASSETTE_MODE", "off")
+        self.cassette_path = os.getenv("CASSETTE_PATH", str(Path(self.cache_dir) / "cassette.jsonl.gz"))
+        self.cassette_latency = float(os.getenv("CASSETTE_LATENCY", "0"))
+        
         # 创建必要的目录
         self._ensure_directories()
     
@@ -81,6 +141,27 @@ class Config:
             )
         return value
     
+    def _parse_rate_limits(self, value: str) -> dict:
+        """
+        解析按端点的限流配置
+        
+        Args:
+            value: 形如 "image_upload=2,goods_add=1" 的字符串
+            
+        Returns:
+            端点 -> 每秒请求数
+        """
+        rates = {}
+        for item in value.split(","):
+            if "=" not in item:
+                continue
+            endpoint, rate = item.split("=", 1)
+            try:
+                rates[endpoint.strip()] = float(rate)
+            except ValueError:
+                continue
+        return rates
+    
     def _ensure_directories(self):
         """确保必要的目录存在"""
         # 创建图片保存目录
@@ -116,6 +197,32 @@ class Config:
                 f"初始延迟：{self.retry_initial_delay}"
             )
         
+        # 检查并发数：至少为1
+        for name in ("workflow_max_workers", "spec_id_max_workers", "image_upload_concurrency",
+                     "image_validation_concurrency", "image_validation_target", "image_download_workers",
+                     "ocr_workers", "image_records_batch_size", "circuit_min_calls", "circuit_window"):
+            if getattr(self, name) < 1:
+                raise ConfigError(f"{name.upper()} 必须大于等于1，当前值：{getattr(self, name)}")
+        
+        # 检查时长、速率和配额：不能为负数
+        for name in ("image_ready_timeout", "temu_rate_limit", "temu_rate_burst", "temu_rate_limit_retries",
+                     "circuit_open_seconds", "cassette_latency", "image_cache_quota_bytes", "image_cache_min_age",
+                     "persistent_cache_max_entries", "persistent_cache_flush_interval"):
+            if getattr(self, name) < 0:
+                raise ConfigError(f"{name.upper()} 不能为负数，当前值：{getattr(self, name)}")
+        
+        if self.image_ready_poll_interval <= 0:
+            raise ConfigError(f"IMAGE_READY_POLL_INTERVAL 必须大于0，当前值：{self.image_ready_poll_interval}")
+        
+        if self.category_classifier_threshold < 0:
+            raise ConfigError(f"CATEGORY_CLASSIFIER_THRESHOLD 不能为负数，当前值：{self.category_classifier_threshold}")
+        
+        if not 0 < self.circuit_failure_threshold <= 1:
+            raise ConfigError(f"CIRCUIT_FAILURE_THRESHOLD 必须在(0, 1]之间，当前值：{self.circuit_failure_threshold}")
+        
+        if self.cassette_mode not in ("off", "record", "replay"):
+            raise ConfigError(f"CASSETTE_MODE 必须是 off/record/replay，当前值：{self.cassette_mode}")
+        
         return True
     
     def __str__(self) -> str:
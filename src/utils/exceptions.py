@@ -190,6 +190,21 @@ class RetryException(AutoTemuException):
             self.details["max_attempts"] = max_attempts
 
 
+# 熔断相关异常
+
+class CircuitOpenException(AutoTemuException):
+    """熔断器打开，调用被快速拒绝（不应重试）"""
+    
+    def __init__(self, message: str, service: str = None, retry_after: float = None, **kwargs):
+        super().__init__(message, error_code="CIRCUIT_OPEN", **kwargs)
+        self.service = service
+        self.retry_after = retry_after
+        if service:
+            self.details["service"] = service
+        if retry_after is not None:
+            self.details["retry_after"] = retry_after
+
+
 # 用于判断是否应该重试的异常类型
 RETRYABLE_EXCEPTIONS = (
     NetworkException,
@@ -0,0 +1,134 @@
+"""
+HTTP客户端模块
+
+提供进程内共享的、线程安全的HTTP会话：按主机维护keep-alive连接池，
+统一默认超时，并统计请求数与连接复用情况。
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import get_config
+from .logger import get_logger
+
+logger = get_logger("http_client")
+
+
+class HttpClient:
+    """共享连接池的HTTP客户端"""
+
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            pool_connections: 缓存连接池的主机数
+            pool_maxsize: 每个主机的最大连接数
+            timeout: 默认超时（秒），调用时可单独指定
+        """
+        config = get_config()
+        self.pool_connections = config.http_pool_connections if pool_connections is None else pool_connections
+        self.pool_maxsize = config.http_pool_maxsize if pool_maxsize is None else pool_maxsize
+        self.timeout = config.http_timeout if timeout is None else timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+
+    def _count(self, url: str, success: bool):
+        """记录按主机统计的请求数"""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            self._requests[host] += 1
+            if not success:
+                self._errors[host] += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """发送GET请求"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self._send(self.session.get, url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """发送HEAD请求"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self._send(self.session.head, url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """发送POST请求"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self._send(self.session.post, url, **kwargs)
+
+    def _send(self, method, url: str, **kwargs) -> requests.Response:
+        """发送请求并计数"""
+        try:
+            response = method(url, **kwargs)
+        except Exception:
+            self._count(url, False)
+            raise
+        self._count(url, True)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取连接复用统计
+
+        Returns:
+            {"requests": N, "errors": N, "connections": N, "reused": N, "hosts": {host: {...}}}
+        """
+        hosts: Dict[str, Dict[str, int]] = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats = hosts.setdefault(pool.host, {"requests": 0, "errors": 0, "connections": 0, "reused": 0})
+            stats["connections"] += pool.num_connections
+            stats["reused"] += max(0, pool.num_requests - pool.num_connections)
+
+        with self._lock:
+            for host, count in self._requests.items():
+                stats = hosts.setdefault(host, {"requests": 0, "errors": 0, "connections": 0, "reused": 0})
+                stats["requests"] = count
+                stats["errors"] = self._errors.get(host, 0)
+
+        return {
+            "requests": sum(s["requests"] for s in hosts.values()),
+            "errors": sum(s["errors"] for s in hosts.values()),
+            "connections": sum(s["connections"] for s in hosts.values()),
+            "reused": sum(s["reused"] for s in hosts.values()),
+            "hosts": hosts,
+        }
+
+    def close(self):
+        """关闭会话和所有连接"""
+        self.session.close()
+
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    获取进程内共享的HTTP客户端
+
+    Returns:
+        HTTP客户端实例
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
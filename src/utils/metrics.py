@@ -0,0 +1,196 @@
+"""
+耗时统计模块
+
+记录单个商品各步骤的耗时和各API端点的调用次数/延迟，
+并将批量运行的记录汇总为 p50/p95/max 报告。
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+
+class WorkflowMetrics:
+    """单个商品添加流程的耗时记录（线程安全）"""
+
+    def __init__(self, url: str = ""):
+        """
+        初始化耗时记录
+
+        Args:
+            url: 商品URL
+        """
+        self.url = url
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.steps: Dict[str, float] = {}
+        self.api_calls: Dict[str, Dict[str, Any]] = {}
+
+    def record_step(self, name: str, seconds: float):
+        """
+        记录步骤耗时
+
+        Args:
+            name: 步骤名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            self.steps[name] = round(seconds, 4)
+
+    def record_api_call(self, endpoint: str, seconds: float, success: bool = True):
+        """
+        记录一次API调用
+
+        Args:
+            endpoint: API端点名称
+            seconds: 耗时（秒）
+            success: 是否成功
+        """
+        with self._lock:
+            stats = self._api_stats(endpoint)
+            stats["count"] += 1
+            if not success:
+                stats["errors"] += 1
+            stats["latencies"].append(round(seconds, 4))
+
+    def record_rate_wait(self, endpoint: str, seconds: float):
+        """
+        记录一次调用前的限流排队时间
+
+        Args:
+            endpoint: API端点名称
+            seconds: 排队时间（秒）
+        """
+        with self._lock:
+            self._api_stats(endpoint)["waits"].append(round(seconds, 4))
+
+    def _api_stats(self, endpoint: str) -> Dict[str, Any]:
+        """获取端点的统计记录（调用方需持有锁）"""
+        return self.api_calls.setdefault(endpoint, {"count": 0, "errors": 0, "latencies": [], "waits": []})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        with self._lock:
+            return {
+                "url": self.url,
+                "started_at": self.started_at,
+                "total": round(time.perf_counter() - self._start, 4),
+                "steps": dict(self.steps),
+                "api_calls": {
+                    endpoint: {
+                        "count": stats["count"],
+                        "errors": stats["errors"],
+                        "latencies": list(stats["latencies"]),
+                        "waits": list(stats["waits"]),
+                    }
+                    for endpoint, stats in self.api_calls.items()
+                },
+            }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    计算百分位数（线性插值）
+
+    Args:
+        values: 数值列表
+        pct: 百分位（0-100）
+
+    Returns:
+        百分位数，列表为空时返回0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    """计算count/p50/p95/max"""
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+
+def aggregate_timings(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总多个商品的耗时记录
+
+    Args:
+        records: WorkflowMetrics.to_dict() 的结果列表
+
+    Returns:
+        {"products": N, "total": {...}, "steps": {name: {...}}, "api_calls": {endpoint: {...}}}
+    """
+    records = [r for r in records if r]
+    totals: List[float] = []
+    steps: Dict[str, List[float]] = {}
+    api_latencies: Dict[str, List[float]] = {}
+    api_errors: Dict[str, int] = {}
+    api_counts: Dict[str, List[int]] = {}
+    api_waits: Dict[str, List[float]] = {}
+
+    for record in records:
+        totals.append(record.get("total", 0.0))
+        for name, seconds in (record.get("steps") or {}).items():
+            steps.setdefault(name, []).append(seconds)
+        for endpoint, stats in (record.get("api_calls") or {}).items():
+            api_latencies.setdefault(endpoint, []).extend(stats.get("latencies") or [])
+            api_errors[endpoint] = api_errors.get(endpoint, 0) + stats.get("errors", 0)
+            api_counts.setdefault(endpoint, []).append(stats.get("count", 0))
+            api_waits.setdefault(endpoint, []).extend(stats.get("waits") or [])
+
+    api_report = {}
+    for endpoint, latencies in api_latencies.items():
+        summary = _summary(latencies)
+        summary["errors"] = api_errors.get(endpoint, 0)
+        summary["calls_per_product"] = round(sum(api_counts[endpoint]) / len(records), 2)
+        waits = api_waits.get(endpoint) or []
+        summary["wait_p95"] = round(percentile(waits, 95), 4)
+        summary["wait_total"] = round(sum(waits), 4)
+        api_report[endpoint] = summary
+
+    return {
+        "products": len(records),
+        "total": _summary(totals),
+        "steps": {name: _summary(values) for name, values in steps.items()},
+        "api_calls": api_report,
+    }
+
+
+def format_timing_report(report: Dict[str, Any]) -> str:
+    """
+    将汇总报告格式化为文本表格
+
+    Args:
+        report: aggregate_timings() 的结果
+
+    Returns:
+        多行文本
+    """
+    lines = [f"耗时报告（商品数 {report.get('products', 0)}，单位: 秒）"]
+    header = f"{'阶段':<24}{'次数':>8}{'p50':>10}{'p95':>10}{'max':>10}"
+
+    def row(name: str, s: Dict[str, Any]) -> str:
+        return f"{name:<24}{s['count']:>8}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['max']:>10.3f}"
+
+    lines.append(header)
+    lines.append(row("总计", report["total"]))
+    for name, summary in report.get("steps", {}).items():
+        lines.append(row(name, summary))
+
+    if report.get("api_calls"):
+        lines.append("")
+        lines.append(f"{'API端点':<24}{'调用数':>8}{'p50':>10}{'p95':>10}{'max':>10}{'失败':>8}{'次/商品':>10}{'排队p95':>10}")
+        for endpoint, summary in sorted(report["api_calls"].items()):
+            lines.append(row(endpoint, summary) + f"{summary['errors']:>8}{summary['calls_per_product']:>10.2f}"
+                         f"{summary.get('wait_p95', 0.0):>10.3f}")
+
+    return "\n".join(lines)
@@ -0,0 +1,198 @@
+"""
+限流模块
+
+为Temu API的每个端点维护独立的令牌桶，进程内所有工作线程共享；
+收到限流响应时按 retry_after 暂停对应端点，并统计排队等待时间。
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import get_config
+from .logger import get_logger
+
+logger = get_logger("rate_limiter")
+
+# 限流响应的错误信息关键字
+_RATE_LIMIT_KEYWORDS = ("rate limit", "too many", "frequency", "频繁", "限流", "频率")
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，0表示不限流
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌，不足时阻塞等待
+
+        Returns:
+            等待的秒数
+        """
+        if self.rate <= 0 and not self._paused_until:
+            return 0.0
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self.rate <= 0:
+                    return now - start if waited else 0.0
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - start if waited else 0.0
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited = True
+
+    def pause(self, seconds: float):
+        """
+        暂停发放令牌并清空桶
+
+        Args:
+            seconds: 暂停秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class RateLimiter:
+    """按端点划分令牌桶的限流器"""
+
+    def __init__(self, default_rate: Optional[float] = None, default_burst: Optional[float] = None,
+                 rates: Optional[Dict[str, float]] = None):
+        """
+        初始化限流器
+
+        Args:
+            default_rate: 未单独配置的端点每秒允许的请求数，0表示不限流
+            default_burst: 每个端点的桶容量
+            rates: 端点 -> 每秒请求数
+        """
+        config = get_config()
+        self.default_rate = config.temu_rate_limit if default_rate is None else default_rate
+        self.default_burst = config.temu_rate_burst if default_burst is None else default_burst
+        self.rates = dict(config.temu_rate_limits if rates is None else rates)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        """获取端点的令牌桶"""
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                rate = self.rates.get(endpoint, self.default_rate)
+                bucket = TokenBucket(rate, self.default_burst)
+                self._buckets[endpoint] = bucket
+                self._stats[endpoint] = {"acquired": 0, "waited": 0.0, "max_wait": 0.0, "rate_limited": 0}
+            return bucket
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        为一次调用获取令牌
+
+        Args:
+            endpoint: API端点名称
+
+        Returns:
+            排队等待的秒数
+        """
+        waited = self._bucket(endpoint).acquire()
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats["acquired"] += 1
+            stats["waited"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+        if waited > 1:
+            logger.info(f"限流等待: {endpoint} {waited:.2f} 秒")
+        return waited
+
+    def report_rate_limited(self, endpoint: str, retry_after: Optional[float] = None):
+        """
+        报告端点被限流，按 retry_after 暂停该端点
+
+        Args:
+            endpoint: API端点名称
+            retry_after: 服务端建议的等待秒数，未提供时按1秒
+        """
+        seconds = float(retry_after) if retry_after else 1.0
+        self._bucket(endpoint).pause(seconds)
+        with self._lock:
+            self._stats[endpoint]["rate_limited"] += 1
+        logger.warning(f"端点被限流: {endpoint}，暂停 {seconds:.1f} 秒")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各端点的排队统计
+
+        Returns:
+            {endpoint: {"acquired": N, "waited": 秒, "max_wait": 秒, "rate_limited": N}}
+        """
+        with self._lock:
+            return {
+                endpoint: {**stats, "waited": round(stats["waited"], 4), "max_wait": round(stats["max_wait"], 4)}
+                for endpoint, stats in self._stats.items()
+            }
+
+
+def is_rate_limited_response(response: Any) -> bool:
+    """
+    判断API响应是否为限流错误
+
+    Args:
+        response: API响应
+
+    Returns:
+        是否被限流
+    """
+    if not isinstance(response, dict) or response.get("success"):
+        return False
+    if str(response.get("errorCode")) == "429":
+        return True
+    message = str(response.get("errorMsg") or "").lower()
+    return any(keyword in message for keyword in _RATE_LIMIT_KEYWORDS)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    获取进程内共享的限流器
+
+    Returns:
+        限流器实例
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
@@ -0,0 +1,27 @@
+"""
+测试共用的fixture
+"""
+
+import pytest
+
+from src.core.pipeline_options import PipelineOptions
+from src.core.product_manager import ProductManager
+from src.utils.metrics import WorkflowMetrics
+
+
+@pytest.fixture
+def make_manager():
+    """
+    构造只包含指定状态的商品管理器（不执行__init__，不连接外部服务）
+
+    默认设置 options 和 metrics，其余属性通过关键字参数指定，例如
+    make_manager(temu_client=client, options=PipelineOptions(refresh_uploads=True))
+    """
+    def factory(**attrs):
+        manager = ProductManager.__new__(ProductManager)
+        manager.options = PipelineOptions()
+        manager.metrics = WorkflowMetrics()
+        for name, value in attrs.items():
+            setattr(manager, name, value)
+        return manager
+    return factory
@@ -0,0 +1,114 @@
+"""
+外部调用录制/回放测试
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.cassette import Cassette, CassetteMissError
+from src.utils.exceptions import RateLimitException
+
+
+class TestCassette:
+    """录制/回放磁带测试"""
+
+    def test_off_mode_passes_through(self, tmp_path):
+        """测试关闭时直接调用且不写文件"""
+        path = tmp_path / "cassette.jsonl.gz"
+        cassette = Cassette(path=str(path), mode="off")
+
+        assert cassette.call("temu", "cats_get", {"parentCatId": 0}, lambda: {"success": True}) == {"success": True}
+        assert not path.exists()
+
+    def test_record_then_replay(self, tmp_path):
+        """测试录制后按请求回放，不再调用外部服务"""
+        path = str(tmp_path / "cassette.jsonl.gz")
+        recorder = Cassette(path=path, mode="record")
+        recorder.call("temu", "cats_get", {"parentCatId": 0}, lambda: {"result": "root"})
+        recorder.call("temu", "cats_get", {"parentCatId": 1}, lambda: {"result": "child"})
+        recorder.close()
+
+        player = Cassette(path=path, mode="replay")
+        func = MagicMock()
+
+        assert player.call("temu", "cats_get", {"parentCatId": 1}, func) == {"result": "child"}
+        assert player.call("temu", "cats_get", {"parentCatId": 0}, func) == {"result": "root"}
+        # 调用次数多于录制次数时重复最后一条
+        assert player.call("temu", "cats_get", {"parentCatId": 0}, func) == {"result": "root"}
+        func.assert_not_called()
+        assert player.stats()["hits"] == 3
+
+    def test_replay_falls_back_to_call_order(self, tmp_path):
+        """测试请求参数含易变字段时按同名调用的录制顺序回放"""
+        path = str(tmp_path / "cassette.jsonl.gz")
+        recorder = Cassette(path=path, mode="record")
+        recorder.call("temu", "goods_add", {"outGoodsSn": "goods_1"}, lambda: {"goodsId": 1})
+        recorder.call("temu", "goods_add", {"outGoodsSn": "goods_2"}, lambda: {"goodsId": 2})
+        recorder.close()
+
+        player = Cassette(path=path, mode="replay")
+
+        assert player.call("temu", "goods_add", {"outGoodsSn": "goods_9"}, MagicMock()) == {"goodsId": 1}
+        assert player.call("temu", "goods_add", {"outGoodsSn": "goods_10"}, MagicMock()) == {"goodsId": 2}
+
+    def test_replay_miss(self, tmp_path):
+        """测试磁带中没有录制时报错"""
+        player = Cassette(path=str(tmp_path / "missing.jsonl.gz"), mode="replay")
+
+        with pytest.raises(CassetteMissError):
+            player.call("baidu_ocr", "webimage", {"image": "abc"}, MagicMock())
+        assert player.stats()["misses"] == 1
+
+    def test_errors_are_replayed(self, tmp_path):
+        """测试录制的异常在回放时重新抛出"""
+        path = str(tmp_path / "cassette.jsonl.gz")
+        recorder = Cassette(path=path, mode="record")
+
+        def fail():
+            raise RateLimitException("too many requests")
+
+        with pytest.raises(RateLimitException):
+            recorder.call("temu", "image_upload", {"fileUrl": "a"}, fail)
+        recorder.close()
+
+        with pytest.raises(RateLimitException):
+            Cassette(path=path, mode="replay").call("temu", "image_upload", {"fileUrl": "a"}, MagicMock())
+
+    def test_encode_decode_and_latency(self, tmp_path):
+        """测试响应编解码和按录制耗时模拟延迟"""
+        path = str(tmp_path / "cassette.jsonl.gz")
+        recorder = Cassette(path=path, mode="record")
+
+        def slow():
+            time.sleep(0.05)
+            return {1, 2}
+
+        recorder.call("firecrawl", "scrape", {"url": "u"}, slow, encode=sorted)
+        recorder.close()
+
+        player = Cassette(path=path, mode="replay", latency=1.0)
+        start = time.perf_counter()
+        result = player.call("firecrawl", "scrape", {"url": "u"}, MagicMock(), decode=set)
+
+        assert result == {1, 2}
+        assert time.perf_counter() - start >= 0.04
+
+    def test_truncated_cassette(self, tmp_path):
+        """测试磁带末尾被截断时保留完整的录制"""
+        path = tmp_path / "cassette.jsonl.gz"
+        recorder = Cassette(path=str(path), mode="record")
+        for i in range(20):
+            recorder.call("temu", "spec_id_get", {"name": i}, lambda i=i: {"specId": i})
+        recorder.close()
+        path.write_bytes(path.read_bytes()[:-6])
+
+        player = Cassette(path=str(path), mode="replay")
+
+        assert player.call("temu", "spec_id_get", {"name": 0}, MagicMock()) == {"specId": 0}
+
+    def test_invalid_mode(self, tmp_path):
+        """测试无效的模式"""
+        with pytest.raises(ValueError):
+            Cassette(path=str(tmp_path / "c.jsonl.gz"), mode="rewind")
@@ -0,0 +1,105 @@
+"""
+本地分类器测试
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from src.transform.category_classifier import (
+    CategoryClassifier, append_listing_history, benchmark, load_listing_history
+)
+
+
+SAMPLES = [
+    ("Men's Cargo Pants Black", 101),
+    ("Mens Cargo Trousers Khaki", 101),
+    ("Hip Hop Cargo Pants Loose", 101),
+    ("Women Summer Floral Dress", 202),
+    ("Floral Midi Dress Women", 202),
+    ("Ceramic Coffee Mug 350ml", 303),
+]
+
+
+class TestCategoryClassifier:
+    """本地分类器测试"""
+
+    def test_predicts_nearest_category(self):
+        """测试预测最相似样本的分类"""
+        classifier = CategoryClassifier().fit(SAMPLES)
+
+        cat_id, confidence = classifier.predict("Cargo Pants Men Loose Fit")
+        assert cat_id == 101
+        assert 0 < confidence <= 1
+
+        assert classifier.predict("Floral Dress for Women")[0] == 202
+
+    def test_identical_title_high_confidence(self):
+        """测试相同标题置信度最高"""
+        classifier = CategoryClassifier().fit(SAMPLES)
+
+        assert classifier.predict("CERAMIC coffee mug, 350ml")[1] > 0.9
+
+    def test_unrelated_title_low_confidence(self):
+        """测试无关标题置信度低"""
+        classifier = CategoryClassifier().fit(SAMPLES)
+
+        prediction = classifier.predict("zzzz qqqq")
+        assert prediction is None or prediction[1] < 0.3
+
+    def test_empty_classifier(self):
+        """测试没有训练数据时返回None"""
+        assert CategoryClassifier().predict("Cargo Pants") is None
+
+    def test_add_updates_index(self):
+        """测试新增样本后立即生效，相同标题以最新分类为准"""
+        classifier = CategoryClassifier().fit(SAMPLES)
+        classifier.add("Ceramic Coffee Mug 350ml", 304)
+
+        assert len(classifier) == len(SAMPLES)
+        assert classifier.predict("Ceramic Coffee Mug 350ml")[0] == 304
+
+
+    def test_add_after_predict_is_incremental(self):
+        """测试预测后新增少量样本只追加索引，不重新计算全部向量长度"""
+        classifier = CategoryClassifier().fit((f"Sample Product {i} Cargo Pants", 101) for i in range(20))
+        classifier.predict("Cargo Pants")
+        norms = list(classifier._norms)
+
+        classifier.add("Ceramic Coffee Mug 350ml", 303)
+
+        assert classifier.predict("Ceramic Coffee Mug 350ml")[0] == 303
+        assert classifier._norms[:20] == norms
+
+
+class TestListingHistory:
+    """上架历史和离线评估测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = str(Path(self.temp_dir) / "history.jsonl")
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_append_and_load(self):
+        """测试追加后读取"""
+        append_listing_history("Cargo Pants", 101, "Pants", path=self.path)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("{broken\n")
+
+        records = load_listing_history(self.path)
+        assert [(r["title"], r["catId"]) for r in records] == [("Cargo Pants", 101)]
+
+    def test_benchmark_reports_agreement(self):
+        """测试离线评估输出覆盖率和一致率"""
+        records = [{"title": f"{title} v{i}", "catId": cat_id} for i in range(10) for title, cat_id in SAMPLES]
+
+        report = benchmark(records, thresholds=(0.5,))
+        assert report["train"] + report["test"] == len(records)
+        assert report["test"] > 0
+        row = report["thresholds"][0]
+        assert 0 <= row["coverage"] <= 1
+        assert row["agreement"] > 0.8
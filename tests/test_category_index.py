@@ -0,0 +1,159 @@
+"""
+分类树索引测试
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.temu.category_index import CategoryIndex
+
+
+TREE = {
+    0: [{"catId": 1, "catName": "服饰", "catType": 0}, {"catId": 2, "catName": "家居", "catType": 1}],
+    1: [{"catId": 11, "catName": "裤子", "catType": 0}],
+    11: [{"catId": 111, "catName": "工装裤", "catType": 0, "isLeaf": True}],
+    2: [],
+}
+
+
+class TestCategoryIndex:
+    """分类树索引测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = str(Path(self.temp_dir) / "category_index.json")
+        self.calls = []
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def fetch(self, parent_cat_id):
+        self.calls.append(parent_cat_id)
+        return TREE.get(parent_cat_id)
+
+    def test_leaf_descendants_expand_once(self):
+        """测试查找叶子分类只展开一次"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+
+        leaves = index.leaf_descendants(1, self.fetch)
+        assert [leaf["catId"] for leaf in leaves] == [111]
+
+        calls = len(self.calls)
+        assert index.leaf_descendants(1, self.fetch) == leaves
+        assert len(self.calls) == calls
+
+    def test_lookups_use_index(self):
+        """测试叶子、catType和祖先路径查询"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+        index.children(0, self.fetch)
+        index.leaf_descendants(1, self.fetch)
+        self.calls.clear()
+
+        assert index.is_leaf(111) == True
+        assert index.is_leaf(11) == False
+        assert index.cat_type(111) == 0
+        assert index.cat_type(2) == 1
+        assert [node["catId"] for node in index.ancestors(111)] == [1, 11]
+        assert self.calls == []
+
+    def test_empty_children_marks_leaf(self):
+        """测试没有子分类的节点视为叶子"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+        index.children(0, self.fetch)
+
+        assert index.is_leaf(2, self.fetch) == True
+        assert index.is_leaf(2) == True
+
+    def test_unknown_without_fetch(self):
+        """测试未索引且不允许调用API时返回None"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+
+        assert index.is_leaf(999) is None
+        assert index.cat_type(999) is None
+        assert index.ancestors(999) == []
+
+    def test_fetch_failure_not_cached(self):
+        """测试获取失败不写入索引"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+
+        assert index.children(0, lambda cat_id: None) is None
+        assert index.children(0, self.fetch) is not None
+
+    def test_persisted_across_instances(self):
+        """测试索引持久化后新实例无需调用API"""
+        first = CategoryIndex(self.index_path, ttl=3600)
+        first.leaf_descendants(1, self.fetch)
+        first.flush()
+        self.calls.clear()
+
+        index = CategoryIndex(self.index_path, ttl=3600)
+        assert [leaf["catId"] for leaf in index.leaf_descendants(1, self.fetch)] == [111]
+        assert self.calls == []
+
+    def test_fetch_does_not_block_lookups(self):
+        """测试调用API期间其他线程仍可查询索引"""
+        index = CategoryIndex(self.index_path, ttl=3600)
+        index.children(0, self.fetch)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch(parent_cat_id):
+            started.set()
+            release.wait(5)
+            return TREE.get(parent_cat_id)
+
+        worker = threading.Thread(target=index.children, args=(1, slow_fetch))
+        worker.start()
+        assert started.wait(5)
+        try:
+            assert index.cat_type(2) == 1
+        finally:
+            release.set()
+            worker.join()
+        assert [node["catId"] for node in index.children(1)] == [11]
+
+    def test_saves_are_coalesced(self):
+        """测试间隔内的多次展开合并写盘，flush 立即写入"""
+        index = CategoryIndex(self.index_path, ttl=3600, flush_interval=60)
+        index.children(0, self.fetch)
+        index.children(1, self.fetch)
+
+        assert len(CategoryIndex(self.index_path, ttl=3600)) == 3
+
+        index.flush()
+
+        assert len(CategoryIndex(self.index_path, ttl=3600)) == 4
+
+    def test_save_writes_snapshot(self):
+        """测试写盘期间合并的展开结果不影响正在写出的快照"""
+        index = CategoryIndex(self.index_path, ttl=3600, flush_interval=60)
+        index.children(0, self.fetch)
+        written = []
+
+        def write_during_merge(path, data):
+            with index._lock:
+                index._record_children(1, TREE[1])
+            written.append(data)
+
+        with patch("src.temu.category_index.atomic_write_json", side_effect=write_during_merge):
+            index.save()
+
+        assert written[0]["nodes"]["1"]["children"] is None
+        assert "11" not in written[0]["nodes"]
+
+    def test_expired_index_is_rebuilt(self):
+        """测试索引过期后重新展开"""
+        CategoryIndex(self.index_path, ttl=3600).children(0, self.fetch)
+        self.calls.clear()
+
+        with patch("src.temu.category_index.time.time", return_value=time.time() + 7200):
+            index = CategoryIndex(self.index_path, ttl=3600)
+            assert index.cat_type(2) is None
+            index.children(0, self.fetch)
+        assert self.calls == [0]
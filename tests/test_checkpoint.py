@@ -0,0 +1,76 @@
+"""
+流程检查点测试
+"""
+
+import shutil
+import tempfile
+
+from src.core.checkpoint import CheckpointStore
+from src.models.product import TemuProduct, TemuSKU, ProductStatus
+
+
+class TestCheckpointStore:
+    """检查点存储测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = CheckpointStore(checkpoint_dir=self.temp_dir)
+        self.url = "https://example.com/detail/abc"
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_load_missing(self):
+        """测试没有检查点时返回None"""
+        assert self.store.load(self.url) is None
+
+    def test_save_merges_steps(self):
+        """测试多次保存合并已完成步骤和状态"""
+        self.store.save(self.url, ["scraped_product"], {"scraped_product": {"name": "A"}})
+        self.store.save(self.url, ["template"], {"templates_cache": {"30847": {}}})
+
+        checkpoint = self.store.load(self.url)
+        assert checkpoint["completed"] == ["scraped_product", "template"]
+        assert checkpoint["state"]["scraped_product"] == {"name": "A"}
+        assert checkpoint["state"]["templates_cache"] == {"30847": {}}
+
+    def test_urls_are_isolated(self):
+        """测试不同URL的检查点互不影响"""
+        self.store.save(self.url, ["scraped_product"], {})
+
+        assert self.store.load("https://example.com/detail/other") is None
+
+    def test_clear(self):
+        """测试删除检查点"""
+        self.store.save(self.url, ["scraped_product"], {})
+        self.store.clear(self.url)
+
+        assert self.store.load(self.url) is None
+
+
+class TestTemuProductSerialization:
+    """TemuProduct序列化测试"""
+
+    def test_round_trip(self):
+        """测试to_dict/from_dict往返"""
+        product = TemuProduct(
+            title="Test Product",
+            description="desc",
+            original_price=100.0,
+            markup_price=130.0,
+            currency="JPY",
+            category_id="30847",
+            skus=[TemuSKU("SKU_001", "M", "M", 130.0, 10, images=["a.jpg"])],
+            status=ProductStatus.PENDING
+        )
+
+        restored = TemuProduct.from_dict(product.to_dict())
+
+        assert restored.title == product.title
+        assert restored.category_id == "30847"
+        assert restored.status == ProductStatus.PENDING
+        assert restored.skus[0].size == "M"
+        assert restored.skus[0].images == ["a.jpg"]
+        assert restored.created_at == product.created_at
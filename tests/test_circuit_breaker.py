@@ -0,0 +1,133 @@
+"""
+熔断器测试
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.utils.exceptions import CircuitOpenException, RateLimitException, is_retryable_exception
+
+
+def _fail():
+    raise requests.ConnectionError("connection refused")
+
+
+class TestCircuitBreaker:
+    """熔断器测试"""
+
+    def test_opens_after_failure_rate(self):
+        """测试失败率达到阈值后熔断并快速失败"""
+        breaker = CircuitBreaker("svc", failure_threshold=0.5, min_calls=4, window=10, open_seconds=60)
+        breaker.call(lambda: "ok")
+        breaker.call(lambda: "ok")
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                breaker.call(_fail)
+
+        assert breaker.state == OPEN
+        func = MagicMock()
+        with pytest.raises(CircuitOpenException) as exc_info:
+            breaker.call(func)
+        func.assert_not_called()
+        assert exc_info.value.service == "svc"
+        assert not is_retryable_exception(exc_info.value)
+
+        stats = breaker.stats()
+        assert stats["opened"] == 1 and stats["rejected"] == 1
+        assert stats["transitions"][0]["to"] == OPEN
+
+    def test_min_calls(self):
+        """测试调用次数不足时不熔断"""
+        breaker = CircuitBreaker("svc", failure_threshold=0.5, min_calls=5, window=10, open_seconds=60)
+        for _ in range(4):
+            with pytest.raises(requests.ConnectionError):
+                breaker.call(_fail)
+
+        assert breaker.state == CLOSED
+
+    def test_half_open_probe_recovers(self):
+        """测试熔断时间结束后试探成功则恢复"""
+        breaker = CircuitBreaker("svc", failure_threshold=0.5, min_calls=1, window=5, open_seconds=0.05)
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(_fail)
+        assert breaker.state == OPEN
+
+        time.sleep(0.06)
+        assert breaker.state == HALF_OPEN
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.state == CLOSED
+        assert [t["to"] for t in breaker.stats()["transitions"]] == [OPEN, HALF_OPEN, CLOSED]
+
+    def test_half_open_probe_fails(self):
+        """测试试探失败后重新熔断，且半开期间只放行一次试探"""
+        breaker = CircuitBreaker("svc", failure_threshold=0.5, min_calls=1, window=5, open_seconds=0.05)
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(_fail)
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_failure(RuntimeError("still down"))
+
+        assert breaker.state == OPEN
+        assert breaker.stats()["opened"] == 2
+
+    def test_ignored_exceptions(self):
+        """测试忽略的异常不计为失败"""
+        breaker = CircuitBreaker("svc", failure_threshold=0.5, min_calls=1, window=5, open_seconds=60,
+                                 ignore=(RateLimitException,))
+
+        def limited():
+            raise RateLimitException("too many")
+
+        with pytest.raises(RateLimitException):
+            breaker.call(limited)
+        assert breaker.state == CLOSED
+
+
+class TestCircuitBreakerIntegration:
+    """熔断器集成测试"""
+
+    def test_ocr_degrades_when_open(self, tmp_path):
+        """测试OCR熔断时跳过中文过滤且不缓存结果"""
+        from src.image.image_processor import ImageProcessor
+
+        image_path = tmp_path / "image_001.jpg"
+        image_path.write_bytes(b"data")
+        ocr_client = MagicMock()
+        ocr_client.recognize_text.side_effect = CircuitOpenException("baidu_ocr 已熔断", service="baidu_ocr")
+
+        with patch("src.image.image_processor.get_config") as mock_config:
+            mock_config.return_value.image_save_path = str(tmp_path)
+            processor = ImageProcessor(ocr_client=ocr_client)
+        processor.download_image = MagicMock(return_value=image_path)
+        processor._supplement_images_if_needed = MagicMock()
+
+        result = processor.process_images(["https://example.com/main.jpg"])
+
+        assert result["main"] == [image_path]
+        assert not result["filtered"]
+        assert processor._get_cached_ocr("https://example.com/main.jpg") is None
+
+    def test_image_download_fails_fast(self, tmp_path):
+        """测试图片主机熔断后不再发起下载请求"""
+        from src.image.image_processor import ImageProcessor
+        from src.utils.circuit_breaker import get_circuit_breaker
+
+        breaker = get_circuit_breaker("image_download:down.example.com")
+        breaker.min_calls = 1
+        breaker.open_seconds = 60
+        breaker.record_failure(RuntimeError("timeout"))
+
+        with patch("src.image.image_processor.get_config") as mock_config:
+            mock_config.return_value.image_save_path = str(tmp_path)
+            processor = ImageProcessor(ocr_client=MagicMock())
+
+        with patch("requests.Session.get") as mock_get:
+            with pytest.raises(CircuitOpenException):
+                processor.download_image("https://down.example.com/a.jpg", force_scrape=True)
+            mock_get.assert_not_called()
@@ -114,6 +114,34 @@ class TestConfig:
             config.validate()
         assert "最大重试延迟必须大于等于初始延迟" in str(exc_info.value)
     
+    def test_config_concurrency_knobs(self, monkeypatch):
+        """测试并发、轮询和校验相关配置的加载"""
+        self._set_required_env_vars(monkeypatch)
+        monkeypatch.setenv("WORKFLOW_MAX_WORKERS", "6")
+        monkeypatch.setenv("IMAGE_UPLOAD_CONCURRENCY", "3")
+        monkeypatch.setenv("IMAGE_READY_TIMEOUT", "2.5")
+        
+        config = Config()
+        
+        assert config.workflow_max_workers == 6
+        assert config.image_upload_concurrency == 3
+        assert config.image_ready_timeout == 2.5
+        assert config.image_validation_target == 10
+        assert config.category_classifier_threshold == 0.6
+        assert config.validate() == True
+    
+    def test_config_validate_concurrency_knobs(self, monkeypatch):
+        """测试并发、熔断和录制配置的校验"""
+        self._set_required_env_vars(monkeypatch)
+        
+        for key, value in [("WORKFLOW_MAX_WORKERS", "0"), ("IMAGE_READY_POLL_INTERVAL", "0"),
+                           ("TEMU_RATE_LIMIT", "-1"), ("CIRCUIT_FAILURE_THRESHOLD", "1.5"),
+                           ("CASSETTE_MODE", "rewind"), ("PERSISTENT_CACHE_FLUSH_INTERVAL", "-1")]:
+            monkeypatch.setenv(key, value)
+            with pytest.raises(ConfigError):
+                Config().validate()
+            monkeypatch.delenv(key)
+    
     def test_config_load_from_env_file(self, monkeypatch):
         """测试从.env文件加载配置"""
         # 清除可能已经加载的环境变量
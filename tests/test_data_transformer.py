@@ -42,6 +42,14 @@ class TestDataTransformer:
         assert self.transformer._clean_title("") == ""
         assert self.transformer._clean_title(None) == ""
 
+    def test_title_fingerprint(self):
+        """测试标题指纹"""
+        a = self.transformer.title_fingerprint("  Men's Cargo  Pants (Black) ")
+        b = self.transformer.title_fingerprint("MENS cargo pants - black")
+        assert a == b == "mens cargo pants black"
+        assert self.transformer.title_fingerprint("工装裤 男款") == "工装裤 男款"
+        assert self.transformer.title_fingerprint("") == ""
+    
     def test_clean_description(self):
         """测试清理描述"""
         # HTML标签清理
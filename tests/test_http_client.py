@@ -0,0 +1,61 @@
+"""
+HTTP客户端测试
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定内容的keep-alive处理器"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient:
+    """HTTP客户端测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        """测试连续请求复用同一个连接"""
+        client = HttpClient(pool_connections=2, pool_maxsize=2, timeout=5)
+        for _ in range(5):
+            assert client.get(f"{self.base_url}/image.jpg").text == "ok"
+
+        stats = client.stats()
+        assert stats["requests"] == 5
+        assert stats["connections"] == 1
+        assert stats["reused"] == 4
+        client.close()
+
+    def test_errors_are_counted(self):
+        """测试请求失败计入统计"""
+        client = HttpClient(timeout=1)
+        try:
+            client.get("http://127.0.0.1:1/unreachable")
+        except Exception:
+            pass
+
+        assert client.stats()["hosts"]["127.0.0.1"]["errors"] == 1
@@ -0,0 +1,130 @@
+"""
+图片目录缓存回收测试
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.image.image_cache import ImageCacheManager
+from src.image.image_records import ImageRecordStore
+
+
+class TestImageCacheManager:
+    """图片目录回收测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = Path(self.temp_dir)
+        self.records = ImageRecordStore(self.root / "image_records.db")
+        self.manager = ImageCacheManager(self.root, self.records, quota_bytes=250, min_age=60)
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        self.records.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_file(self, relative: str, size: int, age: float) -> Path:
+        """创建指定大小、最后访问时间为age秒前的文件"""
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_evicts_least_recently_used_until_under_quota(self):
+        """测试超出配额时按最后访问时间淘汰最旧的文件，并同步删除记录"""
+        oldest = self.make_file("content/aa/aaaa.jpg", 100, age=3000)
+        copy = self.make_file("content/aa/aaaa_copy_1.jpg", 100, age=2000)
+        newer = self.make_file("content/bb/bbbb.jpg", 100, age=1000)
+        self.records.set_download("https://example.com/a.jpg", oldest, "aaaa")
+        self.records.set_download("https://example.com/b.jpg", newer, "bbbb")
+        self.records.set_content_ocr("aaaa", False, "Size")
+
+        report = self.manager.collect()
+
+        assert report.files_scanned == 3
+        assert report.bytes_before == 300
+        assert report.files_removed == 1
+        assert report.bytes_reclaimed == 100
+        assert report.records_removed == 1
+        assert not oldest.exists()
+        assert copy.exists() and newer.exists()
+        assert self.records.get_download("https://example.com/a.jpg") is None
+        assert self.records.get_content_ocr("aaaa") is None
+        assert self.records.get_download("https://example.com/b.jpg") == str(newer)
+
+    def test_touch_protects_recently_used_files(self):
+        """测试最近使用过的文件不被淘汰"""
+        used = self.make_file("content/aa/aaaa.jpg", 200, age=3000)
+        other = self.make_file("content/bb/bbbb.jpg", 200, age=2000)
+
+        ImageCacheManager.touch(used)
+        report = self.manager.collect()
+
+        assert used.exists()
+        assert not other.exists()
+        assert report.bytes_after == 200
+
+    def test_removes_stale_partial_downloads_and_keeps_database(self):
+        """测试总是清理过期的下载临时文件，且不回收记录数据库"""
+        stale = self.make_file("tmp/abc.part", 10, age=3000)
+        fresh = self.make_file("tmp/def.part", 10, age=0)
+
+        report = self.manager.collect(quota_bytes=0)
+
+        assert report.files_removed == 1
+        assert not stale.exists()
+        assert fresh.exists()
+        assert (self.root / "image_records.db").exists()
+
+    def test_dry_run_deletes_nothing(self):
+        """测试只统计时不删除文件"""
+        path = self.make_file("content/aa/aaaa.jpg", 300, age=3000)
+
+        report = self.manager.collect(dry_run=True)
+
+        assert report.bytes_reclaimed == 300
+        assert path.exists()
+
+    def test_collect_if_over_quota(self):
+        """测试估算的使用量超过配额时才自动回收，并累计新写入的字节"""
+        old = self.make_file("content/aa/aaaa.jpg", 200, age=3000)
+
+        assert self.manager.collect_if_over_quota() is None
+        assert old.exists()
+
+        self.make_file("content/bb/bbbb.jpg", 100, age=0)
+        self.manager.add_usage(100)
+        report = self.manager.collect_if_over_quota()
+
+        assert report is not None and report.files_removed == 1
+        assert not old.exists()
+        assert self.manager.collect_if_over_quota() is None
+
+    def test_collect_if_over_quota_backs_off_when_nothing_evictable(self):
+        """测试回收后仍超出配额（文件都在保护期内）时，保护期内不再重复扫描"""
+        self.make_file("content/aa/aaaa.jpg", 300, age=0)
+
+        report = self.manager.collect_if_over_quota()
+        assert report is not None and report.files_removed == 0
+
+        with patch.object(self.manager, "_scan") as mock_scan:
+            assert self.manager.collect_if_over_quota() is None
+        mock_scan.assert_not_called()
+
+        with patch("src.image.image_cache.time.time", return_value=time.time() + 120):
+            assert self.manager.collect_if_over_quota() is not None
+
+    def test_collect_if_over_quota_disabled_without_quota(self):
+        """测试未设置配额时不扫描也不回收"""
+        path = self.make_file("content/aa/aaaa.jpg", 300, age=3000)
+        manager = ImageCacheManager(self.root, self.records, quota_bytes=0, min_age=60)
+
+        assert manager.collect_if_over_quota() is None
+        assert path.exists()
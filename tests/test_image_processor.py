@@ -2,6 +2,7 @@
 图片处理模块测试
 """
 
+import hashlib
 import os
 import tempfile
 from pathlib import Path
@@ -88,7 +89,7 @@ class TestImageProcessor:
         # 主图URL
         assert self.processor.classify_image_type("image.jpg", "https://example.com/main-image") == "main"
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_download_image_success(self, mock_get):
         """测试成功下载图片"""
         # 模拟HTTP响应
@@ -100,28 +101,76 @@ class TestImageProcessor:
         # 测试下载
         result_path = self.processor.download_image("https://example.com/image.jpg")
         
-        # 验证结果
+        # 验证结果：按内容的SHA-256分目录保存
+        content_hash = hashlib.sha256(b'fake_image_data').hexdigest()
         assert result_path.exists()
-        assert result_path.name == "image.jpg"
+        assert result_path == self.temp_path / "content" / content_hash[:2] / f"{content_hash}.jpg"
+        assert self.processor.get_content_hash("https://example.com/image.jpg") == content_hash
         mock_get.assert_called_once_with("https://example.com/image.jpg", timeout=30, stream=True)
 
-    @patch('requests.get')
-    def test_download_image_with_custom_filename(self, mock_get):
-        """测试使用自定义文件名下载图片"""
-        # 模拟HTTP响应
+    @patch('requests.Session.get')
+    def test_download_image_same_content_stored_once(self, mock_get):
+        """测试不同URL下的相同图片只保存一份，并共用OCR结果"""
+        # 模拟HTTP响应（PNG文件头）
         mock_response = Mock()
-        mock_response.iter_content.return_value = [b'fake_image_data']
+        mock_response.iter_content.return_value = [b'\x89PNG\r\n\x1a\n', b'fake_image_data']
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
         # 测试下载
-        result_path = self.processor.download_image("https://example.com/image.jpg", "custom.jpg")
+        first = self.processor.download_image("https://cdn1.example.com/a.jpg")
+        second = self.processor.download_image("https://cdn2.example.com/b?x=1")
         
         # 验证结果
-        assert result_path.exists()
-        assert result_path.name == "custom.jpg"
+        assert first == second
+        assert first.suffix == ".png"
+        assert len(list((self.temp_path / "content").rglob("*.png"))) == 1
+        assert not any((self.temp_path / "tmp").iterdir())
+        
+        self.processor._record_ocr_result("https://cdn1.example.com/a.jpg", True, "尺码")
+        assert self.processor._get_cached_ocr("https://cdn2.example.com/b?x=1") == (True, "尺码")
+
+    @patch('requests.Session.get')
+    def test_download_image_revalidate(self, mock_get):
+        """测试重新校验：304时复用本地文件，内容变化时重新下载"""
+        url = "https://example.com/image.jpg"
+        first_response = Mock(status_code=200, headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        first_response.iter_content.return_value = [b'fake_image_data']
+        mock_get.return_value = first_response
+        first = self.processor.download_image(url)
+
+        # 未变化：发送条件请求，返回已有文件
+        mock_get.return_value = Mock(status_code=304, headers={})
+        assert self.processor.download_image(url, revalidate=True) == first
+        mock_get.assert_called_with(url, timeout=30, stream=True, headers={
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+        })
+
+        # 已变化：保存新内容并更新ETag
+        changed_response = Mock(status_code=200, headers={'ETag': '"v2"'})
+        changed_response.iter_content.return_value = [b'new_image_data']
+        mock_get.return_value = changed_response
+        second = self.processor.download_image(url, revalidate=True)
+        assert second != first
+        assert self.processor.get_content_hash(url) == hashlib.sha256(b'new_image_data').hexdigest()
+        assert self.processor.records.get_validators(url) == ('"v2"', None)
+
+    @patch('requests.Session.get')
+    def test_download_image_revalidate_missing_file(self, mock_get):
+        """测试已记录的文件被删除后重新校验时发送普通请求"""
+        url = "https://example.com/image.jpg"
+        response = Mock(status_code=200, headers={'ETag': '"v1"'})
+        response.iter_content.return_value = [b'fake_image_data']
+        mock_get.return_value = response
+        first = self.processor.download_image(url)
+        first.unlink()
 
-    @patch('requests.get')
+        assert self.processor.download_image(url, revalidate=True) == first
+        assert first.exists()
+        mock_get.assert_called_with(url, timeout=30, stream=True)
+
+    @patch('requests.Session.get')
     def test_download_image_http_error(self, mock_get):
         """测试下载图片HTTP错误"""
         # 模拟HTTP错误
@@ -133,6 +182,24 @@ class TestImageProcessor:
         
         assert "下载图片失败" in str(exc_info.value)
 
+    @patch('requests.Session.get')
+    def test_download_image_closes_response(self, mock_get):
+        """测试4xx和读取中途出错时关闭流式响应，不留下临时文件"""
+        not_found = Mock(status_code=404)
+        not_found.raise_for_status.side_effect = requests.HTTPError(response=not_found)
+        mock_get.return_value = not_found
+        with pytest.raises(ImageProcessingError):
+            self.processor.download_image("https://example.com/missing.jpg")
+        not_found.close.assert_called_once()
+
+        broken = Mock(status_code=200, headers={})
+        broken.iter_content.side_effect = requests.ConnectionError("reset")
+        mock_get.return_value = broken
+        with pytest.raises(ImageProcessingError):
+            self.processor.download_image("https://example.com/broken.jpg")
+        broken.close.assert_called_once()
+        assert not any((self.temp_path / "tmp").iterdir())
+
     def test_check_image_for_chinese_with_chinese(self):
         """测试检测包含中文的图片"""
         # 模拟OCR返回包含中文的文本
@@ -182,7 +249,7 @@ class TestImageProcessor:
         assert has_chinese == False
         assert text == ""
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_process_images_success(self, mock_get):
         """测试批量处理图片成功"""
         # 模拟HTTP响应
@@ -211,7 +278,7 @@ class TestImageProcessor:
         assert len(result['other']) == 0
         assert len(result['filtered']) == 0
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_process_images_with_chinese_filter(self, mock_get):
         """测试批量处理图片并过滤中文"""
         # 模拟HTTP响应
@@ -236,6 +303,33 @@ class TestImageProcessor:
         assert len(result['other']) == 0
         assert len(result['filtered']) == 1
 
+    def test_process_images_preserves_input_order(self):
+        """测试并发下载完成顺序不同时，分类结果仍保持输入顺序"""
+        import time
+
+        image_urls = [f"https://example.com/detail_{i}.jpg" for i in range(6)]
+
+        def fake_download(url, force_scrape=False):
+            # 越靠前的图片下载越慢，使完成顺序与输入顺序相反
+            index = image_urls.index(url)
+            time.sleep(0.01 * (len(image_urls) - index))
+            path = self.temp_path / f"downloaded_{index}.jpg"
+            path.write_bytes(b'fake_image_data')
+            return path
+
+        self.processor.download_workers = 4
+        self.processor.ocr_workers = 2
+        self.mock_ocr_client.recognize_text.return_value = (False, ["Product Details"])
+
+        with patch.object(self.processor, 'download_image', side_effect=fake_download), \
+                patch.object(self.processor.cache, 'collect_if_over_quota') as mock_collect:
+            result = self.processor.process_images(image_urls)
+
+        names = [p.name for p in result['detail']]
+        assert names[:6] == [f"downloaded_{i}.jpg" for i in range(6)]
+        assert self.mock_ocr_client.recognize_text.call_count == 6
+        mock_collect.assert_called_once_with()
+
     def test_get_image_info(self):
         """测试获取图片信息"""
         # 创建测试图片
@@ -0,0 +1,134 @@
+"""
+图片记录存储测试
+"""
+
+import json
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from src.image.image_records import ImageRecordStore
+
+
+class TestImageRecordStore:
+    """图片记录存储测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.db_path = self.temp_path / "image_records.db"
+        self.store = ImageRecordStore(self.db_path, batch_size=3)
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _committed_downloads(self) -> int:
+        """用独立连接统计已提交的下载记录数"""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_set_and_get(self):
+        """测试写入后读取"""
+        self.store.set_download("https://example.com/a.jpg", self.temp_path / "a.jpg")
+        self.store.set_ocr("https://example.com/a.jpg", True, "尺码表")
+
+        assert self.store.get_download("https://example.com/a.jpg") == str(self.temp_path / "a.jpg")
+        assert self.store.get_ocr("https://example.com/a.jpg") == (True, "尺码表")
+        assert self.store.get_download("https://example.com/b.jpg") is None
+        assert self.store.get_ocr("https://example.com/b.jpg") is None
+
+    def test_write_outside_batch_commits_immediately(self):
+        """测试批处理外的写入立即提交"""
+        self.store.set_download("https://example.com/a.jpg", "a.jpg")
+
+        assert self._committed_downloads() == 1
+
+    def test_batch_defers_commit(self):
+        """测试批处理中的写入缓冲，达到批量或退出时提交，缓冲期间可查询"""
+        with self.store.batch():
+            self.store.set_download("https://example.com/1.jpg", "1.jpg")
+            self.store.set_download("https://example.com/2.jpg", "2.jpg")
+            assert self._committed_downloads() == 0
+            assert self.store.get_download("https://example.com/2.jpg") == "2.jpg"
+
+            self.store.set_download("https://example.com/3.jpg", "3.jpg")
+            assert self._committed_downloads() == 3
+
+            self.store.set_download("https://example.com/4.jpg", "4.jpg")
+            assert self._committed_downloads() == 3
+
+        assert self._committed_downloads() == 4
+
+    def test_records_shared_between_instances(self):
+        """测试同一数据库的多个实例（如多个进程）看到彼此提交的记录"""
+        other = ImageRecordStore(self.db_path)
+        try:
+            other.set_ocr("https://example.com/a.jpg", False, "Size")
+            assert self.store.get_ocr("https://example.com/a.jpg") == (False, "Size")
+        finally:
+            other.close()
+
+    def test_migrate_json(self):
+        """测试导入旧版JSON记录，并将旧文件重命名"""
+        download_file = self.temp_path / "download_records.json"
+        ocr_file = self.temp_path / "ocr_records.json"
+        download_file.write_text(json.dumps({"https://example.com/a.jpg": "images/a.jpg"}), encoding="utf-8")
+        ocr_file.write_text(json.dumps({
+            "https://example.com/a.jpg": {"has_chinese": True, "text": "详情"}
+        }), encoding="utf-8")
+        self.store.set_download("https://example.com/b.jpg", "images/new_b.jpg")
+
+        self.store.migrate_json(download_file, ocr_file)
+
+        assert self.store.get_download("https://example.com/a.jpg") == "images/a.jpg"
+        assert self.store.get_ocr("https://example.com/a.jpg") == (True, "详情")
+        assert self.store.get_download("https://example.com/b.jpg") == "images/new_b.jpg"
+        assert not download_file.exists()
+        assert (self.temp_path / "download_records.json.migrated").exists()
+        assert (self.temp_path / "ocr_records.json.migrated").exists()
+
+    def test_migrate_without_json_files(self):
+        """测试没有旧版记录文件时不做任何事"""
+        self.store.migrate_json(self.temp_path / "download_records.json", self.temp_path / "ocr_records.json")
+
+        assert len(self.store) == 0
+
+    def test_content_hash_and_content_ocr(self):
+        """测试记录内容哈希并按内容读写OCR结果"""
+        content_hash = "ab" * 32
+        self.store.set_download("https://example.com/a.jpg", "a.jpg", content_hash)
+        self.store.set_content_ocr(content_hash, True, "尺码")
+
+        assert self.store.get_content_hash("https://example.com/a.jpg") == content_hash
+        assert self.store.get_content_ocr(content_hash) == (True, "尺码")
+        assert self.store.get_ocr("https://example.com/a.jpg") is None
+
+    def test_validators(self):
+        """测试记录响应的ETag/Last-Modified"""
+        self.store.set_download("https://example.com/a.jpg", "a.jpg", "ab" * 32, etag='"v1"', last_modified=None)
+
+        assert self.store.get_validators("https://example.com/a.jpg") == ('"v1"', None)
+        assert self.store.get_validators("https://example.com/b.jpg") == (None, None)
+
+    def test_upgrades_database_without_content_hash(self):
+        """测试打开旧版数据库时补充内容哈希列"""
+        self.store.close()
+        self.db_path.unlink()
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("CREATE TABLE downloads (url TEXT PRIMARY KEY, path TEXT NOT NULL, recorded_at REAL NOT NULL)")
+        conn.execute("INSERT INTO downloads VALUES ('https://example.com/a.jpg', 'a.jpg', 0)")
+        conn.commit()
+        conn.close()
+
+        self.store = ImageRecordStore(self.db_path)
+
+        assert self.store.get_download("https://example.com/a.jpg") == "a.jpg"
+        assert self.store.get_content_hash("https://example.com/a.jpg") is None
+        assert self.store.get_validators("https://example.com/a.jpg") == (None, None)
@@ -0,0 +1,214 @@
+"""
+商品图片上传测试
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.pipeline_options import PipelineOptions
+from src.core.product_manager import ProductManager
+from src.utils.config import get_config
+from src.utils.cache import PersistentCache
+from src.utils.rate_limiter import RateLimiter
+
+
+class FakeProductApi:
+    """模拟Temu图片上传，URL中含有 bad 的图片上传失败"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def image_upload(self, scaling_type, file_url, compression_type, format_conversion_type):
+        with self._lock:
+            self.calls.append(file_url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if "bad" in file_url:
+            return {"success": False, "errorMsg": "invalid image"}
+        return {"success": True, "result": {"url": file_url.replace("src", "temu")}}
+
+
+class TestUploadImagesConcurrently:
+    """有限并发上传测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.upload_cache = PersistentCache(Path(self.temp_dir) / "uploads.json")
+        self.patchers = [
+            patch.dict("src.utils.cache._named_caches", {"uploads": self.upload_cache}),
+            patch.object(ProductManager, "_is_image_url_ready", return_value=True),
+            patch("src.core.product_manager.get_rate_limiter", return_value=RateLimiter(default_rate=0, rates={})),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def manager_state(self, api, content_hashes=None):
+        """图片上传所需的商品管理器状态"""
+        image_processor = Mock()
+        image_processor.get_content_hash.side_effect = (content_hashes or {}).get
+        return {
+            "image_processor": image_processor,
+            "temu_client": type("Client", (), {"product": api})(),
+        }
+
+    def test_keeps_source_order_and_skips_failures(self, make_manager):
+        """测试结果按原图顺序且与逐张上传一致"""
+        api = FakeProductApi()
+        urls = ["src/0", "src/bad1", "src/2", "src/3", "src/bad4", "src/5", "src/6", "src/7"]
+
+        with patch.object(get_config(), "image_upload_concurrency", 3):
+            uploaded = make_manager(**self.manager_state(api))._upload_images_concurrently(urls, 2, limit=5)
+
+        assert uploaded == ["temu/0", "temu/2", "temu/3", "temu/5", "temu/6"]
+        assert "src/7" not in api.calls
+
+    def test_uploads_in_parallel(self, make_manager):
+        """测试上传并发执行且不超过并发上限"""
+        api = FakeProductApi(delay=0.2)
+        urls = [f"src/{i}" for i in range(5)]
+
+        start = time.perf_counter()
+        with patch.object(get_config(), "image_upload_concurrency", 5):
+            uploaded = make_manager(**self.manager_state(api))._upload_images_concurrently(urls, 2, limit=5)
+        elapsed = time.perf_counter() - start
+
+        assert len(uploaded) == 5
+        assert api.max_active == 5
+        assert elapsed < 0.6
+
+    def test_reuploads_skipped_for_known_images(self, make_manager):
+        """测试已上传过的原图直接复用"""
+        api = FakeProductApi()
+        urls = ["src/0", "src/1"]
+        make_manager(**self.manager_state(api))._upload_images_concurrently(urls, 2)
+        api.calls.clear()
+
+        assert make_manager(**self.manager_state(api))._upload_images_concurrently(urls, 2) == ["temu/0", "temu/1"]
+        assert api.calls == []
+
+        # 缩放规格不同时不复用
+        make_manager(**self.manager_state(api))._upload_images_concurrently(urls, 1)
+        assert sorted(api.calls) == urls
+
+    def test_same_content_from_other_url_is_reused(self, make_manager):
+        """测试不同URL下的相同图片内容复用已上传的结果"""
+        api = FakeProductApi()
+        hashes = {"src/0": "a" * 64, "src/mirror": "a" * 64}
+        make_manager(**self.manager_state(api, hashes))._upload_images_concurrently(["src/0"], 2)
+        api.calls.clear()
+
+        assert make_manager(**self.manager_state(api, hashes))._upload_images_concurrently(["src/mirror"], 2) == ["temu/0"]
+        assert api.calls == []
+
+    def test_stale_upload_is_replaced(self, make_manager):
+        """测试探测失效的缓存图片重新上传"""
+        api = FakeProductApi()
+        make_manager(**self.manager_state(api))._upload_images_concurrently(["src/0"], 2)
+        api.calls.clear()
+
+        with patch.object(ProductManager, "_is_image_url_ready", return_value=False):
+            assert make_manager(**self.manager_state(api))._upload_images_concurrently(["src/0"], 2) == ["temu/0"]
+        assert api.calls == ["src/0"]
+
+    def test_refresh_uploads_bypasses_cache(self, make_manager):
+        """测试强制刷新时重新上传"""
+        api = FakeProductApi()
+        make_manager(**self.manager_state(api))._upload_images_concurrently(["src/0"], 2)
+        api.calls.clear()
+
+        make_manager(options=PipelineOptions(refresh_uploads=True), **self.manager_state(api))._upload_images_concurrently(["src/0"], 2)
+        assert api.calls == ["src/0"]
+
+
+class FakeHeadClient:
+    """模拟图片就绪探测，每个URL在第 ready_after 次探测时返回200"""
+
+    def __init__(self, ready_after, delay=0.0):
+        self.ready_after = ready_after
+        self.delay = delay
+        self.probes = {}
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def head(self, url, timeout=None, allow_redirects=False):
+        with self._lock:
+            self.probes[url] = self.probes.get(url, 0) + 1
+            self.timeouts.append(timeout)
+            count = self.probes[url]
+        if self.delay:
+            time.sleep(self.delay)
+        ready = self.ready_after.get(url)
+        return Mock(status_code=200 if ready is not None and count >= ready else 404)
+
+
+class TestWaitForImagesReady:
+    """已上传图片就绪等待测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        config = get_config()
+        self.patchers = [
+            patch.object(config, "image_ready_timeout", 10),
+            patch.object(config, "image_ready_poll_interval", 0.5),
+            patch.object(config, "image_validation_concurrency", 4),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_polls_pending_with_backoff(self, make_manager):
+        """测试只重新探测未就绪的图片，轮询间隔指数增长"""
+        client = FakeHeadClient({"temu/0": 1, "temu/1": 3})
+
+        with patch("src.core.product_manager.time.sleep") as mock_sleep:
+            assert make_manager(http_client=client)._wait_for_images_ready(["temu/0", "temu/1"]) is True
+
+        assert client.probes == {"temu/0": 1, "temu/1": 3}
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+
+    def test_probes_concurrently(self, make_manager):
+        """测试同一轮的探测并发执行"""
+        client = FakeHeadClient({f"temu/{i}": 1 for i in range(4)}, delay=0.2)
+
+        start = time.perf_counter()
+        assert make_manager(http_client=client)._wait_for_images_ready([f"temu/{i}" for i in range(4)]) is True
+
+        assert time.perf_counter() - start < 0.6
+
+    def test_timeout_caps_probe_timeout(self, make_manager):
+        """测试超时后返回False，单次探测超时不超过剩余等待时间"""
+        client = FakeHeadClient({})
+
+        with patch.object(get_config(), "image_ready_timeout", 0.3), \
+                patch.object(get_config(), "image_ready_poll_interval", 0.05):
+            manager = make_manager(http_client=client)
+            assert manager._wait_for_images_ready(["temu/0"]) is False
+
+        assert client.probes["temu/0"] >= 2
+        assert all(timeout <= 0.3 for timeout in client.timeouts)
+        assert 0.3 <= manager.image_ready_wait < 1.0
+        assert manager.metrics.to_dict()["steps"]["等待图片就绪"] == pytest.approx(manager.image_ready_wait, abs=0.01)
@@ -0,0 +1,87 @@
+"""
+候选图片校验测试
+"""
+
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.utils.config import get_config
+from src.utils.cache import PersistentCache
+
+
+class FakeSession:
+    """模拟HEAD请求，URL中含有 txt 的返回非图片类型，statuses 中的URL返回指定状态码"""
+
+    def __init__(self, statuses=None):
+        self.calls = []
+        self.statuses = statuses or {}
+        self._lock = threading.Lock()
+
+    def head(self, url, timeout=None):
+        with self._lock:
+            self.calls.append(url)
+        content_type = "text/html" if "txt" in url else "image/jpeg"
+        return MagicMock(status_code=self.statuses.get(url, 200),
+                         headers={"content-type": content_type, "content-length": "1024"})
+
+
+class TestFilterAndSelectImages:
+    """候选图片校验测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.head_cache = PersistentCache(Path(self.temp_dir) / "image_head.json", ttl=3600)
+        self.patcher = patch.dict("src.utils.cache._named_caches", {"image_head": self.head_cache})
+        self.patcher.start()
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def manager_state(self, session):
+        """图片校验所需的商品管理器状态（没有OCR缓存）"""
+        image_processor = MagicMock()
+        image_processor._get_cached_ocr.return_value = None
+        return {"http_client": session, "image_processor": image_processor}
+
+    def test_keeps_order_and_filters_non_images(self, make_manager):
+        """测试保持原顺序并过滤非图片"""
+        urls = ["https://a.com/0.jpg", "https://a.com/1.txt", "https://a.com/2.jpg", "not-a-url"]
+
+        valid = make_manager(**self.manager_state(FakeSession()))._filter_and_select_images(urls, max_valid=10)
+        assert valid == ["https://a.com/0.jpg", "https://a.com/2.jpg"]
+
+    def test_stops_once_enough_valid(self, make_manager):
+        """测试找到足够的有效图片后停止校验"""
+        session = FakeSession()
+        urls = [f"https://a.com/{i}.jpg" for i in range(40)]
+
+        with patch.object(get_config(), "image_validation_concurrency", 4):
+            valid = make_manager(**self.manager_state(session))._filter_and_select_images(urls, max_valid=5)
+
+        assert valid == urls[:5]
+        assert len(session.calls) < len(urls)
+
+    def test_head_outcomes_cached(self, make_manager):
+        """测试HEAD结果按URL缓存"""
+        urls = ["https://a.com/0.jpg", "https://a.com/1.txt"]
+        make_manager(**self.manager_state(FakeSession()))._filter_and_select_images(urls)
+
+        session = FakeSession()
+        assert make_manager(**self.manager_state(session))._filter_and_select_images(urls) == ["https://a.com/0.jpg"]
+        assert session.calls == []
+
+    def test_only_definitive_outcomes_cached(self, make_manager):
+        """测试404等确定的结果被缓存，限流和5xx下次重新校验"""
+        urls = ["https://a.com/0.jpg", "https://a.com/1.jpg", "https://a.com/2.jpg"]
+        statuses = {urls[0]: 404, urls[1]: 429, urls[2]: 503}
+        assert make_manager(**self.manager_state(FakeSession(statuses)))._filter_and_select_images(urls) == []
+
+        session = FakeSession()
+        assert make_manager(**self.manager_state(session))._filter_and_select_images(urls) == urls[1:]
+        assert sorted(session.calls) == urls[1:]
@@ -8,6 +8,7 @@ import tempfile
 import os
 
 from src.main import AutoTemuApp
+from src.core.pipeline_options import PipelineOptions
 from src.models.product import ScrapedProduct, TemuProduct, TemuSKU, TemuListingResult, TemuCategory
 
 
@@ -168,7 +169,7 @@ class TestAutoTemuApp:
         app.temu_client = Mock()
         
         # 模拟处理结果
-        def mock_process_single_url(url, output_dir=None):
+        def mock_process_single_url(url, output_dir=None, options=None):
             if "success" in url:
                 return TemuListingResult(success=True, product_id="prod123")
             else:
@@ -185,6 +186,30 @@ class TestAutoTemuApp:
         assert results[0].success == True
         assert results[1].success == False
 
+    @patch('src.main.AutoTemuApp.__init__', return_value=None)
+    def test_process_batch_urls_concurrent_keeps_order(self, mock_init):
+        """测试并发批量处理时结果保持输入顺序"""
+        import time as _time
+        
+        app = AutoTemuApp()
+        
+        def mock_process_single_url(url, output_dir=None, options=None):
+            # 越靠前的URL耗时越长，使完成顺序与输入顺序相反
+            index = int(url.rsplit("/", 1)[-1])
+            _time.sleep(0.05 * (4 - index))
+            if index == 2:
+                raise Exception("boom")
+            return TemuListingResult(success=True, product_id=f"prod{index}")
+        
+        app.process_single_url = mock_process_single_url
+        
+        urls = [f"https://example.com/{i}" for i in range(4)]
+        results = app.process_batch_urls(urls, workers=4)
+        
+        assert [r.product_id for r in results] == ["prod0", "prod1", None, "prod3"]
+        assert results[2].success == False
+        assert "boom" in results[2].errors[0]
+
     @patch('src.main.AutoTemuApp.__init__', return_value=None)
     def test_test_connection_success(self, mock_init):
         """测试连接测试成功"""
@@ -281,9 +306,29 @@ class TestAutoTemuApp:
                         main()
                         
                         # 验证调用
-                        mock_app.process_single_url.assert_called_once_with('https://example.com/product', None)
+                        mock_app.process_single_url.assert_called_once_with('https://example.com/product', None, options=PipelineOptions())
                         mock_exit.assert_called_with(0)
 
+    def test_main_refresh_options(self):
+        """测试 --refresh/--revalidate-images/--resume 转换为运行选项"""
+        mock_app = Mock()
+        mock_app.process_single_url.return_value = TemuListingResult(success=True, product_id="prod123")
+        
+        argv = ['main.py', '--url', 'https://example.com/product', '--refresh', '--revalidate-images', '--resume']
+        with patch('src.main.AutoTemuApp', return_value=mock_app):
+            with patch('sys.argv', argv):
+                with patch('sys.stdout'):
+                    with patch('sys.exit'):
+                        from src.main import main
+                        main()
+                        
+                        options = mock_app.process_single_url.call_args.kwargs["options"]
+                        assert options == PipelineOptions(
+                            refresh_scrape=True, refresh_ocr=True, refresh_uploads=True,
+                            refresh_templates=True, refresh_recommendations=True,
+                            revalidate_images=True, resume=True
+                        )
+
     def test_main_process_batch_urls(self):
         """测试主函数 - 批量处理URL"""
         # 模拟应用程序
@@ -302,8 +347,45 @@ class TestAutoTemuApp:
                         main()
                         
                         # 验证调用
-                        mock_app.process_batch_urls.assert_called_once_with(['https://example.com/1', 'https://example.com/2'], None)
+                        mock_app.process_batch_urls.assert_called_once_with(['https://example.com/1', 'https://example.com/2'], None, workers=1, options=PipelineOptions())
+                        mock_exit.assert_called_with(0)
+
+    def test_main_batch_prints_effective_workers(self):
+        """测试批量处理输出实际使用的并发数（不超过URL数量）"""
+        mock_app = Mock()
+        mock_app.process_batch_urls.return_value = [TemuListingResult(success=True, product_id="prod1")] * 2
+        
+        argv = ['main.py', '--urls', 'https://example.com/1', 'https://example.com/2', '--workers', '8']
+        with patch('src.main.AutoTemuApp', return_value=mock_app):
+            with patch('sys.argv', argv):
+                with patch('builtins.print') as mock_print:
+                    with patch('sys.exit'):
+                        from src.main import main
+                        main()
+                        
+                        output = " ".join(str(c.args[0]) for c in mock_print.call_args_list if c.args)
+                        assert "(并发数 2)" in output
+
+    def test_main_gc(self):
+        """测试主函数 - 回收图片目录"""
+        from src.image.image_cache import GcReport
+
+        mock_app = Mock()
+        mock_app.collect_image_garbage.return_value = GcReport(
+            files_scanned=3, bytes_before=3 * 1024 ** 2, files_removed=1, bytes_reclaimed=1024 ** 2
+        )
+        
+        with patch('src.main.AutoTemuApp', return_value=mock_app):
+            with patch('sys.argv', ['main.py', '--gc', '--gc-quota', '1000']):
+                with patch('builtins.print') as mock_print:
+                    with patch('sys.exit', side_effect=SystemExit) as mock_exit:
+                        from src.main import main
+                        with pytest.raises(SystemExit):
+                            main()
+                        
+                        mock_app.collect_image_garbage.assert_called_once_with(quota_bytes=1000, dry_run=False)
                         mock_exit.assert_called_with(0)
+                        assert "1.0 MB" in mock_print.call_args[0][0]
 
     def test_main_show_status(self):
         """测试主函数 - 显示状态"""
@@ -0,0 +1,75 @@
+"""
+耗时统计测试
+"""
+
+import pytest
+
+from src.core.workflow import WorkflowExecutor, WorkflowStep
+from src.utils.metrics import WorkflowMetrics, aggregate_timings, format_timing_report, percentile
+
+
+class TestPercentile:
+    """百分位数测试"""
+
+    def test_interpolates(self):
+        """测试线性插值"""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 95) == pytest.approx(4.8)
+
+    def test_empty(self):
+        """测试空列表"""
+        assert percentile([], 50) == 0.0
+
+
+class TestWorkflowMetrics:
+    """单个流程耗时记录测试"""
+
+    def test_records_api_calls(self):
+        """测试记录API调用次数和失败数"""
+        metrics = WorkflowMetrics("https://example.com/a")
+        metrics.record_api_call("template_get", 0.2)
+        metrics.record_api_call("template_get", 0.1, success=False)
+
+        data = metrics.to_dict()
+        assert data["url"] == "https://example.com/a"
+        assert data["api_calls"]["template_get"]["count"] == 2
+        assert data["api_calls"]["template_get"]["errors"] == 1
+
+    def test_executor_records_step_timings(self):
+        """测试工作流执行器记录每个步骤的耗时"""
+        metrics = WorkflowMetrics()
+        steps = [
+            WorkflowStep("a", lambda: True, provides=("a",)),
+            WorkflowStep("b", lambda: False, requires=("a",), provides=("b",)),
+        ]
+
+        WorkflowExecutor(steps, metrics=metrics).run()
+
+        assert set(metrics.to_dict()["steps"]) == {"a", "b"}
+
+
+class TestAggregateTimings:
+    """批量汇总测试"""
+
+    def test_aggregate(self):
+        """测试按步骤和API端点汇总"""
+        records = [
+            {"total": 10.0, "steps": {"scrape": 4.0},
+             "api_calls": {"goods_add": {"count": 1, "errors": 0, "latencies": [1.0]}}},
+            {"total": 20.0, "steps": {"scrape": 6.0},
+             "api_calls": {"goods_add": {"count": 3, "errors": 1, "latencies": [1.0, 2.0, 3.0]}}},
+        ]
+
+        report = aggregate_timings(records)
+
+        assert report["products"] == 2
+        assert report["total"]["max"] == 20.0
+        assert report["steps"]["scrape"]["p50"] == 5.0
+        assert report["api_calls"]["goods_add"]["count"] == 4
+        assert report["api_calls"]["goods_add"]["errors"] == 1
+        assert report["api_calls"]["goods_add"]["calls_per_product"] == 2.0
+
+        text = format_timing_report(report)
+        assert "scrape" in text
+        assert "goods_add" in text
@@ -0,0 +1,103 @@
+"""
+Temu模拟服务测试
+"""
+
+import pytest
+import requests
+from temu_api import TemuClient
+
+from src.temu.mock_server import LatencySpec, MockServerConfig, MockTemuServer
+from src.utils.rate_limiter import is_rate_limited_response
+
+
+@pytest.fixture
+def server():
+    with MockTemuServer(config=MockServerConfig(seed=1)) as server:
+        yield server
+
+
+def _client(server):
+    return TemuClient(app_key="key", app_secret="secret", access_token="token", base_url=server.url)
+
+
+class TestMockTemuServer:
+    """Temu模拟服务测试"""
+
+    def test_category_tree(self, server):
+        """测试分类树可逐级展开到叶子分类"""
+        client = _client(server)
+
+        roots = client.product.cats_get(parent_cat_id=0)["result"]["goodsCatsList"]
+        assert roots and not roots[0]["isLeaf"]
+
+        level2 = client.product.cats_get(parent_cat_id=roots[0]["catId"])["result"]["goodsCatsList"]
+        leaves = client.product.cats_get(parent_cat_id=level2[0]["catId"])["result"]["goodsCatsList"]
+        assert all(cat["isLeaf"] for cat in leaves)
+        assert 30847 in [cat["catId"] for cat in leaves]
+
+    def test_deterministic_responses(self, server):
+        """测试推荐分类和规格ID对相同输入稳定"""
+        client = _client(server)
+
+        first = client.product.category_recommend(goods_name="Cotton T-Shirt")["result"]["catId"]
+        second = client.product.category_recommend(goods_name="Cotton T-Shirt")["result"]["catId"]
+        assert first == second
+
+        spec = client.product.spec_id_get(cat_id=30847, parent_spec_id=3001, child_spec_name="M")
+        again = client.product.spec_id_get(cat_id=30847, parent_spec_id=3001, child_spec_name="M")
+        assert spec["result"]["specId"] == again["result"]["specId"]
+
+    def test_uploaded_image_is_served(self, server):
+        """测试上传后的图片URL可访问"""
+        client = _client(server)
+
+        result = client.product.image_upload(file_url="https://example.com/a.jpg", scaling_type=1)
+        url = result["result"]["url"]
+        response = requests.head(url, timeout=5)
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/jpeg"
+
+    def test_goods_add_returns_sku_ids(self, server):
+        """测试创建商品返回商品ID和SKU ID"""
+        client = _client(server)
+
+        result = client.product.goods_add(
+            goods_basic={}, goods_service_promise={}, goods_property={}, sku_list=[{}, {}]
+        )["result"]
+        again = client.product.goods_add(
+            goods_basic={}, goods_service_promise={}, goods_property={}, sku_list=[{}]
+        )["result"]
+
+        assert len(result["goodsSkuList"]) == 2
+        assert again["goodsId"] == result["goodsId"] + 1
+
+    def test_rate_limit_response(self):
+        """测试超出端点限速时返回可识别的限流响应"""
+        config = MockServerConfig(rate_limit={"cats_get": 1}, retry_after=2)
+        with MockTemuServer(config=config) as server:
+            client = _client(server)
+            assert client.product.cats_get(parent_cat_id=0)["success"]
+            limited = client.product.cats_get(parent_cat_id=0)
+
+        assert is_rate_limited_response(limited)
+        assert limited["retryAfter"] == 2
+
+    def test_error_injection(self):
+        """测试按端点注入业务错误"""
+        config = MockServerConfig(error_rate={"template_get": 1.0})
+        with MockTemuServer(config=config) as server:
+            client = _client(server)
+            failed = client.product.template_get(cat_id=30847)
+            ok = client.product.cats_get(parent_cat_id=0)
+            stats = server.state.stats
+
+        assert not failed["success"] and not is_rate_limited_response(failed)
+        assert ok["success"]
+        assert stats["template_get"]["errors"] == 1
+
+    def test_latency_spec(self):
+        """测试延迟分布解析"""
+        spec = LatencySpec.parse("0.2:0.5")
+        assert (spec.median, spec.sigma) == (0.2, 0.5)
+        assert LatencySpec.parse("0.1").sample(None) == 0.1
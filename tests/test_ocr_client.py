@@ -71,7 +71,7 @@ class TestOCRClient:
         assert client._access_token is None
         assert client._token_expires_at is None
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_success(self, mock_post, mock_token_response):
         """测试成功获取access_token"""
         mock_response = Mock()
@@ -92,7 +92,7 @@ class TestOCRClient:
         assert "oauth/2.0/token" in call_args[0][0]
         assert call_args[1]["params"]["client_id"] == "test_key"
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_api_error(self, mock_post):
         """测试API返回错误"""
         mock_response = Mock()
@@ -107,7 +107,7 @@ class TestOCRClient:
         
         assert "获取access_token失败" in str(exc_info.value)
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_network_error(self, mock_post):
         """测试网络错误"""
         mock_post.side_effect = Exception("网络超时")
@@ -165,7 +165,7 @@ class TestOCRClient:
         
         assert "文件读取失败" in str(exc_info.value)
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_recognize_text_success(self, mock_post, mock_token_response, mock_ocr_response):
         """测试成功识别文字"""
         # 模拟token请求
@@ -201,7 +201,7 @@ class TestOCRClient:
         finally:
             os.unlink(temp_file)
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_recognize_text_with_chinese(self, mock_post, mock_token_response, mock_ocr_response_with_chinese):
         """测试识别包含中文的文字"""
         # 模拟token请求
@@ -232,7 +232,7 @@ class TestOCRClient:
         finally:
             os.unlink(temp_file)
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_recognize_text_api_error(self, mock_post, mock_token_response):
         """测试OCR API返回错误"""
         # 模拟token请求
@@ -339,7 +339,7 @@ class TestOCRClient:
         finally:
             os.unlink(large_file)
     
-    @patch('src.image.ocr_client.requests.post')
+    @patch('requests.Session.post')
     def test_batch_recognize(self, mock_post, mock_token_response, mock_ocr_response):
         """测试批量识别"""
         # 模拟token请求
@@ -415,7 +415,7 @@ class TestOCRClient:
         client._token_expires_at = datetime.now() - timedelta(hours=1)
         
         # 应该重新获取token
-        with patch('src.image.ocr_client.requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_response = Mock()
             mock_response.json.return_value = {
                 "access_token": "new_token",
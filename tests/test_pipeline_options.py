@@ -0,0 +1,34 @@
+"""
+商品添加流程运行选项测试
+"""
+
+from dataclasses import fields
+
+import pytest
+
+from src.core.pipeline_options import PipelineOptions
+
+
+class TestPipelineOptions:
+    """运行选项测试"""
+
+    def test_defaults_use_all_caches(self):
+        """测试默认选项使用全部缓存且不从检查点继续"""
+        options = PipelineOptions()
+
+        assert all(getattr(options, field.name) is False for field in fields(options))
+
+    def test_from_force_scrape(self):
+        """测试 force_scrape 刷新全部缓存，但不改变重新校验和断点续跑"""
+        options = PipelineOptions.from_force_scrape(True)
+
+        assert options == PipelineOptions(
+            refresh_scrape=True, refresh_ocr=True, refresh_uploads=True,
+            refresh_templates=True, refresh_recommendations=True
+        )
+        assert PipelineOptions.from_force_scrape(False) == PipelineOptions()
+
+    def test_frozen(self):
+        """测试选项不可修改，多个流程并发运行时互不影响"""
+        with pytest.raises(AttributeError):
+            PipelineOptions().refresh_ocr = True
@@ -0,0 +1,91 @@
+"""
+限流器测试
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+from src.utils.config import get_config
+from src.utils.rate_limiter import RateLimiter, TokenBucket, is_rate_limited_response
+
+
+class TestTokenBucket:
+    """令牌桶测试"""
+
+    def test_burst_then_throttle(self):
+        """测试突发容量用完后按速率放行"""
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        waited = bucket.acquire()
+        assert 0.02 < waited < 0.2
+
+    def test_unlimited(self):
+        """测试速率为0时不限流"""
+        bucket = TokenBucket(rate=0, capacity=1)
+        assert all(bucket.acquire() == 0 for _ in range(100))
+
+    def test_pause(self):
+        """测试暂停期间不发放令牌"""
+        bucket = TokenBucket(rate=0, capacity=1)
+        bucket.pause(0.1)
+
+        assert bucket.acquire() >= 0.09
+
+
+class TestRateLimiter:
+    """限流器测试"""
+
+    def test_endpoints_have_separate_buckets(self):
+        """测试不同端点互不影响"""
+        limiter = RateLimiter(default_rate=10, default_burst=1, rates={"goods_add": 1})
+
+        limiter.acquire("goods_add")
+        assert limiter.acquire("image_upload") == 0
+
+        stats = limiter.stats()
+        assert stats["goods_add"]["acquired"] == 1
+        assert stats["image_upload"]["acquired"] == 1
+
+    def test_rate_limited_response_detection(self):
+        """测试识别限流响应"""
+        assert is_rate_limited_response({"success": False, "errorMsg": "Request too many, rate limit"})
+        assert is_rate_limited_response({"success": False, "errorCode": 429})
+        assert not is_rate_limited_response({"success": False, "errorMsg": "invalid param"})
+        assert not is_rate_limited_response({"success": True})
+
+
+class TestCallTemuRateLimit:
+    """Temu API调用限流测试"""
+
+    def test_retries_after_rate_limited_response(self, monkeypatch, make_manager):
+        """测试被限流后按retry_after等待并重试"""
+        limiter = RateLimiter(default_rate=0, rates={})
+        monkeypatch.setattr("src.core.product_manager.get_rate_limiter", lambda: limiter)
+        manager = make_manager(temu_client=MagicMock())
+        manager.temu_client.product.goods_add.side_effect = [
+            {"success": False, "errorMsg": "rate limit exceeded", "retryAfter": 0.1},
+            {"success": True, "result": {"goodsId": 1}},
+        ]
+
+        start = time.perf_counter()
+        result = manager._call_temu("goods_add", goods_basic={})
+
+        assert result["success"] == True
+        assert time.perf_counter() - start >= 0.09
+        assert limiter.stats()["goods_add"]["rate_limited"] == 1
+        assert manager.metrics.to_dict()["api_calls"]["goods_add"]["count"] == 2
+
+    def test_returns_rate_limited_response_after_retries(self, monkeypatch, make_manager):
+        """测试重试次数用尽后返回最后一次的限流响应"""
+        limiter = RateLimiter(default_rate=0, rates={})
+        monkeypatch.setattr("src.core.product_manager.get_rate_limiter", lambda: limiter)
+        manager = make_manager(temu_client=MagicMock())
+        limited = {"success": False, "errorCode": 429, "errorMsg": "too many requests", "retryAfter": 0.01}
+        manager.temu_client.product.spec_id_get.return_value = limited
+
+        with patch.object(get_config(), "temu_rate_limit_retries", 2):
+            assert manager._call_temu("spec_id_get", cat_id=1) == limited
+        assert limiter.stats()["spec_id_get"]["rate_limited"] == 2
+        assert manager.metrics.to_dict()["api_calls"]["spec_id_get"]["count"] == 3
@@ -0,0 +1,90 @@
+"""
+分类推荐缓存测试
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.core.pipeline_options import PipelineOptions
+from src.models.product import TemuProduct
+from src.transform.category_classifier import CategoryClassifier
+from src.transform.data_transformer import DataTransformer
+from src.transform.size_mapper import SizeMapper
+from src.utils.cache import PersistentCache
+
+
+class TestCategoryRecommendationCache:
+    """分类推荐缓存测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = PersistentCache(Path(self.temp_dir) / "recommendations.json")
+        self.classifier = CategoryClassifier()
+        self.patchers = [
+            patch.dict("src.utils.cache._named_caches", {"recommendations": self.cache}),
+            patch("src.core.product_manager.get_category_classifier", return_value=self.classifier),
+            patch("src.core.product_manager.append_listing_history"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.product_api = MagicMock()
+        self.product_api.category_recommend.return_value = {
+            "success": True, "result": {"catId": 12345, "catName": "Cargo Pants"}
+        }
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def manager_state(self, title):
+        """分类推荐所需的商品管理器状态"""
+        return {
+            "data_transformer": DataTransformer(SizeMapper()),
+            "scraped_product": MagicMock(main_image_url="https://example.com/a.jpg"),
+            "temu_product": TemuProduct(
+                title=title, description="", original_price=100, markup_price=130, currency="CNY"
+            ),
+            "temu_client": MagicMock(product=self.product_api),
+        }
+
+    def test_similar_title_skips_remote_call(self, make_manager):
+        """测试几乎相同的标题直接使用缓存的分类"""
+        first = make_manager(**self.manager_state("Men's Cargo Pants Black"))
+        assert first._get_category_recommendation() == True
+        assert self.product_api.category_recommend.call_count == 1
+
+        second = make_manager(**self.manager_state("MENS  cargo pants - black"))
+        assert second._get_category_recommendation() == True
+        assert second.temu_product.category_id == "12345"
+        assert self.product_api.category_recommend.call_count == 1
+
+    def test_refresh_bypasses_cache(self, make_manager):
+        """测试强制刷新时重新请求"""
+        make_manager(**self.manager_state("Cargo Pants"))._get_category_recommendation()
+
+        manager = make_manager(options=PipelineOptions(refresh_recommendations=True), **self.manager_state("Cargo Pants"))
+        assert manager._get_category_recommendation() == True
+        assert self.product_api.category_recommend.call_count == 2
+
+    def test_fallback_category_not_cached(self, make_manager):
+        """测试回退类目不写入缓存"""
+        self.product_api.category_recommend.return_value = {"success": False, "errorMsg": "no match"}
+
+        manager = make_manager(**self.manager_state("Unknown Thing"))
+        assert manager._get_category_recommendation() == True
+        assert manager.temu_product.category_id == "30847"
+        assert len(self.cache) == 0
+
+    def test_confident_local_prediction_skips_remote_call(self, make_manager):
+        """测试本地分类器高置信度时不请求远程推荐"""
+        self.classifier.add("Women Floral Midi Dress", 202)
+
+        manager = make_manager(**self.manager_state("Women Floral Midi Dress"))
+        assert manager._get_category_recommendation() == True
+        assert manager.temu_product.category_id == "202"
+        assert self.product_api.category_recommend.call_count == 0
@@ -0,0 +1,95 @@
+"""
+抓取缓存测试
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.scraper.scrape_cache import ScrapeCache
+from src.utils.cache import normalize_url, url_hash
+
+
+class TestNormalizeUrl:
+    """URL规范化测试"""
+
+    def test_equivalent_urls_share_key(self):
+        """测试等价URL得到相同的键"""
+        a = "HTTPS://Example.com:443/detail/abc/?b=2&a=1#gallery"
+        b = "https://example.com/detail/abc?a=1&b=2"
+        assert normalize_url(a) == normalize_url(b)
+        assert url_hash(a) == url_hash(b)
+
+    def test_different_urls_differ(self):
+        """测试不同URL得到不同的键"""
+        assert url_hash("https://example.com/detail/a") != url_hash("https://example.com/detail/b")
+
+    def test_non_default_port_kept(self):
+        """测试非默认端口保留"""
+        assert normalize_url("http://example.com:8080/x") == "http://example.com:8080/x"
+
+
+class TestScrapeCache:
+    """抓取缓存测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ScrapeCache(cache_dir=self.temp_dir, ttl=3600, max_entries=3)
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_set_and_get(self):
+        """测试写入后读取"""
+        self.cache.set("https://example.com/a", {"name": "A"})
+
+        assert self.cache.get("https://example.com/a") == {"name": "A"}
+        assert self.cache.get("https://example.com/a/") == {"name": "A"}
+
+    def test_urls_do_not_share_entries(self):
+        """测试不同URL互不复用"""
+        self.cache.set("https://example.com/a", {"name": "A"})
+
+        assert self.cache.get("https://example.com/b") is None
+
+    def test_expired_entry_is_removed(self):
+        """测试过期条目被删除"""
+        self.cache.set("https://example.com/a", {"name": "A"})
+
+        with patch("src.scraper.scrape_cache.time.time", return_value=time.time() + 7200):
+            assert self.cache.get("https://example.com/a") is None
+        assert not any(Path(self.temp_dir).glob("*.json"))
+
+    def test_lru_eviction(self):
+        """测试超出上限时淘汰最久未使用的条目"""
+        now = time.time()
+        for i, name in enumerate(["a", "b", "c"]):
+            self.cache.set(f"https://example.com/{name}", {"name": name})
+            path = Path(self.temp_dir) / f"{url_hash(f'https://example.com/{name}')}.json"
+            os.utime(path, (now - 100 + i, now - 100 + i))
+
+        # 访问a使其成为最近使用
+        assert self.cache.get("https://example.com/a") is not None
+        self.cache.set("https://example.com/d", {"name": "d"})
+
+        assert self.cache.get("https://example.com/b") is None
+        assert self.cache.get("https://example.com/a") is not None
+        assert self.cache.get("https://example.com/d") is not None
+
+    def test_corrupt_entry_is_ignored(self):
+        """测试损坏的缓存文件视为未命中"""
+        path = Path(self.temp_dir) / f"{url_hash('https://example.com/a')}.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        assert self.cache.get("https://example.com/a") is None
+
+    def test_no_temp_files_left(self):
+        """测试原子写入不残留临时文件"""
+        self.cache.set("https://example.com/a", {"name": "A"})
+
+        assert [p.name for p in Path(self.temp_dir).iterdir()] == [f"{url_hash('https://example.com/a')}.json"]
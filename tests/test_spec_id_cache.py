@@ -0,0 +1,66 @@
+"""
+规格ID缓存测试
+"""
+
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+from src.models.product import TemuProduct, TemuSKU
+from src.utils.cache import PersistentCache
+
+
+class FakeProductApi:
+    """记录spec_id_get调用的假API"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def spec_id_get(self, cat_id, parent_spec_id, child_spec_name):
+        with self._lock:
+            self.calls.append(child_spec_name)
+        return {"success": True, "result": {"specId": f"{cat_id}-{child_spec_name}"}}
+
+
+class TestGenerateSpecIds:
+    """规格ID生成测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.memo = PersistentCache(Path(self.temp_dir) / "spec_ids.json")
+        self.patcher = patch.dict("src.utils.cache._named_caches", {"spec_ids": self.memo})
+        self.patcher.start()
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def manager_state(self, sizes):
+        """规格ID生成所需的商品管理器状态"""
+        return {
+            "templates_cache": {"30847": {"userInputParentSpecList": [{"parentSpecName": "Size", "parentSpecId": 3001}]}},
+            "spec_ids_cache": {},
+            "temu_product": TemuProduct(
+                title="Jacket", description="", original_price=100, markup_price=130,
+                currency="CNY", category_id="30847",
+                skus=[TemuSKU(sku_id=f"SKU-{s}", size=s, original_size=s, price=130, stock_quantity=10) for s in sizes]
+            ),
+            "temu_client": type("Client", (), {"product": FakeProductApi()})(),
+        }
+
+    def test_known_sizes_cost_no_calls(self, make_manager):
+        """测试已缓存的尺码不再请求"""
+        first = make_manager(**self.manager_state(["S", "M", "L"]))
+        assert first._generate_spec_ids() == True
+        assert sorted(first.temu_client.product.calls) == ["L", "M", "S"]
+
+        second = make_manager(**self.manager_state(["S", "M", "L", "XL"]))
+        assert second._generate_spec_ids() == True
+        assert second.temu_client.product.calls == ["XL"]
+        assert list(second.spec_ids_cache["30847"]) == ["S", "M", "L", "XL"]
+        assert second.spec_ids_cache["30847"]["S"] == "30847-S"
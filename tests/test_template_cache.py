@@ -0,0 +1,159 @@
+"""
+持久化键值缓存和分类模板缓存测试
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.utils.cache import PersistentCache, get_named_cache
+from src.utils.config import get_config
+
+
+class TestPersistentCache:
+    """持久化键值缓存测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / "templates.json"
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_persisted_across_instances(self):
+        """测试写入后新实例可读取"""
+        PersistentCache(self.path, ttl=3600).set("30847", {"catType": 0})
+
+        assert PersistentCache(self.path, ttl=3600).get("30847") == {"catType": 0}
+
+    def test_expired_entry_misses(self):
+        """测试过期条目视为未命中"""
+        cache = PersistentCache(self.path, ttl=3600)
+        cache.set("30847", {"catType": 0})
+
+        with patch("src.utils.cache.time.time", return_value=time.time() + 7200):
+            assert cache.get("30847") is None
+
+    def test_get_or_load_uses_cache(self):
+        """测试命中时不调用加载函数，强制刷新时重新加载"""
+        cache = PersistentCache(self.path, ttl=3600)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {"n": len(calls)}
+
+        assert cache.get_or_load("k", loader) == {"n": 1}
+        assert cache.get_or_load("k", loader) == {"n": 1}
+        assert cache.get_or_load("k", loader, refresh=True) == {"n": 2}
+        assert len(calls) == 2
+
+    def test_failed_load_not_cached(self):
+        """测试加载失败不写入缓存"""
+        cache = PersistentCache(self.path, ttl=3600)
+
+        assert cache.get_or_load("k", lambda: None) is None
+        assert len(cache) == 0
+
+    def test_concurrent_misses_load_once(self):
+        """测试同一个键的并发未命中只加载一次"""
+        cache = PersistentCache(self.path, ttl=3600)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"ok": True}
+
+        threads = [threading.Thread(target=cache.get_or_load, args=("k", loader)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+
+    def test_corrupt_file_ignored(self):
+        """测试损坏的缓存文件被忽略"""
+        self.path.write_text("{not json", encoding="utf-8")
+
+        assert PersistentCache(self.path, ttl=3600).get("k") is None
+
+    def test_expired_entries_dropped_on_load(self):
+        """测试加载时丢弃过期条目"""
+        cache = PersistentCache(self.path, ttl=3600)
+        cache.set("old", 1)
+        with patch("src.utils.cache.time.time", return_value=time.time() + 1800):
+            cache.set("new", 2)
+
+        with patch("src.utils.cache.time.time", return_value=time.time() + 5000):
+            reopened = PersistentCache(self.path, ttl=3600)
+
+        assert len(reopened) == 1
+
+    def test_max_entries_evicts_least_recently_used(self):
+        """测试超过条目上限时淘汰最久未访问的条目"""
+        cache = PersistentCache(self.path, ttl=3600, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_writes_within_flush_interval_are_coalesced(self):
+        """测试间隔内的多次写入合并保存，flush 立即写入"""
+        cache = PersistentCache(self.path, ttl=3600, flush_interval=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert len(PersistentCache(self.path, ttl=3600)) == 1
+
+        cache.flush()
+
+        assert len(PersistentCache(self.path, ttl=3600)) == 2
+
+    def test_key_locks_released_after_load(self):
+        """测试加载结束后删除该键的加载锁"""
+        cache = PersistentCache(self.path, ttl=3600)
+
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("b", lambda: None)
+
+        assert cache._key_locks == {}
+
+
+class TestGetNamedCache:
+    """进程内共享的命名缓存测试"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.patchers = [
+            patch.dict("src.utils.cache._named_caches", clear=True),
+            patch.object(get_config(), "cache_dir", self.temp_dir),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self):
+        """每个测试方法执行后的清理"""
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_same_name_shares_instance(self):
+        """测试同名缓存只创建一次，文件位于缓存目录"""
+        cache = get_named_cache("templates", 3600)
+
+        assert get_named_cache("templates", 60) is cache
+        assert get_named_cache("uploads", 3600) is not cache
+        assert cache.path == Path(self.temp_dir) / "templates.json"
+        assert cache.ttl == 3600
@@ -0,0 +1,148 @@
+"""
+工作流执行器测试
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.core.workflow import WorkflowExecutor, WorkflowStep
+
+
+class TestWorkflowExecutor:
+    """工作流执行器测试"""
+
+    def test_runs_steps_in_dependency_order(self):
+        """测试按依赖顺序执行"""
+        order = []
+        lock = threading.Lock()
+
+        def make(name):
+            def func():
+                with lock:
+                    order.append(name)
+                return True
+            return func
+
+        steps = [
+            WorkflowStep("c", make("c"), requires=("b",), provides=("c",)),
+            WorkflowStep("a", make("a"), provides=("a",)),
+            WorkflowStep("b", make("b"), requires=("a",), provides=("b",)),
+        ]
+
+        assert WorkflowExecutor(steps).run() == True
+        assert order == ["a", "b", "c"]
+
+    def test_independent_steps_run_concurrently(self):
+        """测试相互独立的步骤并发执行"""
+        barrier = threading.Barrier(2, timeout=2)
+
+        def wait_for_peer():
+            barrier.wait()
+            return True
+
+        steps = [
+            WorkflowStep("left", wait_for_peer, provides=("left",)),
+            WorkflowStep("right", wait_for_peer, provides=("right",)),
+        ]
+
+        start = time.perf_counter()
+        assert WorkflowExecutor(steps, max_workers=2).run() == True
+        assert time.perf_counter() - start < 2
+
+    def test_failure_short_circuits(self):
+        """测试步骤失败后不再调度后续步骤"""
+        called = []
+
+        steps = [
+            WorkflowStep("fail", lambda: False, provides=("x",)),
+            WorkflowStep("after", lambda: called.append("after") or True, requires=("x",), provides=("y",)),
+        ]
+
+        assert WorkflowExecutor(steps).run() == False
+        assert called == []
+
+    def test_exception_counts_as_failure(self):
+        """测试步骤异常视为失败"""
+        def boom():
+            raise RuntimeError("boom")
+
+        steps = [WorkflowStep("boom", boom, provides=("x",))]
+
+        assert WorkflowExecutor(steps).run() == False
+
+    def test_available_data_satisfies_requirements(self):
+        """测试预先就绪的数据可满足依赖"""
+        steps = [
+            WorkflowStep("source", lambda: True, provides=("a",)),
+            WorkflowStep("sink", lambda: True, requires=("a",), provides=("b",)),
+        ]
+
+        assert WorkflowExecutor(steps).run(available=["a"]) == True
+
+    def test_completed_steps_are_skipped(self):
+        """测试产出已就绪的步骤被跳过"""
+        called = []
+
+        steps = [
+            WorkflowStep("done", lambda: called.append("done") or True, provides=("a",)),
+            WorkflowStep("next", lambda: called.append("next") or True, requires=("a",), provides=("b",)),
+        ]
+
+        assert WorkflowExecutor(steps).run(available=["a"]) == True
+        assert called == ["next"]
+
+    def test_on_step_complete_called_for_successful_steps(self):
+        """测试步骤成功后调用回调"""
+        completed = []
+
+        steps = [
+            WorkflowStep("ok", lambda: True, provides=("a",)),
+            WorkflowStep("fail", lambda: False, requires=("a",), provides=("b",)),
+        ]
+
+        executor = WorkflowExecutor(steps, on_step_complete=lambda step: completed.append(step.name))
+        assert executor.run() == False
+        assert completed == ["ok"]
+
+    def test_missing_provider_raises(self):
+        """测试依赖没有来源时报错"""
+        steps = [WorkflowStep("sink", lambda: True, requires=("missing",))]
+
+        with pytest.raises(ValueError):
+            WorkflowExecutor(steps)
+
+    def test_cycle_raises(self):
+        """测试循环依赖时报错"""
+        steps = [
+            WorkflowStep("a", lambda: True, requires=("b",), provides=("a",)),
+            WorkflowStep("b", lambda: True, requires=("a",), provides=("b",)),
+        ]
+
+        with pytest.raises(ValueError):
+            WorkflowExecutor(steps)
+
+
+class TestAddWorkflowGraph:
+    """商品添加工作流的步骤依赖测试"""
+
+    def test_cat_type_steps_wait_for_category(self, make_manager):
+        """测试依赖catType的尺码表步骤等待分类确定，图片校验不等待分类"""
+        from unittest.mock import patch
+
+        manager = make_manager()
+        captured = {}
+
+        class CapturingExecutor:
+            def __init__(self, steps, **kwargs):
+                captured.update({step.name: step for step in steps})
+
+            def run(self, available=None):
+                return True
+
+        with patch("src.core.product_manager.WorkflowExecutor", CapturingExecutor):
+            manager._execute_add_workflow("https://example.com/p")
+
+        assert "category_id" in captured["处理尺码表"].requires
+        assert captured["校验商品图片"].requires == ("product_images",)